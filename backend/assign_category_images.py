@@ -8,6 +8,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jaelleshop.settings')
 django.setup()
 
 from products.models import Category
+from products.image_registry import upload_image
 import cloudinary
 import cloudinary.uploader
 from cloudinary.utils import cloudinary_url
@@ -41,8 +42,8 @@ def assign_category_images():
             try:
                 print(f"📸 Upload image pour {category.name}...")
                 
-                # Upload l'image vers Cloudinary avec un nom approprié
-                upload_result = cloudinary.uploader.upload(
+                # Upload l'image vers Cloudinary avec un nom approprié (sauf si déjà dans le registre)
+                image_url = upload_image(
                     image_url,
                     folder="evimeria/categories",
                     public_id=f"category_{category_slug}",
@@ -57,7 +58,7 @@ def assign_category_images():
                 )
                 
                 # Assigner l'URL Cloudinary à la catégorie
-                category.image = upload_result['secure_url']
+                category.image = image_url
                 category.save()
                 
                 print(f"✅ Image assignée à {category.name}: {category.image}")
@@ -13,6 +13,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jaelleshop.settings')
 django.setup()
 
 from products.models import Category, Product, ProductImage
+from products.image_registry import find_by_source, upload_image
 
 # Images de qualité par catégorie (URLs Pexels)
 QUALITY_IMAGES = {
@@ -101,6 +102,11 @@ def download_and_upload_image(image_url, category_name, product_name, product_id
     try:
         print(f"    📸 Téléchargement pour {product_name}...")
         
+        # Registre d'images : URL déjà traitée -> ni téléchargement ni upload
+        existing = find_by_source(image_url)
+        if existing is not None:
+            return existing.url
+        
         # Télécharger l'image
         response = requests.get(image_url, stream=True, timeout=30)
         response.raise_for_status()
@@ -129,17 +135,17 @@ def download_and_upload_image(image_url, category_name, product_name, product_id
         public_id = f"product_{product_id}_{product_name.lower().replace(' ', '_')}"
         folder_path = f"evimeria/categories/{category_name.lower()}"
         
-        upload_result = cloudinary.uploader.upload(
+        secure_url = upload_image(
             img_byte_arr,
+            source_url=image_url,
             folder=folder_path,
             public_id=public_id,
-            resource_type="image",
             format="jpg",
             quality="auto:good",
             fetch_format="auto"
         )
         
-        return upload_result['secure_url']
+        return secure_url
         
     except Exception as e:
         print(f"    ❌ Erreur upload: {str(e)}")
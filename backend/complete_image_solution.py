@@ -15,6 +15,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jaelleshop.settings')
 django.setup()
 
 from products.models import Product, Category, ProductImage
+from products.image_registry import find_by_source, upload_image
 
 # Configuration Cloudinary
 cloudinary.config(
@@ -274,20 +275,26 @@ def detect_product_type(name):
 def download_and_upload_image(image_url, cloudinary_path):
     """Télécharge une image depuis Unsplash et l'uploade vers Cloudinary"""
     try:
+        # Registre d'images : URL déjà traitée -> ni téléchargement ni upload
+        existing = find_by_source(image_url)
+        if existing is not None:
+            return existing.url
+        
         # Télécharger l'image
         response = requests.get(image_url, timeout=10)
         response.raise_for_status()
         
-        # Upload vers Cloudinary
-        result = cloudinary.uploader.upload(
+        # Upload vers Cloudinary, sauf si le contenu y est déjà
+        secure_url = upload_image(
             response.content,
+            source_url=image_url,
             public_id=cloudinary_path,
             overwrite=True,
             resource_type="image",
             format="jpg"
         )
         
-        return result['secure_url']
+        return secure_url
         
     except Exception as e:
         print(f"❌ Erreur upload: {str(e)}")
@@ -0,0 +1,50 @@
+"""
+Rendu et lecture JSON de l'API avec orjson (sérialisation native des dict, listes, dates,
+UUID, en C), repli sur les classes standard de DRF si orjson n'est pas installé.
+
+La sortie est identique à celle de rest_framework.renderers.JSONRenderer avec la
+configuration par défaut (compacte, UTF-8, dates UTC en `Z`, U+2028/U+2029 échappés) ;
+les types qu'orjson ne connaît pas (Decimal, chaînes traduites, QuerySet...) passent par
+l'encodeur de DRF. Les réponses indentées (API navigable, `; indent=`) restent rendues
+par le module json standard.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : module json standard
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_fallback_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_fallback_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Entiers hors 64 bits, clés non prises en charge... : rendu standard
+            return super().render(data, accepted_media_type, renderer_context)
+        # Comme DRF : séparateurs de lignes JavaScript échappés
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -80,6 +80,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -93,6 +94,7 @@ INSTALLED_APPS = [
     'products',
     'users',
     'orders',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -250,8 +252,71 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
+    # JSON via orjson si installé (jaelleshop.fast_json), sortie identique au rendu standard
+    'DEFAULT_RENDERER_CLASSES': [
+        'jaelleshop.fast_json.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'jaelleshop.fast_json.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Cache : local-mémoire par défaut (un cache par worker), Redis partagé si REDIS_URL est défini
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'evimeria',
+        }
+    }
+
+# Cache des réponses publiques du catalogue (products.cache), 0 pour le désactiver
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', 300))
+# Durée (s) pendant laquelle la version de l'instantané injecté dans index.html est réutilisée
+CATALOG_SNAPSHOT_VERSION_TTL = 5
+
+# Injection de l'instantané du catalogue (catégories, produits mis en avant) dans index.html
+SPA_INLINE_CATALOG_STATE = os.environ.get('SPA_INLINE_CATALOG_STATE', 'True').lower() == 'true'
+
+# Compteurs de produits publiés maintenus en base par signaux (évite l'agrégation COUNT)
+# Après activation, lancer `python manage.py rebuild_product_counts` une fois.
+CATALOG_DENORMALIZED_COUNTS = os.environ.get('CATALOG_DENORMALIZED_COUNTS', 'False').lower() == 'true'
+
+# Numéros de commande (orders.numbering) : générateur par défaut selon la base si vide
+ORDER_NUMBER_GENERATOR = os.environ.get('ORDER_NUMBER_GENERATOR', '')
+ORDER_NUMBER_PREFIX = 'EVM'
+ORDER_NUMBER_BLOCK_SIZE = 50
+
+# Tâches de fond (jobs) : exécutées par `python manage.py run_jobs`
+JOBS_POLL_INTERVAL = 2
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_BACKOFF = 30
+# Une tâche sans heartbeat (report_progress) depuis ce délai est considérée abandonnée
+JOBS_STALE_AFTER = int(os.environ.get('JOBS_STALE_AFTER', 1800))
+# Période du heartbeat entretenu pendant les commandes de gestion (jobs.queue.run_command)
+JOBS_HEARTBEAT_INTERVAL = 60
+
+# Proxy d'images (products.image_proxy) : dérivés WebP des images Unsplash/Pexels servis localement
+IMAGE_PROXY_ENABLED = os.environ.get('IMAGE_PROXY_ENABLED', 'True').lower() == 'true'
+IMAGE_PROXY_HOSTS = ('images.unsplash.com', 'images.pexels.com')
+IMAGE_PROXY_ROOT = os.environ.get('IMAGE_PROXY_ROOT', os.path.join(BASE_DIR, 'image_cache'))
+IMAGE_PROXY_MAX_BYTES = int(os.environ.get('IMAGE_PROXY_MAX_BYTES', 512 * 1024 * 1024))
+IMAGE_PROXY_QUALITY = 80
+# Taille maximale d'un original téléchargé avant décodage par Pillow
+IMAGE_PROXY_MAX_ORIGINAL_BYTES = 20 * 1024 * 1024
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
@@ -0,0 +1,111 @@
+"""
+Coquille HTML de l'application React (frontend/dist/index.html) gardée en mémoire.
+
+Le fichier est lu une seule fois (relu si sa date de modification change lorsque
+DEBUG est actif), avec ses variantes gzip et brotli précalculées et un ETag.
+Les ressources JS/CSS référencées sont versionnées par Vite : la coquille est
+servie avec `Cache-Control: no-cache` pour être revalidée (304) à chaque visite.
+
+Si SPA_INLINE_CATALOG_STATE est actif, l'instantané du catalogue (products.snapshot)
+est injecté dans un <script type="application/json" id="initial-catalog-state">.
+La variante injectée est recalculée uniquement quand la version de l'instantané change
+(validateurs lus en base, voir products.snapshot.get_snapshot_version : une modification
+faite par un autre processus est donc prise en compte).
+"""
+import gzip
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.html import json_script
+
+try:
+    import brotli
+except ImportError:  # brotli (requirements.txt) absent : gzip seulement
+    brotli = None
+
+
+class ShellVariants:
+    """Corps brut et compressés d'une version de la coquille."""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        self.encoded = {'gzip': gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(body)
+
+    def pick_encoding(self, request):
+        accepted = {
+            part.split(';')[0].strip()
+            for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+        }
+        for encoding in ('br', 'gzip'):
+            if encoding in accepted and encoding in self.encoded:
+                return encoding
+        return None
+
+    def response(self, request):
+        not_modified = get_conditional_response(request, etag=self.etag)
+        if not_modified is not None:
+            response = not_modified
+        else:
+            encoding = self.pick_encoding(request)
+            response = HttpResponse(
+                self.encoded[encoding] if encoding else self.body,
+                content_type='text/html; charset=utf-8',
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = self.etag
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class SPAShell:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._variants = None
+        self._injected_key = None
+        self._injected = None
+
+    def load(self):
+        """Retourne les variantes en mémoire, ou None si le frontend n'est pas construit."""
+        if self._variants is not None and not settings.DEBUG:
+            return self._variants
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+        if self._variants is None or mtime != self._mtime:
+            with self._lock:
+                if self._variants is None or mtime != self._mtime:
+                    with open(self.path, 'rb') as f:
+                        self._variants = ShellVariants(f.read())
+                    self._mtime = mtime
+        return self._variants
+
+    def load_with_state(self, version, build_state):
+        """
+        Variantes avec l'état initial injecté avant </head>. `build_state(version)`
+        n'est appelé que si la coquille ou la version de l'instantané a changé.
+        """
+        base = self.load()
+        if base is None:
+            return None
+        key = (base.etag, version)
+        if self._injected_key != key:
+            script = json_script(build_state(version), 'initial-catalog-state').encode('utf-8')
+            injected = ShellVariants(base.body.replace(b'</head>', script + b'</head>', 1))
+            with self._lock:
+                self._injected_key, self._injected = key, injected
+        return self._injected
+
+
+spa_shell = SPAShell(os.path.join(settings.FRONTEND_DIR, 'dist', 'index.html'))
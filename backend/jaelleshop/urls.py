@@ -26,8 +26,13 @@ import socket
 import sys
 import django
 
+from .spa import spa_shell
+
 logger = logging.getLogger(__name__)
 
+# Charger la coquille React dès le chargement des URLs plutôt qu'à la première visite
+spa_shell.load()
+
 # Une vue simple pour l'API
 def api_root_view(request):
     logger.info("API root view accessed")
@@ -128,17 +133,27 @@ Settings: {settings_module}
 """
     return HttpResponse(response_text, content_type="text/plain")
 
+def inline_catalog_state(shell):
+    """Coquille avec l'instantané du catalogue injecté, ou coquille brute si la base est indisponible"""
+    from products.snapshot import get_catalog_snapshot, get_snapshot_version
+    try:
+        return spa_shell.load_with_state(get_snapshot_version(), get_catalog_snapshot)
+    except Exception as e:
+        logger.warning(f"Catalog snapshot unavailable, serving plain shell: {e}")
+        return shell
+
 # Vue pour servir le frontend React
 def serve_react_app(request):
     """Serve the React app"""
     try:
-        # Essayer de servir index.html du frontend
-        frontend_dist = os.path.join(settings.FRONTEND_DIR, 'dist')
-        index_path = os.path.join(frontend_dist, 'index.html')
+        # index.html du frontend, gardé en mémoire (voir jaelleshop/spa.py)
+        index_path = spa_shell.path
+        shell = spa_shell.load()
+        if shell is not None and settings.SPA_INLINE_CATALOG_STATE:
+            shell = inline_catalog_state(shell)
         
-        if os.path.exists(index_path):
-            with open(index_path, 'r', encoding='utf-8') as f:
-                return HttpResponse(f.read(), content_type='text/html')
+        if shell is not None:
+            return shell.response(request)
         else:
             # Si le frontend n'existe pas, retourner un message d'information
             return HttpResponse(f"""
@@ -186,6 +201,7 @@ urlpatterns = [
     path('api/', include('products.api.urls')),
     path('api/users/', include('users.urls')),
     path('api/orders/', include('orders.urls')),
+    path('api/jobs/', include('jobs.urls')),
     
     # Fallback pour le frontend React
     re_path(r'^.*$', serve_react_app, name='react_app'),
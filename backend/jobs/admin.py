@@ -0,0 +1,24 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'name', 'created_at']
+    search_fields = ['name', 'progress_message', 'error']
+    raw_id_fields = ['created_by']
+    readonly_fields = [
+        'status', 'progress', 'progress_message', 'result', 'error', 'attempts', 'locked_by',
+        'heartbeat_at', 'created_at', 'started_at', 'finished_at',
+    ]
+    actions = ['retry_jobs']
+
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status='running').update(
+            status='pending', attempts=0, error='', progress=0, run_after=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f"{updated} tâche(s) remise(s) en file.")
+    retry_jobs.short_description = "Relancer les tâches sélectionnées"
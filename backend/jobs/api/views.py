@@ -0,0 +1,50 @@
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework import generics, status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from jobs.models import Job
+from jobs.queue import UnknownTaskError, enqueue
+from .serializers import JobSerializer, JobCreateSerializer
+
+
+def accepted(job):
+    """Réponse 202 d'une tâche mise en file : l'avancement se suit sur son URL de détail."""
+    response = Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = reverse('jobs:job_detail', kwargs={'pk': job.pk})
+    return response
+
+
+class JobListCreateView(generics.ListAPIView):
+    permission_classes = (IsAdminUser,)
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        for field in ('status', 'name'):
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+    def post(self, request):
+        """Met une tâche en file et retourne immédiatement (202)"""
+        serializer = JobCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        try:
+            job = enqueue(data['name'], data['payload'], user=request.user, delay=data['delay'])
+        except UnknownTaskError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return accepted(job)
+
+
+class JobDetailView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, pk):
+        """État et avancement d'une tâche (à interroger périodiquement)"""
+        return Response(JobSerializer(get_object_or_404(Job, pk=pk)).data)
@@ -0,0 +1,66 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import default_worker_id, registered_tasks, work
+
+
+class Command(BaseCommand):
+    help = 'Lance les workers qui exécutent les tâches de fond en attente'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Nombre de processus workers')
+        parser.add_argument('--burst', action='store_true', help="S'arrêter quand la file est vide")
+        parser.add_argument('--poll-interval', type=float, default=None, help='Attente (s) quand la file est vide')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        self.stdout.write(self.style.SUCCESS(
+            f"{workers} worker(s) démarré(s) — tâches : {', '.join(registered_tasks()) or 'aucune'}"
+        ))
+
+        if workers == 1:
+            processed = self.run_worker(options['burst'], options['poll_interval'])
+            self.stdout.write(self.style.SUCCESS(f"{processed} tâche(s) traitée(s)"))
+            return
+
+        # Les connexions ne doivent pas être partagées entre processus forkés
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=self.run_worker, args=(options['burst'], options['poll_interval']))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        def forward(signum, frame):
+            for process in processes:
+                process.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+        self.stdout.write(self.style.SUCCESS("Workers arrêtés"))
+
+    def run_worker(self, burst, poll_interval):
+        stopping = []
+
+        def stop(signum, frame):
+            # Termine la tâche en cours avant de s'arrêter
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        try:
+            return work(default_worker_id(), burst=burst, poll_interval=poll_interval, should_stop=lambda: bool(stopping))
+        finally:
+            connections.close_all()
@@ -0,0 +1,206 @@
+"""
+File de tâches de fond stockée en base (aucun broker externe).
+
+- `@task('nom')` enregistre une fonction `func(job, **payload)` ; les modules `tasks.py`
+  des applications sont importés au démarrage (JobsConfig.ready).
+- `enqueue()` crée une tâche en attente ; les workers (`manage.py run_jobs`) la
+  réservent avec SELECT ... FOR UPDATE SKIP LOCKED, ou par UPDATE conditionnel
+  sur les bases qui ne le supportent pas (SQLite).
+- Une tâche qui lève une erreur transitoire (réseau, base indisponible : `retry_on`) est
+  relancée avec un délai exponentiel jusqu'à `max_attempts` ; les autres erreurs
+  (CommandError, arguments invalides...) la font échouer immédiatement. Une tâche dont
+  le worker a disparu (heartbeat trop ancien) est remise en attente.
+"""
+import io
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command, get_commands, load_command_class
+from django.db import InterfaceError, OperationalError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+_tasks = {}
+
+# Erreurs qui peuvent disparaître d'elles-mêmes ; OSError couvre aussi les erreurs
+# réseau (ConnectionError, TimeoutError, requests.RequestException)
+TRANSIENT_ERRORS = (OSError, OperationalError, InterfaceError)
+
+
+class UnknownTaskError(ValueError):
+    pass
+
+
+def task(name, max_attempts=None, retry_on=TRANSIENT_ERRORS):
+    def decorator(func):
+        func.job_name = name
+        func.max_attempts = max_attempts
+        func.retry_on = retry_on
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+def registered_tasks():
+    return sorted(_tasks)
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(name, payload=None, user=None, max_attempts=None, delay=0):
+    if name not in _tasks:
+        raise UnknownTaskError(f"Tâche inconnue : {name}")
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts or _tasks[name].max_attempts or get_setting('JOBS_MAX_ATTEMPTS', 3),
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next(worker_id=None):
+    """Réserve la prochaine tâche exécutable pour ce worker, ou None."""
+    worker_id = worker_id or default_worker_id()
+    now = timezone.now()
+    pending = Job.objects.filter(status='pending', run_after__lte=now).order_by('run_after', 'id')
+    claimed = {
+        'status': 'running', 'locked_by': worker_id, 'started_at': now, 'heartbeat_at': now,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = pending.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            for field, value in claimed.items():
+                setattr(job, field, value)
+            job.attempts += 1
+            job.save(update_fields=[*claimed, 'attempts'])
+            return job
+
+    # Réservation optimiste : seul le worker dont l'UPDATE touche la ligne l'obtient
+    for job_id in pending.values_list('id', flat=True)[:10]:
+        if Job.objects.filter(pk=job_id, status='pending').update(attempts=F('attempts') + 1, **claimed):
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def is_transient(exc, retry_on):
+    """Erreur transitoire, ou CommandError levée `from` une erreur transitoire."""
+    while exc is not None:
+        if isinstance(exc, retry_on):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=get_setting('JOBS_RETRY_BACKOFF', 30) * 2 ** max(attempts - 1, 0))
+
+
+def run_job(job):
+    """Exécute une tâche réservée et enregistre son résultat, sa relance ou son échec."""
+    func = _tasks.get(job.name)
+    try:
+        if func is None:
+            raise UnknownTaskError(f"Tâche inconnue : {job.name}")
+        result = func(job, **job.payload)
+    except Exception as exc:
+        now = timezone.now()
+        retry = func is not None and is_transient(exc, func.retry_on) and job.attempts < job.max_attempts
+        job.status = 'pending' if retry else 'failed'
+        job.error = traceback.format_exc()
+        job.run_after = now + retry_delay(job.attempts) if retry else job.run_after
+        job.finished_at = None if retry else now
+        job.locked_by = ''
+        job.save(update_fields=['status', 'error', 'run_after', 'finished_at', 'locked_by'])
+    else:
+        job.status = 'succeeded'
+        job.result = result
+        job.error = ''
+        job.progress = 100
+        job.finished_at = timezone.now()
+        job.locked_by = ''
+        job.save(update_fields=['status', 'result', 'error', 'progress', 'finished_at', 'locked_by'])
+    return job
+
+
+def requeue_stale():
+    """Remet en attente (ou en échec) les tâches dont le worker ne donne plus signe de vie."""
+    limit = timezone.now() - timedelta(seconds=get_setting('JOBS_STALE_AFTER', 1800))
+    stale = Job.objects.filter(status='running', heartbeat_at__lt=limit)
+    error = "Worker interrompu pendant l'exécution"
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', error=error, locked_by='', finished_at=timezone.now()
+    )
+    requeued = stale.update(status='pending', error=error, locked_by='', run_after=timezone.now())
+    return requeued + failed
+
+
+def work(worker_id=None, burst=False, poll_interval=None, should_stop=lambda: False):
+    """
+    Boucle d'un worker : réserve et exécute les tâches jusqu'à `should_stop()`.
+    En mode `burst`, s'arrête dès que la file est vide. Retourne le nombre de tâches traitées.
+    """
+    worker_id = worker_id or default_worker_id()
+    poll_interval = poll_interval if poll_interval is not None else get_setting('JOBS_POLL_INTERVAL', 2)
+    processed = 0
+    while not should_stop():
+        close_old_connections()
+        requeue_stale()
+        job = claim_next(worker_id)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def heartbeat(job, stop):
+    """Date le heartbeat de la tâche toutes les JOBS_HEARTBEAT_INTERVAL secondes jusqu'à `stop`."""
+    try:
+        while not stop.wait(get_setting('JOBS_HEARTBEAT_INTERVAL', 60)):
+            Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now())
+    finally:
+        connection.close()
+
+
+def run_command(job, command, *args, **options):
+    """
+    Exécute une commande de gestion dans une tâche ; sa sortie (fin) est gardée dans le résultat.
+    Un thread entretient le heartbeat pendant la commande, qui ne rend pas la main avant la fin :
+    une longue synchronisation n'est donc pas prise pour un worker disparu (requeue_stale).
+    Les commandes qui déclarent l'option cachée `progress` reçoivent job.report_progress.
+    Une commande en échec doit lever une exception (CommandError, avec sa cause chaînée).
+    """
+    output = io.StringIO()
+    job.report_progress(0, f"{command} en cours")
+    command = load_command_class(get_commands()[command], command)
+    if 'progress' in command.stealth_options:
+        options['progress'] = job.report_progress
+    stop = threading.Event()
+    beat = threading.Thread(target=heartbeat, args=(job, stop), name=f'job-{job.pk}-heartbeat', daemon=True)
+    beat.start()
+    try:
+        call_command(command, *args, stdout=output, stderr=output, **options)
+    finally:
+        stop.set()
+        beat.join()
+    return {'output': output.getvalue()[-10000:]}
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from cloudinary.exceptions import RateLimited
+from rest_framework.test import APIClient
+
+from .models import Job
+from .queue import claim_next, enqueue, requeue_stale, task, work
+
+User = get_user_model()
+calls = []
+
+
+@task('tests.add')
+def add(job, a, b):
+    job.report_progress(50, "Addition")
+    calls.append(Job.objects.get(pk=job.pk).progress)
+    return {'sum': a + b}
+
+
+@task('tests.broken')
+def broken(job):
+    raise ConnectionError("Cloudinary indisponible")
+
+
+@task('tests.invalid')
+def invalid(job):
+    raise CommandError("Dossier introuvable")
+
+
+@override_settings(JOBS_RETRY_BACKOFF=0)
+class JobQueueTests(TestCase):
+    def test_job_runs_with_progress(self):
+        job = enqueue('tests.add', {'a': 2, 'b': 3})
+        self.assertEqual(work(burst=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.progress), ('succeeded', {'sum': 5}, 100))
+        self.assertEqual(calls[-1], 50)
+
+    def test_failing_job_is_retried_then_failed(self):
+        job = enqueue('tests.broken', max_attempts=2)
+        self.assertEqual(work(burst=True), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIn('Cloudinary indisponible', job.error)
+
+    def test_permanent_errors_are_not_retried(self):
+        invalid_command = enqueue('tests.invalid', max_attempts=3)
+        # Argument manquant : TypeError, pas plus de relance
+        bad_arguments = enqueue('tests.add', {'a': 1}, max_attempts=3)
+        self.assertEqual(work(burst=True), 2)
+        for job in (invalid_command, bad_arguments):
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('failed', 1))
+
+    def test_delayed_job_is_not_claimed_early(self):
+        enqueue('tests.add', {'a': 1, 'b': 1}, delay=60)
+        self.assertIsNone(claim_next('worker-1'))
+
+    def test_claimed_job_is_exclusive(self):
+        enqueue('tests.add', {'a': 1, 'b': 1})
+        self.assertIsNotNone(claim_next('worker-1'))
+        self.assertIsNone(claim_next('worker-2'))
+
+    def test_stale_job_is_requeued(self):
+        job = enqueue('tests.add', {'a': 1, 'b': 1})
+        claim_next('worker-1')
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+
+
+@override_settings(JOBS_RETRY_BACKOFF=0)
+class CommandJobTests(TestCase):
+    """Tâches qui exécutent une commande de gestion : l'échec de la commande est celui de la tâche."""
+
+    def test_transient_command_failure_is_retried(self):
+        job = enqueue('sync_cloudinary', max_attempts=2)
+        with mock.patch(
+            'products.management.commands.sync_cloudinary.sync_folders',
+            side_effect=RateLimited("Limite de requêtes atteinte"),
+        ):
+            self.assertEqual(work(burst=True), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIn('Limite de requêtes atteinte', job.error)
+
+    def test_invalid_command_arguments_fail_at_once(self):
+        job = enqueue('upload_new_products', {'folder_path': '/dossier/inexistant', 'category': 'Hommes'})
+        self.assertEqual(work(burst=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 1))
+        self.assertIn("n'existe pas", job.error)
+
+
+class JobApiTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='secret', first_name='A', last_name='B')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_seed_endpoint_enqueues_instead_of_running(self):
+        response = self.client.post(reverse('api-seed-products'))
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.status, job.created_by), ('seed_products', 'pending', self.admin))
+
+        poll = self.client.get(response['Location'])
+        self.assertEqual(poll.data['status'], 'pending')
+
+    def test_unknown_task_is_rejected(self):
+        response = self.client.post(reverse('jobs:job_list_create'), {'name': 'inconnue'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_jobs_are_admin_only(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(reverse('jobs:job_list_create')).status_code, 401)
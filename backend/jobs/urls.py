@@ -0,0 +1,7 @@
+from django.urls import path, include
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('', include('jobs.api.urls')),
+]
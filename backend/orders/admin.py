@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import Order, OrderItem, Cart, CartItem
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -27,3 +27,14 @@ class OrderAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+class CartItemInline(admin.TabularInline):
+    model = CartItem
+    raw_id_fields = ['product']
+    extra = 0
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'session_key', 'updated_at']
+    search_fields = ['user__email', 'session_key']
+    inlines = [CartItemInline]
@@ -0,0 +1,48 @@
+from rest_framework import serializers
+from users.models import Address
+from orders.models import Order, OrderItem
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_slug = serializers.CharField(source='product.slug', read_only=True)
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product', 'product_name', 'product_slug', 'quantity', 'price', 'total_price']
+
+class OrderSerializer(serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'order_number', 'status', 'payment_method', 'payment_status',
+            'shipping_address', 'billing_address', 'total_price', 'items',
+            'created_at', 'updated_at'
+        ]
+
+class OrderLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, max_value=1000)
+
+class CartLineSerializer(OrderLineSerializer):
+    quantity = serializers.IntegerField(min_value=0, max_value=1000)
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+class CartValidateSerializer(serializers.Serializer):
+    items = CartLineSerializer(many=True, required=False, max_length=200)
+
+class OrderCreateSerializer(serializers.Serializer):
+    items = OrderLineSerializer(many=True, allow_empty=False, max_length=200)
+    payment_method = serializers.ChoiceField(choices=Order.PAYMENT_METHOD_CHOICES)
+    shipping_address = serializers.PrimaryKeyRelatedField(queryset=Address.objects.all(), required=False, allow_null=True)
+    billing_address = serializers.PrimaryKeyRelatedField(queryset=Address.objects.all(), required=False, allow_null=True)
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        for field in ('shipping_address', 'billing_address'):
+            address = attrs.get(field)
+            if address is not None and address.user_id != user.id:
+                raise serializers.ValidationError({field: "Adresse inconnue."})
+        return attrs
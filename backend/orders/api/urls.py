@@ -0,0 +1,20 @@
+from django.urls import path
+from .views import (
+    OrderListCreateView,
+    OrderDetailView,
+    CartView,
+    CartItemView,
+    CartValidateView
+)
+
+urlpatterns = [
+    # Panier
+    path('cart/', CartView.as_view(), name='cart'),
+    path('cart/items/', CartItemView.as_view(), name='cart_items'),
+    path('cart/items/<int:product_id>/', CartItemView.as_view(), name='cart_item'),
+    path('cart/validate/', CartValidateView.as_view(), name='cart_validate'),
+
+    # Commandes
+    path('', OrderListCreateView.as_view(), name='order_list_create'),
+    path('<str:order_number>/', OrderDetailView.as_view(), name='order_detail'),
+]
@@ -0,0 +1,114 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from orders.cart import add_item, cart_lines, get_cart, set_item, validate_lines
+from orders.models import Order
+from orders.services import OrderError, create_order
+from products.models import Product
+from .serializers import (
+    OrderSerializer,
+    OrderCreateSerializer,
+    CartLineSerializer,
+    CartValidateSerializer
+)
+
+def get_user_orders(user):
+    return Order.objects.filter(user=user).prefetch_related('items__product')
+
+class OrderListCreateView(generics.ListAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = OrderSerializer
+
+    def get_queryset(self):
+        return get_user_orders(self.request.user)
+
+    def post(self, request):
+        """Crée une commande en réservant le stock de façon atomique"""
+        serializer = OrderCreateSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            order = create_order(
+                user=request.user,
+                lines=data['items'],
+                payment_method=data['payment_method'],
+                shipping_address=data.get('shipping_address'),
+                billing_address=data.get('billing_address'),
+            )
+        except OrderError as e:
+            return Response({"error": e.message, "items": e.items}, status=status.HTTP_409_CONFLICT)
+
+        return Response(OrderSerializer(get_user_orders(request.user).get(pk=order.pk)).data, status=status.HTTP_201_CREATED)
+
+class OrderDetailView(generics.RetrieveAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = OrderSerializer
+    lookup_field = 'order_number'
+
+    def get_queryset(self):
+        return get_user_orders(self.request.user)
+
+class CartView(APIView):
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        """Panier courant, revalidé (prix, stock, disponibilité) en une requête"""
+        return Response(validate_lines(cart_lines(get_cart(request))))
+
+    def delete(self, request):
+        cart = get_cart(request)
+        if cart is not None:
+            cart.items.all().delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class CartItemView(APIView):
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        """Ajoute une quantité d'un produit au panier"""
+        serializer = CartLineSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        product = get_object_or_404(Product.objects.published(), pk=serializer.validated_data['product_id'])
+        cart = get_cart(request, create=True)
+        add_item(cart, product, serializer.validated_data['quantity'])
+        return Response(validate_lines(cart_lines(cart)), status=status.HTTP_201_CREATED)
+
+    def put(self, request, product_id):
+        """Fixe la quantité d'un produit (0 le retire)"""
+        data = request.data.copy()
+        data['product_id'] = product_id
+        serializer = CartLineSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        product = get_object_or_404(Product.objects.published(), pk=product_id)
+        cart = get_cart(request, create=True)
+        set_item(cart, product, serializer.validated_data['quantity'])
+        return Response(validate_lines(cart_lines(cart)))
+
+    def delete(self, request, product_id):
+        cart = get_cart(request)
+        if cart is not None:
+            cart.items.filter(product_id=product_id).delete()
+        return Response(validate_lines(cart_lines(cart)))
+
+class CartValidateView(APIView):
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        """
+        Revalide tout un panier en une requête : les lignes envoyées (panier du frontend)
+        ou, à défaut, le panier serveur.
+        """
+        serializer = CartValidateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        lines = serializer.validated_data.get('items')
+        if lines is None:
+            lines = cart_lines(get_cart(request))
+        return Response(validate_lines(lines))
@@ -0,0 +1,164 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from products.models import Product
+from .models import Cart, CartItem
+
+
+# Clé de session du panier anonyme, conservée dans les données de la session : login()
+# change la clé de session (cycle_key) mais garde ses données
+CART_SESSION_KEY = 'cart_session_key'
+
+
+def get_cart(request, create=False):
+    """
+    Panier de la requête : celui de l'utilisateur connecté, sinon celui de la session.
+    Un panier anonyme encore présent dans la session d'un utilisateur connecté est
+    fusionné dans son panier (connexion après avoir rempli un panier anonyme).
+    """
+    session = request.session
+    session_key = session.session_key
+    if request.user.is_authenticated:
+        cart = Cart.objects.filter(user=request.user).first()
+        if cart is None and create:
+            cart = Cart.objects.create(user=request.user)
+        if session_key:
+            anonymous_key = session.pop(CART_SESSION_KEY, session_key)
+            anonymous = Cart.objects.filter(session_key=anonymous_key, user__isnull=True).first()
+            if anonymous is not None:
+                cart = merge_carts(anonymous, cart, request.user)
+        return cart
+
+    if not session_key:
+        if not create:
+            return None
+        session.save()
+        session_key = session.session_key
+    if create:
+        cart = Cart.objects.get_or_create(session_key=session_key, user=None)[0]
+        if session.get(CART_SESSION_KEY) != session_key:
+            session[CART_SESSION_KEY] = session_key
+        return cart
+    return Cart.objects.filter(session_key=session_key, user__isnull=True).first()
+
+
+def merge_carts(source, target, user):
+    """Fusionne `source` dans `target` (quantités additionnées) puis supprime `source`."""
+    with transaction.atomic():
+        if target is None:
+            source.user = user
+            source.session_key = None
+            source.save(update_fields=['user', 'session_key', 'updated_at'])
+            return source
+
+        existing = {item.product_id: item for item in target.items.all()}
+        to_create, to_update = [], []
+        for item in source.items.all():
+            if item.product_id in existing:
+                existing[item.product_id].quantity += item.quantity
+                to_update.append(existing[item.product_id])
+            else:
+                to_create.append(CartItem(
+                    cart=target, product_id=item.product_id,
+                    quantity=item.quantity, unit_price=item.unit_price,
+                ))
+        CartItem.objects.bulk_update(to_update, ['quantity'])
+        CartItem.objects.bulk_create(to_create)
+        source.delete()
+    return target
+
+
+def set_item(cart, product, quantity):
+    """Fixe la quantité d'un produit dans le panier (0 le retire)."""
+    if quantity <= 0:
+        cart.items.filter(product=product).delete()
+        return None
+    item, _ = CartItem.objects.update_or_create(
+        cart=cart, product=product,
+        defaults={'quantity': quantity, 'unit_price': product.price},
+    )
+    return item
+
+
+def add_item(cart, product, quantity):
+    """
+    Ajoute une quantité d'un produit. (cart, product) est unique : get_or_create retrouve
+    la ligne créée par une requête concurrente, verrouillée le temps de l'incrément.
+    """
+    with transaction.atomic():
+        item, created = CartItem.objects.select_for_update().get_or_create(
+            cart=cart, product=product,
+            defaults={'quantity': quantity, 'unit_price': product.price},
+        )
+        if not created:
+            item.quantity = F('quantity') + quantity
+            item.save(update_fields=['quantity'])
+    return item
+
+
+def validate_lines(lines):
+    """
+    Revalide des lignes de panier {product_id, quantity, unit_price?} en une seule requête
+    (id__in) : prix courant, stock, disponibilité et écarts par rapport au panier.
+    """
+    ids = {line['product_id'] for line in lines}
+    products = {
+        row['id']: row
+        for row in Product.objects.filter(id__in=ids).values(
+            'id', 'name', 'slug', 'price', 'stock', 'available', 'is_published'
+        )
+    }
+
+    results = []
+    total = Decimal('0.00')
+    valid = True
+    for line in lines:
+        product = products.get(line['product_id'])
+        quantity = line['quantity']
+        if product is None or not (product['available'] and product['is_published']):
+            valid = False
+            results.append({
+                'product_id': line['product_id'],
+                'quantity': quantity,
+                'status': 'unavailable',
+                'available': False,
+            })
+            continue
+
+        previous_price = line.get('unit_price')
+        price_changed = previous_price is not None and previous_price != product['price']
+        quantity_available = min(quantity, product['stock'])
+        if quantity_available < quantity:
+            status = 'insufficient_stock'
+        elif price_changed:
+            status = 'price_changed'
+        else:
+            status = 'ok'
+        valid = valid and status == 'ok'
+        total += product['price'] * quantity_available
+        results.append({
+            'product_id': product['id'],
+            'name': product['name'],
+            'slug': product['slug'],
+            'quantity': quantity,
+            'quantity_available': quantity_available,
+            'stock': product['stock'],
+            'unit_price': product['price'],
+            'previous_price': previous_price,
+            'price_delta': product['price'] - previous_price if price_changed else Decimal('0.00'),
+            'status': status,
+            'available': True,
+        })
+    return {'items': results, 'total': total, 'valid': valid}
+
+
+def cart_lines(cart):
+    """Lignes d'un panier serveur au format attendu par validate_lines."""
+    if cart is None:
+        return []
+    return [
+        {'product_id': product_id, 'quantity': quantity, 'unit_price': unit_price}
+        for product_id, quantity, unit_price in cart.items.values_list('product_id', 'quantity', 'unit_price')
+    ]
@@ -52,3 +52,34 @@ class OrderItem(models.Model):
     @property
     def total_price(self):
         return self.price * self.quantity
+
+class Cart(models.Model):
+    """Panier serveur : rattaché à un utilisateur, ou à une session pour les visiteurs anonymes."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart', null=True, blank=True)
+    session_key = models.CharField(max_length=40, unique=True, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Panier"
+        verbose_name_plural = "Paniers"
+
+    def __str__(self):
+        owner = self.user.email if self.user_id else f"session {self.session_key}"
+        return f"Panier de {owner}"
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)  # Prix au moment de l'ajout
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Produit du panier"
+        verbose_name_plural = "Produits du panier"
+        unique_together = ('cart', 'product')
+        ordering = ['added_at']
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.name}"
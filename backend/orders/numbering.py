@@ -0,0 +1,130 @@
+"""
+Génération des numéros de commande, sans lecture préalable ni tentative en cas de collision.
+
+Le générateur est choisi par ORDER_NUMBER_GENERATOR (chemin d'import) ; par défaut,
+BlockSequenceOrderNumberGenerator sur PostgreSQL et TimeOrderedOrderNumberGenerator
+sur les autres bases.
+
+- SequenceOrderNumberGenerator : un `nextval()` par commande sur la séquence
+  `orders_order_number_seq` (migration 0004).
+- BlockSequenceOrderNumberGenerator : réserve un bloc de valeurs de la séquence en une
+  requête et les distribue depuis la mémoire du worker.
+- TimeOrderedOrderNumberGenerator : identifiants triables dans le temps au format ULID
+  (48 bits d'horodatage en millisecondes, 80 bits aléatoires), sans accès à la base.
+"""
+import os
+import secrets
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+SEQUENCE_NAME = 'orders_order_number_seq'
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+class OrderNumberGenerator:
+    def __init__(self, prefix=None, using='default'):
+        self.prefix = prefix if prefix is not None else getattr(settings, 'ORDER_NUMBER_PREFIX', 'EVM')
+        self.using = using
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def format(self, value):
+        return f'{self.prefix}-{value}' if self.prefix else str(value)
+
+    def reset_after_fork(self):
+        """État propre au processus : un worker forké ne doit pas réutiliser celui du parent."""
+
+    def check_fork(self):
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self.reset_after_fork()
+
+    def next(self):
+        raise NotImplementedError
+
+
+class SequenceOrderNumberGenerator(OrderNumberGenerator):
+    def fetch(self, count):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"SELECT nextval('{SEQUENCE_NAME}') FROM generate_series(1, %s)", [count])
+            return [row[0] for row in cursor.fetchall()]
+
+    def next(self):
+        return self.format(f'{self.fetch(1)[0]:08d}')
+
+
+class BlockSequenceOrderNumberGenerator(SequenceOrderNumberGenerator):
+    def __init__(self, block_size=None, **kwargs):
+        super().__init__(**kwargs)
+        self.block_size = block_size or getattr(settings, 'ORDER_NUMBER_BLOCK_SIZE', 50)
+        self._values = deque()
+
+    def reset_after_fork(self):
+        self._values = deque()
+
+    def next(self):
+        with self._lock:
+            self.check_fork()
+            if not self._values:
+                self._values.extend(self.fetch(self.block_size))
+            return self.format(f'{self._values.popleft():08d}')
+
+
+class TimeOrderedOrderNumberGenerator(OrderNumberGenerator):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._last_ms = 0
+        self._last_random = 0
+
+    def reset_after_fork(self):
+        self._last_ms = 0
+        self._last_random = 0
+
+    @staticmethod
+    def encode(value, length):
+        chars = []
+        for _ in range(length):
+            value, index = divmod(value, 32)
+            chars.append(CROCKFORD_ALPHABET[index])
+        return ''.join(reversed(chars))
+
+    def next(self):
+        with self._lock:
+            self.check_fork()
+            now_ms = int(time.time() * 1000)
+            if now_ms <= self._last_ms:
+                # Même milliseconde (ou horloge reculée) : incrément monotone de la partie aléatoire
+                now_ms = self._last_ms
+                self._last_random += 1
+            else:
+                self._last_random = secrets.randbits(80)
+            self._last_ms = now_ms
+            return self.format(self.encode(now_ms, 10) + self.encode(self._last_random % (1 << 80), 16))
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_order_number_generator():
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                path = getattr(settings, 'ORDER_NUMBER_GENERATOR', None)
+                if path:
+                    _generator = import_string(path)()
+                elif connections['default'].vendor == 'postgresql':
+                    _generator = BlockSequenceOrderNumberGenerator()
+                else:
+                    _generator = TimeOrderedOrderNumberGenerator()
+    return _generator
+
+
+def generate_order_number():
+    return get_order_number_generator().next()
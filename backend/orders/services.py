@@ -0,0 +1,94 @@
+from collections import OrderedDict
+
+from django.db import transaction
+from django.utils import timezone
+
+from products.cache import invalidate_catalog_cache
+from products.models import Product
+from .models import Order, OrderItem
+from .numbering import generate_order_number
+
+
+class OrderError(Exception):
+    """Commande impossible : produits introuvables ou stock insuffisant."""
+
+    def __init__(self, message, items=None):
+        super().__init__(message)
+        self.message = message
+        self.items = items or []
+
+
+def merge_lines(lines):
+    """Regroupe les lignes d'un même produit : {product_id: quantité}, dans l'ordre reçu."""
+    quantities = OrderedDict()
+    for line in lines:
+        quantities[line['product_id']] = quantities.get(line['product_id'], 0) + line['quantity']
+    return quantities
+
+
+def create_order(user, lines, payment_method, shipping_address=None, billing_address=None):
+    """
+    Crée une commande et réserve le stock en une seule transaction.
+
+    Les produits sont verrouillés (SELECT ... FOR UPDATE) dans l'ordre des identifiants,
+    ce qui évite les interblocages entre commandes concurrentes ; le stock est décrémenté
+    en un seul UPDATE (bulk_update) et les lignes insérées en un seul INSERT (bulk_create).
+    Le prix enregistré est le prix courant lu sous verrou, jamais celui envoyé par le client.
+
+    Le cache du catalogue n'est invalidé que si un produit passe en rupture : le stock des
+    réponses en cache peut retarder d'au plus CATALOG_CACHE_TIMEOUT, il est revérifié sous
+    verrou à chaque commande.
+    """
+    quantities = merge_lines(lines)
+    if not quantities:
+        raise OrderError("La commande ne contient aucun produit.")
+
+    with transaction.atomic():
+        products = {
+            product.pk: product
+            for product in Product.objects.select_for_update()
+            .published()
+            .filter(pk__in=quantities.keys())
+            .order_by('pk')
+        }
+
+        problems = []
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product is None:
+                problems.append({'product_id': product_id, 'error': 'Produit indisponible'})
+            elif product.stock < quantity:
+                problems.append({
+                    'product_id': product_id,
+                    'error': 'Stock insuffisant',
+                    'requested': quantity,
+                    'available': product.stock,
+                })
+        if problems:
+            raise OrderError("Certains produits ne peuvent pas être commandés.", problems)
+
+        now = timezone.now()
+        for product_id, quantity in quantities.items():
+            products[product_id].stock -= quantity
+            products[product_id].updated_at = now
+        Product.objects.bulk_update(products.values(), ['stock', 'updated_at'])
+
+        order = Order.objects.create(
+            user=user,
+            order_number=generate_order_number(),
+            payment_method=payment_method,
+            shipping_address=shipping_address,
+            billing_address=billing_address,
+            total_price=sum(
+                products[product_id].price * quantity for product_id, quantity in quantities.items()
+            ),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=products[product_id], quantity=quantity, price=products[product_id].price)
+            for product_id, quantity in quantities.items()
+        ])
+
+    # Rupture de stock : visible tout de suite dans le catalogue
+    if any(products[product_id].stock == 0 for product_id in quantities):
+        invalidate_catalog_cache()
+    return order
@@ -1,3 +1,271 @@
-from django.test import TestCase
+import threading
+import unittest
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from products.cache import get_catalog_version
+from products.models import Category, Product
+from .models import Order, Cart
+from .numbering import (
+    BlockSequenceOrderNumberGenerator, SequenceOrderNumberGenerator, TimeOrderedOrderNumberGenerator,
+)
+from .services import OrderError, create_order
+
+User = get_user_model()
+
+
+def create_product(slug, stock, price='25.00'):
+    category, _ = Category.objects.get_or_create(name='Hommes', slug='hommes', defaults={'is_published': True})
+    return Product.objects.create(
+        category=category, name=slug, slug=slug, description='',
+        price=Decimal(price), stock=stock, is_published=True,
+    )
+
+
+class OrderApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='secret', first_name='A', last_name='B')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.shirt = create_product('chemise', stock=5, price='30.00')
+        self.tie = create_product('cravate', stock=1, price='15.50')
+
+    def test_create_order_reserves_stock(self):
+        response = self.client.post(reverse('orders:order_list_create'), {
+            'payment_method': 'paypal',
+            'items': [
+                {'product_id': self.shirt.pk, 'quantity': 2},
+                {'product_id': self.tie.pk, 'quantity': 1},
+                {'product_id': self.shirt.pk, 'quantity': 1},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_price'], '105.50')
+        self.assertEqual(len(response.data['items']), 2)
+        self.shirt.refresh_from_db()
+        self.tie.refresh_from_db()
+        self.assertEqual((self.shirt.stock, self.tie.stock), (2, 0))
+
+    def test_insufficient_stock_changes_nothing(self):
+        response = self.client.post(reverse('orders:order_list_create'), {
+            'payment_method': 'paypal',
+            'items': [
+                {'product_id': self.shirt.pk, 'quantity': 1},
+                {'product_id': self.tie.pk, 'quantity': 2},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['items'][0]['available'], 1)
+        self.shirt.refresh_from_db()
+        self.assertEqual(self.shirt.stock, 5)
+        self.assertFalse(Order.objects.exists())
+
+    def test_catalog_cache_kept_until_sold_out(self):
+        version = get_catalog_version()
+        create_order(self.user, [{'product_id': self.shirt.pk, 'quantity': 1}], 'paypal')
+        self.assertEqual(get_catalog_version(), version)
+        create_order(self.user, [{'product_id': self.tie.pk, 'quantity': 1}], 'paypal')
+        self.assertGreater(get_catalog_version(), version)
+
+    def test_orders_are_private(self):
+        other = User.objects.create_user(email='autre@example.com', password='secret', first_name='C', last_name='D')
+        order = create_order(other, [{'product_id': self.shirt.pk, 'quantity': 1}], 'paypal')
+        response = self.client.get(reverse('orders:order_detail', kwargs={'order_number': order.order_number}))
+        self.assertEqual(response.status_code, 404)
+
+
+class CartTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.shirt = create_product('chemise', stock=3, price='30.00')
+        self.tie = create_product('cravate', stock=10, price='15.50')
+
+    def test_bulk_validation_is_one_query(self):
+        lines = [
+            {'product_id': self.shirt.pk, 'quantity': 5, 'unit_price': '30.00'},
+            {'product_id': self.tie.pk, 'quantity': 1, 'unit_price': '12.00'},
+            {'product_id': 999999, 'quantity': 1},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('orders:cart_validate'), {'items': lines}, format='json')
+        self.assertEqual(len(ctx.captured_queries), 1)
+        statuses = [item['status'] for item in response.data['items']]
+        self.assertEqual(statuses, ['insufficient_stock', 'price_changed', 'unavailable'])
+        self.assertEqual(response.data['items'][1]['price_delta'], Decimal('3.50'))
+        self.assertFalse(response.data['valid'])
+
+    def test_anonymous_cart_is_merged_on_login(self):
+        self.client.post(reverse('orders:cart_items'), {'product_id': self.shirt.pk, 'quantity': 1}, format='json')
+        user = User.objects.create_user(email='client@example.com', password='secret', first_name='A', last_name='B')
+        Cart.objects.create(user=user).items.create(product=self.shirt, quantity=1, unit_price=self.shirt.price)
+
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('orders:cart'))
+        self.assertEqual(response.data['items'][0]['quantity'], 2)
+        self.assertEqual(Cart.objects.count(), 1)
+
+    def test_anonymous_cart_survives_session_login(self):
+        self.client.post(reverse('orders:cart_items'), {'product_id': self.shirt.pk, 'quantity': 2}, format='json')
+        self.client.post(reverse('orders:cart_items'), {'product_id': self.shirt.pk, 'quantity': 1}, format='json')
+        anonymous_key = self.client.session.session_key
+        user = User.objects.create_user(email='client@example.com', password='secret', first_name='A', last_name='B')
+
+        # login() change la clé de session
+        self.assertTrue(self.client.login(email='client@example.com', password='secret'))
+        self.assertNotEqual(self.client.session.session_key, anonymous_key)
+        response = self.client.get(reverse('orders:cart'))
+        self.assertEqual(response.data['items'][0]['quantity'], 3)
+        self.assertEqual(Cart.objects.get().user, user)
+
+    def test_unpublished_product_cannot_be_set(self):
+        Product.objects.filter(pk=self.tie.pk).update(is_published=False)
+        url = reverse('orders:cart_item', kwargs={'product_id': self.tie.pk})
+        response = self.client.put(url, {'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class CheckoutStockTests(TestCase):
+    """Rupture de stock pendant le passage en caisse (toutes bases, SQLite compris)."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.product = create_product('edition-limitee', stock=3)
+
+    def checkout(self, email, quantity):
+        user = User.objects.create_user(email=email, password='x', first_name='A', last_name='B')
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('orders:order_list_create'), {
+            'payment_method': 'paypal',
+            'items': [{'product_id': self.product.pk, 'quantity': quantity}],
+        }, format='json')
+
+    def test_stock_never_goes_negative(self):
+        statuses = [self.checkout(f'client{i}@example.com', 1).status_code for i in range(5)]
+        self.assertEqual(statuses, [201, 201, 201, 409, 409])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_stock_taken_between_validation_and_checkout(self):
+        validation = self.client.post(reverse('orders:cart_validate'), {
+            'items': [{'product_id': self.product.pk, 'quantity': 2}],
+        }, format='json')
+        self.assertTrue(validation.data['valid'])
+
+        # Un autre client achète entre-temps
+        self.assertEqual(self.checkout('rapide@example.com', 2).status_code, 201)
+        response = self.checkout('lent@example.com', 2)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['items'][0]['available'], 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Verrouillage de lignes PostgreSQL requis')
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Test de charge : des centaines de commandes simultanées ne survendent jamais."""
+
+    checkouts = 300
+    stock = 30
+
+    def connection_slots(self):
+        """Connexions ouvertes en même temps par les threads : sous max_connections, avec une marge."""
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW max_connections')
+            max_connections = int(cursor.fetchone()[0])
+        return max(min(self.checkouts, max_connections - 10), 1)
+
+    def test_no_overselling(self):
+        product = create_product('edition-limitee', stock=self.stock)
+        users = User.objects.bulk_create([
+            User(email=f'client{i}@example.com', first_name='A', last_name='B')
+            for i in range(self.checkouts)
+        ])
+        results = []
+        barrier = threading.Barrier(self.checkouts)
+        slots = threading.BoundedSemaphore(self.connection_slots())
+
+        def checkout(user):
+            barrier.wait()
+            with slots:
+                try:
+                    create_order(user, [{'product_id': product.pk, 'quantity': 1}], 'paypal')
+                    results.append(True)
+                except OrderError:
+                    results.append(False)
+                finally:
+                    connections.close_all()
+
+        threads = [threading.Thread(target=checkout, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        self.assertEqual(len(results), self.checkouts)
+        self.assertEqual(results.count(True), self.stock)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(Order.objects.count(), self.stock)
+
+
+class OrderNumberBenchmarkMixin:
+    """Banc d'essai : numéros générés en parallèle, tous distincts."""
+
+    threads = 8
+    per_thread = 250
+
+    def run_concurrently(self, generator):
+        numbers = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.threads)
+
+        def worker():
+            try:
+                barrier.wait()
+                local = [generator.next() for _ in range(self.per_thread)]
+                with lock:
+                    numbers.extend(local)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(numbers), self.threads * self.per_thread)
+        self.assertEqual(len(set(numbers)), len(numbers))
+        return numbers
+
+
+class TimeOrderedOrderNumberTests(OrderNumberBenchmarkMixin, TestCase):
+    def test_unique_under_concurrency(self):
+        self.run_concurrently(TimeOrderedOrderNumberGenerator())
+
+    def test_numbers_sort_by_creation(self):
+        generator = TimeOrderedOrderNumberGenerator()
+        numbers = [generator.next() for _ in range(1000)]
+        self.assertEqual(numbers, sorted(numbers))
+        self.assertLessEqual(len(numbers[0]), Order._meta.get_field('order_number').max_length)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Séquence PostgreSQL requise')
+class SequenceOrderNumberTests(OrderNumberBenchmarkMixin, TransactionTestCase):
+    def test_sequence_unique_under_concurrency(self):
+        self.run_concurrently(SequenceOrderNumberGenerator())
+
+    def test_blocks_unique_across_workers(self):
+        # Deux générateurs = deux workers avec chacun leur bloc en mémoire
+        first, second = BlockSequenceOrderNumberGenerator(block_size=20), BlockSequenceOrderNumberGenerator(block_size=20)
+        numbers = [generator.next() for _ in range(50) for generator in (first, second)]
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.run_concurrently(BlockSequenceOrderNumberGenerator(block_size=100))
@@ -1,6 +1,7 @@
-from django.urls import path
-from . import views
+from django.urls import path, include
+
+app_name = 'orders'
  
 urlpatterns = [
-    # Les routes des orders seront ajoutées ici
-] 
\ No newline at end of file
+    path('', include('orders.api.urls')),
+]
@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import Category, SubCategory, Product, ProductImage
+from django.utils import timezone
+from .cache import invalidate_catalog_cache
+from .models import (
+    Category, SubCategory, Product, ProductImage, ImageAsset, ImageSource,
+    denormalized_counts_enabled, refresh_product_counts
+)
 
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
@@ -15,12 +20,14 @@ class CategoryAdmin(admin.ModelAdmin):
     actions = ['publish_categories', 'unpublish_categories']
     
     def publish_categories(self, request, queryset):
-        queryset.update(is_published=True)
+        queryset.update(is_published=True, updated_at=timezone.now())
+        invalidate_catalog_cache()
         self.message_user(request, f"{queryset.count()} catégories ont été publiées.")
     publish_categories.short_description = "Publier les catégories sélectionnées"
     
     def unpublish_categories(self, request, queryset):
-        queryset.update(is_published=False)
+        queryset.update(is_published=False, updated_at=timezone.now())
+        invalidate_catalog_cache()
         self.message_user(request, f"{queryset.count()} catégories ont été dépubliées.")
     unpublish_categories.short_description = "Dépublier les catégories sélectionnées"
 
@@ -34,12 +41,14 @@ class SubCategoryAdmin(admin.ModelAdmin):
     actions = ['publish_subcategories', 'unpublish_subcategories']
     
     def publish_subcategories(self, request, queryset):
-        queryset.update(is_published=True)
+        queryset.update(is_published=True, updated_at=timezone.now())
+        invalidate_catalog_cache()
         self.message_user(request, f"{queryset.count()} sous-catégories ont été publiées.")
     publish_subcategories.short_description = "Publier les sous-catégories sélectionnées"
     
     def unpublish_subcategories(self, request, queryset):
-        queryset.update(is_published=False)
+        queryset.update(is_published=False, updated_at=timezone.now())
+        invalidate_catalog_cache()
         self.message_user(request, f"{queryset.count()} sous-catégories ont été dépubliées.")
     unpublish_subcategories.short_description = "Dépublier les sous-catégories sélectionnées"
 
@@ -53,13 +62,26 @@ class ProductAdmin(admin.ModelAdmin):
     inlines = [ProductImageInline]
     actions = ['publish_products', 'unpublish_products']
     
+    def products_updated(self, queryset):
+        # queryset.update() ne déclenche pas les signaux ni auto_now : recalcul explicite des compteurs
+        # et invalidation du cache des réponses publiques
+        invalidate_catalog_cache()
+        if denormalized_counts_enabled():
+            parents = list(queryset.values_list('category_id', 'subcategory_id'))
+            refresh_product_counts(
+                category_ids={category_id for category_id, _ in parents},
+                subcategory_ids={subcategory_id for _, subcategory_id in parents},
+            )
+    
     def publish_products(self, request, queryset):
-        queryset.update(is_published=True)
+        queryset.update(is_published=True, updated_at=timezone.now())
+        self.products_updated(queryset)
         self.message_user(request, f"{queryset.count()} produits ont été publiés.")
     publish_products.short_description = "Publier les produits sélectionnés"
     
     def unpublish_products(self, request, queryset):
-        queryset.update(is_published=False)
+        queryset.update(is_published=False, updated_at=timezone.now())
+        self.products_updated(queryset)
         self.message_user(request, f"{queryset.count()} produits ont été dépubliés.")
     unpublish_products.short_description = "Dépublier les produits sélectionnés"
 
@@ -69,3 +91,15 @@ class ProductImageAdmin(admin.ModelAdmin):
     list_filter = ['is_main', 'created_at', 'product']
     list_editable = ['is_main']
     search_fields = ['product__name']
+
+class ImageSourceInline(admin.TabularInline):
+    model = ImageSource
+    extra = 0
+    readonly_fields = ['url', 'created_at']
+
+@admin.register(ImageAsset)
+class ImageAssetAdmin(admin.ModelAdmin):
+    list_display = ['public_id', 'width', 'height', 'bytes', 'created_at']
+    search_fields = ['public_id', 'sha256', 'url', 'sources__url']
+    readonly_fields = ['sha256', 'phash', 'url', 'public_id', 'width', 'height', 'bytes', 'created_at']
+    inlines = [ImageSourceInline]
@@ -3,9 +3,9 @@ import random
 import requests
 import io
 from decimal import Decimal
-import cloudinary.uploader
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.utils.text import slugify
+from products.image_registry import upload_image
 from products.models import Category, Product, ProductImage
 
 # Catégories de produits
@@ -199,24 +199,19 @@ PRODUCTS = {
 }
 
 def download_image(url, folder=''):
-    """Télécharge une image depuis une URL et l'upload sur Cloudinary"""
-    response = requests.get(url)
-    if response.status_code == 200:
-        file_name = os.path.basename(url.split('?')[0])
-        if not file_name.endswith(('.jpg', '.jpeg', '.png')):
-            file_name += '.jpg'
-        
-        # Upload directement vers Cloudinary avec le dossier spécifié
-        upload_result = cloudinary.uploader.upload(
-            response.content,
+    """Télécharge une image depuis une URL et l'upload sur Cloudinary, sauf si elle y est déjà"""
+    file_name = os.path.basename(url.split('?')[0])
+    if not file_name.endswith(('.jpg', '.jpeg', '.png')):
+        file_name += '.jpg'
+    try:
+        # Registre d'images : URL déjà téléchargée ou contenu déjà uploadé -> URL existante
+        return upload_image(
+            url,
             folder=folder,
             public_id=os.path.splitext(file_name)[0],  # Nom du fichier sans extension
-            resource_type="image"
         )
-        
-        # Retourne l'URL pour le modèle Django
-        return upload_result['url']
-    return None
+    except requests.RequestException:
+        return None
 
 def seed_categories():
     """Crée les catégories de produits"""
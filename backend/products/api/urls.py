@@ -17,8 +17,15 @@ urlpatterns = [
     path('products/', views.ProductListAPIView.as_view(), name='api-product-list'),
     path('products/featured/', views.FeaturedProductsAPIView.as_view(), name='api-featured-products'),
     path('products/search/', views.ProductSearchAPIView.as_view(), name='api-product-search'),
+    path('products/suggest/', views.ProductSuggestAPIView.as_view(), name='api-product-suggest'),
     path('products/<slug:slug>/', views.ProductDetailAPIView.as_view(), name='api-product-detail'),
     
+    # Export du catalogue publié (flux JSON Lines)
+    path('catalog/export.jsonl', views.CatalogExportView.as_view(), name='api-catalog-export'),
+    
+    # Dérivés WebP des images externes (proxy)
+    path('images/<str:token>.webp', views.image_derivative, name='api-image-derivative'),
+    
     # Seeding des données
     path('seed/', views.seed_products, name='api-seed-products'),
 ] 
\ No newline at end of file
@@ -3,14 +3,29 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count
+from django.core import signing
+from django.http import (
+    FileResponse, HttpResponseNotFound, HttpResponseNotModified, HttpResponseRedirect, StreamingHttpResponse,
+)
+from django.views.decorators.http import require_GET
+from django.db.models import Prefetch
 from django.conf import settings
-from django.core.management import call_command
 from rest_framework.generics import ListAPIView
 
+from jobs.api.views import accepted
+from jobs.queue import enqueue
+
+from products import image_proxy
+from products.cache import cache_catalog_response, conditional_catalog_response
+from products.catalog_io import iter_jsonl, iter_rows
+from products.fast_serializers import (
+    OPTIONAL_PRODUCT_FIELDS, PRODUCT_EXPANSIONS, PRODUCT_FIELDS, product_values, serialize_products,
+)
+from products.sparse_fields import InvalidFieldset, requested_fieldset
 from products.models import Category, SubCategory, Product, ProductImage
+from products.suggest import suggest, DEFAULT_LIMIT, MAX_LIMIT
 from products.serializers import (
     CategorySerializer,
     SubCategorySerializer,
@@ -24,42 +39,171 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 1000
 
+class CatalogCursorPagination(CursorPagination):
+    """Pagination keyset sur (created_at, id) : coût constant quelle que soit la profondeur."""
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('-created_at', '-id')
+
+class CatalogPaginationMixin:
+    """
+    Pagination des listes de produits :
+    - par numéro de page (StandardResultsSetPagination) par défaut ;
+    - par curseur avec `?pagination=cursor` (impose le tri par date de création) ;
+    - désactivée avec `?paginate=false` pour les clients qui attendent une liste brute.
+    """
+    pagination_class = StandardResultsSetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('paginate') == 'false':
+                self._paginator = None
+            elif params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = CatalogCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+CATEGORY_FIELDS = tuple(CategorySerializer.Meta.fields)
+CATEGORY_COLUMNS = ('name', 'slug', 'description', 'image')
+PRODUCT_DETAIL_FIELDS = tuple(ProductDetailSerializer.Meta.fields)
+
+def invalid_fieldset(error):
+    return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+def requested_product_fieldset(request):
+    return requested_fieldset(request, PRODUCT_FIELDS + OPTIONAL_PRODUCT_FIELDS, PRODUCT_EXPANSIONS)
+
+class FastProductListMixin:
+    """
+    Listes de produits sérialisées par products.fast_serializers (lignes .values() et
+    images groupées) : même JSON que ProductSerializer, sans instances de modèles.
+    Accepte `?fields=` et `?expand=` (voir products.sparse_fields).
+    """
+
+    def list(self, request, *args, **kwargs):
+        try:
+            fields, expand = requested_product_fieldset(request)
+        except InvalidFieldset as e:
+            return invalid_fieldset(e)
+        queryset = product_values(self.filter_queryset(self.get_queryset()), fields, expand)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_products(page, fields, expand))
+        return Response(serialize_products(queryset, fields, expand))
+
+def get_catalog_products(**filters):
+    """Base commune des listes publiques de produits, relations préchargées."""
+    return Product.objects.published().with_catalog_relations().filter(**filters)
+
+def product_list_validation_querysets(products):
+    """
+    Validateurs d'une liste de produits : les produits et les tables dont ils reprennent
+    des champs (category_name, subcategory_name, expansion), pour qu'un renommage change l'ETag.
+    """
+    return [products, Category.objects.all(), SubCategory.objects.all()]
+
+
+def get_catalog_categories(fields=None, **filters):
+    """
+    Catégories publiées avec leurs compteurs et sous-catégories annotées en requêtes groupées.
+    Avec `fields`, seules les colonnes utiles sont lues et les sous-catégories ne sont
+    préchargées que si elles sont demandées.
+    """
+    categories = Category.objects.filter(is_published=True, **filters).with_products_count()
+    if fields is not None:
+        columns = {name for name in fields if name in CATEGORY_COLUMNS}
+        if {'image_url', 'image_variants'} & set(fields):
+            columns.add('image')
+        categories = categories.only('id', *columns)
+        if 'subcategories' not in fields:
+            return categories
+    return categories.prefetch_related(
+        Prefetch('subcategories', queryset=SubCategory.objects.with_products_count())
+    )
+
 class CategoryListAPIView(ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = CategorySerializer
     pagination_class = StandardResultsSetPagination
+    fields = None  # ?fields=, lu dans get()
+    
+    def get_validation_querysets(self, request, *args, **kwargs):
+        return [
+            Category.objects.filter(is_published=True),
+            SubCategory.objects.all(),
+            Product.objects.filter(is_published=True),
+        ]
+    
+    @conditional_catalog_response
+    @cache_catalog_response
+    def get(self, request, *args, **kwargs):
+        try:
+            self.fields, _ = requested_fieldset(request, CATEGORY_FIELDS)
+        except InvalidFieldset as e:
+            return invalid_fieldset(e)
+        return super().get(request, *args, **kwargs)
+    
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, fields=self.fields, **kwargs)
     
     def get_queryset(self):
         """Récupère la liste de toutes les catégories publiées"""
-        return Category.objects.filter(is_published=True).annotate(
-            products_count=Count('products', filter=Q(products__is_published=True))
-        ).order_by('-products_count')
+        return get_catalog_categories(self.fields).order_by('-products_count')
 
 class CategoryDetailAPIView(APIView):
     permission_classes = [AllowAny]
     
+    def get_validation_querysets(self, request, slug):
+        return [
+            Category.objects.filter(slug=slug, is_published=True),
+            SubCategory.objects.filter(category__slug=slug),
+            Product.objects.filter(category__slug=slug, is_published=True),
+        ]
+    
+    @conditional_catalog_response
+    @cache_catalog_response
     def get(self, request, slug):
         """Récupère les détails d'une catégorie spécifique publiée"""
-        category = get_object_or_404(Category, slug=slug, is_published=True)
-        serializer = CategorySerializer(category)
+        try:
+            fields, _ = requested_fieldset(request, CATEGORY_FIELDS)
+        except InvalidFieldset as e:
+            return invalid_fieldset(e)
+        category = get_object_or_404(get_catalog_categories(fields), slug=slug)
+        serializer = CategorySerializer(category, fields=fields)
         return Response(serializer.data)
 
-class CategoryProductsAPIView(APIView):
+class CategoryProductsAPIView(FastProductListMixin, CatalogPaginationMixin, ListAPIView):
     permission_classes = [AllowAny]
+    serializer_class = ProductSerializer
     
-    def get(self, request, slug):
-        """Récupère tous les produits d'une catégorie spécifique publiée"""
-        category = get_object_or_404(Category, slug=slug, is_published=True)
-        products = Product.objects.filter(category=category, available=True, is_published=True)
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+    def get_validation_querysets(self, request, *args, **kwargs):
+        return product_list_validation_querysets(self.get_queryset())
+    
+    @conditional_catalog_response
+    @cache_catalog_response
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+    
+    def get_queryset(self):
+        """Récupère les produits d'une catégorie spécifique publiée"""
+        category = get_object_or_404(Category, slug=self.kwargs['slug'], is_published=True)
+        return get_catalog_products(category=category).order_by('-created_at', '-id')
 
 class SubCategoryListAPIView(APIView):
     permission_classes = [AllowAny]
     
+    def get_validation_querysets(self, request):
+        return [SubCategory.objects.filter(is_published=True), Product.objects.filter(is_published=True)]
+    
+    @conditional_catalog_response
+    @cache_catalog_response
     def get(self, request):
         """Récupère la liste de toutes les sous-catégories publiées"""
-        subcategories = SubCategory.objects.filter(is_published=True)
+        subcategories = SubCategory.objects.filter(is_published=True).with_products_count()
         serializer = SubCategorySerializer(subcategories, many=True)
         return Response(serializer.data)
 
@@ -68,6 +212,18 @@ class SubCategoryByCategoryAPIView(ListAPIView):
     serializer_class = SubCategorySerializer
     pagination_class = StandardResultsSetPagination
 
+    def get_validation_querysets(self, request, *args, **kwargs):
+        category_slug = request.query_params.get('category')
+        return [
+            self.get_queryset(),
+            Product.objects.filter(subcategory__category__slug=category_slug, is_published=True),
+        ]
+    
+    @conditional_catalog_response
+    @cache_catalog_response
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+    
     def get_queryset(self):
         """Récupère les sous-catégories d'une catégorie spécifique."""
         category_slug = self.request.query_params.get('category')
@@ -78,35 +234,60 @@ class SubCategoryByCategoryAPIView(ListAPIView):
         return SubCategory.objects.filter(
             category=category, 
             is_published=True
-        ).annotate(
-            products_count=Count('products', filter=Q(products__is_published=True))
-        ).order_by('name')
+        ).with_products_count().order_by('name')
 
 class SubCategoryDetailAPIView(APIView):
     permission_classes = [AllowAny]
     
+    def get_validation_querysets(self, request, slug):
+        return [
+            SubCategory.objects.filter(slug=slug, is_published=True),
+            Product.objects.filter(subcategory__slug=slug, is_published=True),
+        ]
+    
+    @conditional_catalog_response
+    @cache_catalog_response
     def get(self, request, slug):
         """Récupère les détails d'une sous-catégorie spécifique publiée"""
-        subcategory = get_object_or_404(SubCategory, slug=slug, is_published=True)
+        subcategory = get_object_or_404(
+            SubCategory.objects.with_products_count(), slug=slug, is_published=True
+        )
         serializer = SubCategorySerializer(subcategory)
         return Response(serializer.data)
 
-class SubCategoryProductsAPIView(APIView):
+class SubCategoryProductsAPIView(FastProductListMixin, CatalogPaginationMixin, ListAPIView):
     permission_classes = [AllowAny]
+    serializer_class = ProductSerializer
     
-    def get(self, request, slug):
-        """Récupère tous les produits d'une sous-catégorie spécifique publiée"""
-        subcategory = get_object_or_404(SubCategory, slug=slug, is_published=True)
-        products = Product.objects.filter(subcategory=subcategory, available=True, is_published=True)
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+    def get_validation_querysets(self, request, *args, **kwargs):
+        return product_list_validation_querysets(self.get_queryset())
+    
+    @conditional_catalog_response
+    @cache_catalog_response
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+    
+    def get_queryset(self):
+        """Récupère les produits d'une sous-catégorie spécifique publiée"""
+        subcategory = get_object_or_404(SubCategory, slug=self.kwargs['slug'], is_published=True)
+        return get_catalog_products(subcategory=subcategory).order_by('-created_at', '-id')
 
-class ProductListAPIView(APIView):
+class ProductListAPIView(FastProductListMixin, CatalogPaginationMixin, ListAPIView):
     permission_classes = [AllowAny]
+    serializer_class = ProductSerializer
     
-    def get(self, request):
-        """Récupère la liste de tous les produits publiés"""
-        products = Product.objects.filter(available=True, is_published=True)
+    def get_validation_querysets(self, request, *args, **kwargs):
+        return product_list_validation_querysets(self.get_queryset())
+    
+    @conditional_catalog_response
+    @cache_catalog_response
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+    
+    def get_queryset(self):
+        """Récupère la liste des produits publiés"""
+        request = self.request
+        products = get_catalog_products()
         
         # Filtrage par catégorie
         category = request.query_params.get('category')
@@ -125,10 +306,10 @@ class ProductListAPIView(APIView):
         # Recherche
         search = request.query_params.get('search')
         if search:
-            products = products.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search)
-            )
+            products = products.search(search)
+            # Sans tri explicite, les résultats sont classés par pertinence
+            if 'sort_by' not in request.query_params:
+                return products.order_by('-search_rank', '-created_at', '-id')
             
         # Tri
         sort_by = request.query_params.get('sort_by', 'created_at')
@@ -137,63 +318,148 @@ class ProductListAPIView(APIView):
         if sort_order == 'desc':
             sort_by = f'-{sort_by}'
             
-        products = products.order_by(sort_by)
-        
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        return products.order_by(sort_by, '-id')
 
 class ProductDetailAPIView(APIView):
     permission_classes = [AllowAny]
     
+    def get_validation_querysets(self, request, slug):
+        return [
+            Product.objects.filter(slug=slug),
+            Category.objects.filter(products__slug=slug),
+            SubCategory.objects.filter(category__products__slug=slug),
+        ]
+    
+    @conditional_catalog_response
+    @cache_catalog_response
     def get(self, request, slug):
         """Récupère les détails d'un produit spécifique publié"""
-        product = get_object_or_404(Product, slug=slug, available=True, is_published=True)
-        serializer = ProductDetailSerializer(product)
+        try:
+            # La catégorie et la sous-catégorie sont toujours développées ici : expand est accepté sans effet
+            fields, _ = requested_fieldset(request, PRODUCT_DETAIL_FIELDS, PRODUCT_EXPANSIONS)
+        except InvalidFieldset as e:
+            return invalid_fieldset(e)
+        products = get_catalog_products()
+        if fields is not None:
+            if 'description' not in fields:
+                products = products.defer('description')
+            if 'images' not in fields:
+                products = products.prefetch_related(None)
+        if fields is None or 'category' in fields:
+            products = products.prefetch_related(
+                Prefetch('category__subcategories', queryset=SubCategory.objects.with_products_count())
+            )
+        product = get_object_or_404(products, slug=slug)
+        serializer = ProductDetailSerializer(product, fields=fields)
         return Response(serializer.data)
 
 class FeaturedProductsAPIView(APIView):
     permission_classes = [AllowAny]
     
+    def get_validation_querysets(self, request):
+        return product_list_validation_querysets(get_catalog_products(featured=True))
+    
+    @conditional_catalog_response
+    @cache_catalog_response
     def get(self, request):
         """Récupère les produits mis en avant et publiés"""
-        products = Product.objects.filter(featured=True, available=True, is_published=True)[:8]
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        try:
+            fields, expand = requested_product_fieldset(request)
+        except InvalidFieldset as e:
+            return invalid_fieldset(e)
+        products = product_values(get_catalog_products(featured=True), fields, expand)[:8]
+        return Response(serialize_products(products, fields, expand))
 
-class ProductSearchAPIView(APIView):
+class ProductSearchAPIView(FastProductListMixin, CatalogPaginationMixin, ListAPIView):
     permission_classes = [AllowAny]
+    serializer_class = ProductSerializer
     
-    def get(self, request):
+    def get_validation_querysets(self, request, *args, **kwargs):
+        # Sans terme de recherche, get() répond 400 : rien à valider
+        if not request.query_params.get('q', ''):
+            return None
+        return product_list_validation_querysets(self.get_queryset())
+    
+    @conditional_catalog_response
+    @cache_catalog_response
+    def get(self, request, *args, **kwargs):
         """Recherche de produits publiés"""
-        query = request.query_params.get('q', '')
-        if not query:
+        if not request.query_params.get('q', ''):
             return Response(
                 {"error": "Paramètre de recherche 'q' requis"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        products = Product.objects.filter(
-            Q(name__icontains=query) | Q(description__icontains=query),
-            available=True,
-            is_published=True
-        )
-        
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        return super().get(request, *args, **kwargs)
+    
+    def get_queryset(self):
+        """Résultats classés par pertinence (nom > catégorie > description)"""
+        query = self.request.query_params.get('q', '')
+        return get_catalog_products().search(query).order_by('-search_rank', '-created_at', '-id')
+
+class ProductSuggestAPIView(APIView):
+    permission_classes = [AllowAny]
+    
+    @cache_catalog_response
+    def get(self, request):
+        """Suggestions de produits, catégories et sous-catégories tolérantes aux fautes de frappe"""
+        try:
+            limit = min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        return Response(suggest(request.query_params.get('q', ''), max(limit, 1)))
+
+class CatalogExportView(APIView):
+    """
+    Catalogue publié complet en JSON Lines (format de catalog_export), envoyé en flux :
+    lecture par curseur (.values().iterator()), mémoire constante et premier octet immédiat.
+    """
+    permission_classes = [IsAuthenticated]
+    chunk_size = 2000
+
+    def get(self, request):
+        rows = iter_rows(published_only=True, chunk_size=self.chunk_size)
+        response = StreamingHttpResponse(iter_jsonl(rows), content_type='application/x-ndjson; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="catalog.jsonl"'
+        response['Cache-Control'] = 'private, no-store'
+        # Pas de mise en tampon par un proxy nginx
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def seed_products(request):
-    """Endpoint pour peupler la base de données avec des produits de démonstration"""
+    """Met en file le peuplement de la base avec des produits de démonstration (suivi via /api/jobs/<id>/)"""
+    return accepted(enqueue('seed_products', user=request.user))
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+@require_GET
+def image_derivative(request, token):
+    """Dérivé WebP d'une image externe (voir products.image_proxy), généré au premier accès"""
     try:
-        # Utilise notre nouvelle commande de seeding
-        call_command('seed_products')
-        return Response(
-            {"message": "Base de données peuplée avec succès"}, 
-            status=status.HTTP_200_OK
-        )
-    except Exception as e:
-        return Response(
-            {"error": str(e)}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        ) 
\ No newline at end of file
+        url, width, height = image_proxy.parse_token(token)
+    except (signing.BadSignature, ValueError, TypeError):
+        return HttpResponseNotFound()
+
+    if image_proxy.Image is None:
+        return HttpResponseRedirect(url)
+    key = image_proxy.derivative_key(url, width, height)
+    etag = f'"{key}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        # Le dérivé peut être évincé (LRU) entre sa génération et l'ouverture : une seconde chance
+        for attempt in range(2):
+            try:
+                path, key = image_proxy.derivative(url, width, height)
+                response = FileResponse(open(path, 'rb'), content_type='image/webp')
+                break
+            except FileNotFoundError:
+                if attempt:
+                    return HttpResponseRedirect(url)
+            except Exception:
+                # Origine indisponible ou image illisible : le navigateur tente l'original
+                return HttpResponseRedirect(url)
+    response['ETag'] = etag
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -0,0 +1,147 @@
+"""
+Cache des réponses publiques du catalogue et validation HTTP conditionnelle.
+
+Les clés sont préfixées par une version globale du catalogue : toute modification
+(signaux des modèles, actions groupées de l'admin) incrémente cette version, ce qui
+invalide d'un coup toutes les réponses en cache sans avoir à les énumérer.
+Avec le cache local-mémoire par défaut, chaque worker gunicorn a son propre cache :
+CATALOG_CACHE_TIMEOUT borne alors la durée pendant laquelle un autre worker peut
+servir une réponse périmée. Configurer REDIS_URL pour un cache partagé.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+VERSION_KEY = 'catalog:version'
+
+
+def get_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+def get_catalog_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_catalog_cache():
+    """
+    Invalide toutes les réponses du catalogue, immédiatement et de nouveau au commit
+    pour qu'une requête concurrente ne remette pas en cache l'état d'avant la transaction.
+    """
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+def catalog_cache_key(request):
+    """Clé par endpoint incluant les paramètres de requête (dans un ordre stable)."""
+    params = sorted(
+        (key, value) for key in request.query_params for value in request.query_params.getlist(key)
+    )
+    raw = f'{request.path}?{params}'
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'catalog:{get_catalog_version()}:{digest}'
+
+
+def cache_catalog_response(view_method):
+    """
+    Décorateur pour les méthodes `get` des vues publiques : met en cache `response.data`
+    des réponses 200 servies aux visiteurs anonymes.
+    """
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        timeout = get_timeout()
+        if not timeout or request.user.is_authenticated:
+            return view_method(view, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = catalog_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            return Response(cached)
+
+        response = view_method(view, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout)
+        return response
+    return wrapper
+
+
+def catalog_validators(querysets):
+    """
+    ETag fort et date de dernière modification calculés à partir de
+    (nombre de lignes, max(updated_at)) de chaque queryset : deux agrégats, aucune sérialisation.
+    """
+    parts = []
+    last_modified = None
+    for queryset in querysets:
+        aggregate = queryset.order_by().aggregate(total=Count('pk'), last=Max('updated_at'))
+        last = aggregate['last']
+        parts.append(f"{aggregate['total']}:{last.isoformat() if last else ''}")
+        if last and (last_modified is None or last > last_modified):
+            last_modified = last
+    etag = '"%s"' % hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return etag, timestamp
+
+
+def conditional_catalog_response(view_method):
+    """
+    Décorateur pour les méthodes `get` : répond 304 à If-None-Match / If-Modified-Since
+    avant toute sérialisation. La vue fournit `get_validation_querysets(request, *args, **kwargs)`
+    (None : pas de validation, par exemple pour une requête invalide).
+    À placer au-dessus de `cache_catalog_response`.
+
+    Pour les visiteurs anonymes, l'ETag et la date sont mis en cache avec la réponse, sous
+    la même version du catalogue : une réponse en cache est servie sans aucune requête SQL.
+    """
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        cache = key = validators = None
+        if get_timeout() and not request.user.is_authenticated:
+            cache = get_cache()
+            key = f'{catalog_cache_key(request)}:validators'
+            validators = cache.get(key)
+
+        if validators is None:
+            querysets = view.get_validation_querysets(request, *args, **kwargs)
+            if querysets is None:
+                return view_method(view, request, *args, **kwargs)
+            validators = catalog_validators(querysets)
+        etag, last_modified = validators
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view_method(view, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        if cache is not None:
+            cache.set(key, validators, get_timeout())
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+    return wrapper
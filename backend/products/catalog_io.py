@@ -0,0 +1,372 @@
+"""
+Import / export du catalogue en flux CSV ou JSON Lines, en mémoire constante.
+
+Une ligne par objet, distinguée par la colonne `type` :
+- category : slug, name, description, image, is_published
+- subcategory : slug, name, description, category (slug), is_published
+- product : slug, name, description, category, subcategory, price, stock, available,
+  featured, is_published, images (URLs, principale en premier ; séparées par `|` en CSV ;
+  sans colonne images, les images existantes sont conservées)
+
+L'export écrit les catégories, puis les sous-catégories, puis les produits, de sorte qu'un
+fichier exporté se réimporte tel quel. L'import regroupe les lignes par lots : chaque lot
+est écrit dans une transaction par des INSERT ... ON CONFLICT (bulk_create avec
+update_conflicts) sur le slug, puis les images des produits du lot sont synchronisées.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
+
+from django.db import transaction
+
+from products.cache import invalidate_catalog_cache
+from products.models import (
+    Category, SubCategory, Product, ProductImage, ImageAsset,
+    denormalized_counts_enabled, refresh_product_counts,
+)
+
+COLUMNS = (
+    'type', 'slug', 'name', 'description', 'category', 'subcategory', 'image', 'price', 'stock',
+    'available', 'featured', 'is_published', 'images',
+)
+IMAGE_SEPARATOR = '|'
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+TRUE_VALUES = ('1', 'true', 'yes', 'oui', 'vrai')
+
+
+class RowError(ValueError):
+    pass
+
+
+# --- Export ---
+
+def iter_product_rows(products=None, chunk_size=CHUNK_SIZE):
+    """
+    Lignes `product` (dicts) avec leurs images, par jointure de deux curseurs triés par
+    produit : ni les produits ni les images ne sont chargés en entier.
+    """
+    products = (products if products is not None else Product.objects.all()).order_by('id').values(
+        'id', 'slug', 'name', 'description', 'category__slug', 'subcategory__slug', 'price', 'stock',
+        'available', 'featured', 'is_published',
+    )
+    images = (
+        ProductImage.objects.filter(product__in=products.values('id'))
+        .order_by('product_id', '-is_main', 'id')
+        .values_list('product_id', 'image')
+        .iterator(chunk_size=chunk_size)
+    )
+    grouped = groupby(images, key=lambda row: row[0])
+    pending = next(grouped, None)
+    for product in products.iterator(chunk_size=chunk_size):
+        # Images de produits sans ligne (inexistant, tri identique) : ignorées
+        while pending is not None and pending[0] < product['id']:
+            pending = next(grouped, None)
+        urls = []
+        if pending is not None and pending[0] == product['id']:
+            urls = [url for _, url in pending[1]]
+            pending = next(grouped, None)
+        yield {
+            'type': 'product',
+            'slug': product['slug'],
+            'name': product['name'],
+            'description': product['description'],
+            'category': product['category__slug'],
+            'subcategory': product['subcategory__slug'] or '',
+            'price': str(product['price']),
+            'stock': product['stock'],
+            'available': product['available'],
+            'featured': product['featured'],
+            'is_published': product['is_published'],
+            'images': urls,
+        }
+
+
+def iter_rows(published_only=False, chunk_size=CHUNK_SIZE):
+    """Toutes les lignes du catalogue, dans l'ordre attendu par l'import."""
+    categories = Category.objects.order_by('id')
+    subcategories = SubCategory.objects.order_by('id')
+    products = Product.objects.all()
+    if published_only:
+        categories = categories.filter(is_published=True)
+        subcategories = subcategories.filter(is_published=True, category__is_published=True)
+        products = products.published()
+
+    for row in categories.values('slug', 'name', 'description', 'image', 'is_published').iterator(chunk_size):
+        yield {'type': 'category', **row, 'image': row['image'] or ''}
+    for row in subcategories.values(
+        'slug', 'name', 'description', 'category__slug', 'is_published',
+    ).iterator(chunk_size):
+        category = row.pop('category__slug')
+        yield {'type': 'subcategory', **row, 'category': category}
+    yield from iter_product_rows(products, chunk_size)
+
+
+def jsonl_line(row):
+    return json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def iter_jsonl(rows, rows_per_chunk=100):
+    """Morceaux de texte JSON Lines (par `rows_per_chunk` lignes) pour une réponse en flux."""
+    chunk = []
+    for row in rows:
+        chunk.append(jsonl_line(row))
+        if len(chunk) >= rows_per_chunk:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def write_jsonl(rows, stream):
+    count = 0
+    for row in rows:
+        stream.write(jsonl_line(row))
+        count += 1
+    return count
+
+
+def write_csv(rows, stream):
+    writer = csv.DictWriter(stream, fieldnames=COLUMNS)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        if isinstance(row.get('images'), list):
+            row = {**row, 'images': IMAGE_SEPARATOR.join(row['images'])}
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+# --- Import ---
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        if row.get('images') is not None:
+            row['images'] = [url for url in row['images'].split(IMAGE_SEPARATOR) if url]
+        yield row
+
+
+def to_bool(value, default=False):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def required(row, key):
+    value = row.get(key)
+    if value in (None, ''):
+        raise RowError(f"Champ '{key}' manquant")
+    return value
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    categories: int = 0
+    subcategories: int = 0
+    products: int = 0
+    images_created: int = 0
+    images_deleted: int = 0
+    batches: int = 0
+    errors: list = field(default_factory=list)
+
+
+class CatalogImporter:
+    """
+    Upsert par lots. Les correspondances slug -> id des catégories et sous-catégories
+    (quelques centaines au plus) sont gardées en mémoire ; les produits ne le sont que
+    le temps d'un lot.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        self.category_ids = dict(Category.objects.values_list('slug', 'id'))
+        self.subcategory_ids = {
+            (category_id, slug): pk for pk, category_id, slug in SubCategory.objects.values_list('id', 'category_id', 'slug')
+        }
+
+    def run(self, rows):
+        batch = []
+        for line, row in enumerate(rows, start=1):
+            self.report.rows += 1
+            batch.append((line, row))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+        self.finish()
+        return self.report
+
+    def flush(self, batch):
+        by_type = {'category': [], 'subcategory': [], 'product': []}
+        for line, row in batch:
+            kind = row.get('type') or 'product'
+            if kind not in by_type:
+                self.report.errors.append((line, f"Type inconnu : {kind}"))
+                continue
+            by_type[kind].append((line, row))
+        with transaction.atomic():
+            self.upsert_categories(by_type['category'])
+            self.upsert_subcategories(by_type['subcategory'])
+            self.upsert_products(by_type['product'])
+        self.report.batches += 1
+
+    def build(self, rows, make):
+        objects = []
+        for line, row in rows:
+            try:
+                objects.append((row, make(row)))
+            except (RowError, InvalidOperation, TypeError, ValueError) as e:
+                self.report.errors.append((line, str(e)))
+        return objects
+
+    def upsert_categories(self, rows):
+        objects = self.build(rows, lambda row: Category(
+            slug=required(row, 'slug'),
+            name=required(row, 'name'),
+            description=row.get('description') or '',
+            image=row.get('image') or None,
+            is_published=to_bool(row.get('is_published')),
+        ))
+        if not objects:
+            return
+        # Un même slug deux fois dans un lot : la dernière ligne l'emporte (ON CONFLICT l'exige)
+        objects = list({category.slug: (row, category) for row, category in objects}.values())
+        Category.objects.bulk_create(
+            [category for _, category in objects], update_conflicts=True, unique_fields=['slug'],
+            update_fields=['name', 'description', 'image', 'is_published', 'updated_at'],
+        )
+        slugs = [category.slug for _, category in objects]
+        self.category_ids.update(Category.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+        self.report.categories += len(objects)
+
+    def category_id(self, slug):
+        try:
+            return self.category_ids[slug]
+        except KeyError:
+            raise RowError(f"Catégorie inconnue : {slug}")
+
+    def upsert_subcategories(self, rows):
+        objects = self.build(rows, lambda row: SubCategory(
+            category_id=self.category_id(required(row, 'category')),
+            slug=required(row, 'slug'),
+            name=required(row, 'name'),
+            description=row.get('description') or '',
+            is_published=to_bool(row.get('is_published')),
+        ))
+        if not objects:
+            return
+        objects = list({(sub.category_id, sub.slug): (row, sub) for row, sub in objects}.values())
+        SubCategory.objects.bulk_create(
+            [subcategory for _, subcategory in objects], update_conflicts=True,
+            unique_fields=['category', 'slug'], update_fields=['name', 'description', 'is_published', 'updated_at'],
+        )
+        for pk, category_id, slug in SubCategory.objects.filter(
+            category_id__in={subcategory.category_id for _, subcategory in objects},
+            slug__in={subcategory.slug for _, subcategory in objects},
+        ).values_list('id', 'category_id', 'slug'):
+            self.subcategory_ids[(category_id, slug)] = pk
+        self.report.subcategories += len(objects)
+
+    def make_product(self, row):
+        category_id = self.category_id(required(row, 'category'))
+        subcategory_id = None
+        if row.get('subcategory'):
+            subcategory_id = self.subcategory_ids.get((category_id, row['subcategory']))
+            if subcategory_id is None:
+                raise RowError(f"Sous-catégorie inconnue : {row['category']}/{row['subcategory']}")
+        return Product(
+            slug=required(row, 'slug'),
+            name=required(row, 'name'),
+            description=row.get('description') or '',
+            category_id=category_id,
+            subcategory_id=subcategory_id,
+            price=Decimal(str(required(row, 'price'))),
+            stock=int(row.get('stock') or 0),
+            available=to_bool(row.get('available'), default=True),
+            featured=to_bool(row.get('featured')),
+            is_published=to_bool(row.get('is_published')),
+        )
+
+    def upsert_products(self, rows):
+        objects = self.build(rows, self.make_product)
+        if not objects:
+            return
+        objects = list({product.slug: (row, product) for row, product in objects}.values())
+        Product.objects.bulk_create(
+            [product for _, product in objects], update_conflicts=True, unique_fields=['slug'],
+            update_fields=[
+                'name', 'description', 'category', 'subcategory', 'price', 'stock', 'available',
+                'featured', 'is_published', 'updated_at',
+            ],
+        )
+        ids = dict(Product.objects.filter(slug__in=[p.slug for _, p in objects]).values_list('slug', 'id'))
+        wanted = {
+            ids[product.slug]: list(dict.fromkeys(row['images']))
+            for row, product in objects if row.get('images') is not None
+        }
+        self.sync_images(wanted)
+        self.report.products += len(objects)
+
+    def sync_images(self, wanted):
+        """Aligne les images des produits sur les URLs fournies (la première est principale)."""
+        if not wanted:
+            return
+        existing = {}
+        for image in ProductImage.objects.filter(product_id__in=wanted):
+            existing.setdefault((image.product_id, image.image), image)
+
+        assets = {
+            asset.url: asset
+            for asset in ImageAsset.objects.filter(url__in={url for urls in wanted.values() for url in urls})
+        }
+        to_create, to_update, keep = [], [], set()
+        for product_id, urls in wanted.items():
+            for position, url in enumerate(urls):
+                is_main = position == 0
+                image = existing.get((product_id, url))
+                if image is None:
+                    image = ProductImage(product_id=product_id, image=url, is_main=is_main)
+                    # bulk_create n'appelle pas save() : métadonnées du registre recopiées ici
+                    image.copy_metadata(assets.get(url))
+                    to_create.append(image)
+                else:
+                    keep.add(image.pk)
+                    if image.is_main != is_main:
+                        image.is_main = is_main
+                        to_update.append(image)
+        stale = [image.pk for image in existing.values() if image.pk not in keep]
+        stale += ProductImage.objects.filter(product_id__in=wanted).exclude(
+            pk__in=[image.pk for image in existing.values()]
+        ).values_list('pk', flat=True)  # doublons d'URL d'un même produit
+
+        ProductImage.objects.filter(pk__in=stale).delete()
+        ProductImage.objects.bulk_update(to_update, ['is_main'])
+        ProductImage.objects.bulk_create(to_create)
+        self.report.images_created += len(to_create)
+        self.report.images_deleted += len(stale)
+
+    def finish(self):
+        if denormalized_counts_enabled() and self.report.products:
+            # Un produit peut avoir changé de catégorie : recalcul complet (une requête par modèle)
+            refresh_product_counts()
+        if self.report.categories or self.report.subcategories or self.report.products:
+            invalidate_catalog_cache()
+
+
+def import_rows(rows, batch_size=BATCH_SIZE):
+    return CatalogImporter(batch_size).run(rows)
@@ -0,0 +1,277 @@
+"""
+Synchronisation incrémentale des images Cloudinary vers les produits.
+
+Pour chaque dossier de catégorie (jaelleshop/products/<catégorie>) :
+- les ressources sont parcourues page par page (`next_cursor`). Une passe incrémentale
+  interroge la Search API (`created_at>` le point de reprise du dossier,
+  CloudinarySyncState.high_water : date de création la plus récente déjà vue), l'Admin API
+  n'acceptant pas `start_at` avec `prefix` ; une passe complète (`full`, ou premier passage)
+  liste tout le dossier par l'Admin API ;
+- une ressource n'est traitée que si elle est nouvelle ou si son etag/version a changé
+  (miroir CloudinaryResource) ;
+- une ressource est rattachée au produit dont le slug correspond à son public_id, sinon
+  au premier produit publié de la catégorie encore sans image ;
+- après une passe complète, les ressources absentes du dossier sont marquées supprimées
+  (CloudinaryResource.deleted_at) et leurs images retirées des produits ; l'index de la
+  Search API étant mis à jour avec un léger délai, les passes complètes rattrapent aussi
+  les ressources qu'une passe incrémentale aurait manquées ;
+- les écritures sont groupées (bulk_create / bulk_update) dans une transaction par dossier.
+
+L'API est injectable : `sync_folders(api=...)` accepte tout objet exposant `subfolders(path)`,
+`resources(**params)` (comme le module cloudinary.api) et `search(expression, max_results,
+next_cursor=None)` (voir CloudinaryAPI, et FakeCloudinaryAPI dans les tests).
+"""
+from dataclasses import dataclass, field
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from products.cache import invalidate_catalog_cache
+from products.image_metadata import backfill_image_metadata
+from products.models import (
+    Category, Product, ProductImage, CloudinaryResource, CloudinarySyncState,
+)
+
+ROOT_FOLDER = 'jaelleshop/products'
+PAGE_SIZE = 500  # maximum de l'Admin API
+
+
+@dataclass
+class FolderReport:
+    folder: str
+    fetched: int = 0
+    created: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    assigned: int = 0
+    deleted: int = 0
+    pages: int = 0
+    skipped: str = ''
+    products: set = field(default_factory=set)
+    images: set = field(default_factory=set)
+
+
+class CloudinaryAPI:
+    """Admin API et Search API du SDK Cloudinary."""
+
+    def subfolders(self, path):
+        import cloudinary.api
+        return cloudinary.api.subfolders(path)
+
+    def resources(self, **params):
+        import cloudinary.api
+        return cloudinary.api.resources(**params)
+
+    def search(self, expression, max_results, next_cursor=None):
+        from cloudinary.search import Search
+        query = Search().expression(expression).sort_by('created_at', 'asc').max_results(max_results)
+        if next_cursor:
+            query = query.next_cursor(next_cursor)
+        return query.execute()
+
+
+def default_api():
+    return CloudinaryAPI()
+
+
+def resource_tag(resource):
+    """Empreinte de changement d'une ressource : etag si fourni, sinon version."""
+    return resource.get('etag') or str(resource.get('version', ''))
+
+
+def iter_resources(api, folder, since=None, page_size=PAGE_SIZE):
+    """
+    Pages de ressources d'un dossier ; avec `since`, seules les ressources créées après
+    (Search API), sinon tout le dossier (Admin API).
+    """
+    if since is not None:
+        stamp = since.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        expression = f'folder="{folder}" AND created_at>"{stamp}"'
+
+        def fetch(**params):
+            return api.search(expression, page_size, **params)
+    else:
+        def fetch(**params):
+            return api.resources(type='upload', prefix=f'{folder}/', max_results=page_size, **params)
+    cursor = None
+    while True:
+        page = fetch(next_cursor=cursor) if cursor else fetch()
+        # La recherche est à la seconde près : la ressource du point de reprise peut revenir
+        yield [
+            resource for resource in page.get('resources', [])
+            if since is None or parse_datetime(resource['created_at']) > since
+        ]
+        cursor = page.get('next_cursor')
+        if not cursor:
+            return
+
+
+def sync_folder(api, folder, category, full=False, page_size=PAGE_SIZE):
+    report = FolderReport(folder)
+    state, _ = CloudinarySyncState.objects.get_or_create(folder=folder)
+    since = None if full else state.high_water
+
+    # Ressources déjà connues du dossier : un seul SELECT, comparaison en mémoire
+    known = {resource.public_id: resource for resource in CloudinaryResource.objects.filter(folder=folder)}
+    to_create, to_update = [], []
+    seen = set()
+    high_water = state.high_water
+    for page in iter_resources(api, folder, since, page_size):
+        report.pages += 1
+        for resource in page:
+            report.fetched += 1
+            seen.add(resource['public_id'])
+            created_at = parse_datetime(resource['created_at'])
+            if created_at and (high_water is None or created_at > high_water):
+                high_water = created_at
+            existing = known.get(resource['public_id'])
+            if existing is None:
+                mirror = CloudinaryResource(
+                    public_id=resource['public_id'],
+                    folder=folder,
+                    secure_url=resource['secure_url'],
+                    tag=resource_tag(resource),
+                    created_at=created_at,
+                )
+                known[mirror.public_id] = mirror
+                to_create.append(mirror)
+            elif (
+                existing.tag != resource_tag(resource)
+                or existing.secure_url != resource['secure_url']
+                or existing.deleted_at is not None
+            ):
+                existing.tag = resource_tag(resource)
+                existing.secure_url = resource['secure_url']
+                existing.created_at = created_at
+                existing.deleted_at = None
+                to_update.append(existing)
+            else:
+                report.unchanged += 1
+
+    report.created, report.changed = len(to_create), len(to_update)
+    now = timezone.now()
+    # Passe complète : ce qui n'a pas été listé n'existe plus sur Cloudinary
+    deleted = [] if since is not None else [
+        resource for public_id, resource in known.items()
+        if public_id not in seen and resource.deleted_at is None
+    ]
+    with transaction.atomic():
+        # PostgreSQL et SQLite renvoient les clés primaires créées
+        CloudinaryResource.objects.bulk_create(to_create)
+
+        # Images déjà rattachées dont la ressource a changé : nouvelle URL
+        images = ProductImage.objects.in_bulk([r.product_image_id for r in to_update if r.product_image_id])
+        for mirror in to_update:
+            image = images.get(mirror.product_image_id)
+            if image is not None:
+                image.image = mirror.secure_url
+                report.products.add(image.product_id)
+                report.images.add(image.pk)
+        ProductImage.objects.bulk_update(images.values(), ['image'])
+
+        remove_resources(deleted, now, report)
+
+        # Nouvelles ressources et ressources jamais rattachées
+        unassigned = [r for r in known.values() if r.product_image_id is None and r.pk and r.deleted_at is None]
+        assigned = assign_resources(category, unassigned, report)
+        to_update = list({r.pk: r for r in to_update + assigned + deleted}.values())
+        CloudinaryResource.objects.bulk_update(
+            to_update, ['tag', 'secure_url', 'created_at', 'deleted_at', 'product_image']
+        )
+
+        if report.products:
+            Product.objects.filter(pk__in=report.products).update(updated_at=now)
+        state.high_water = high_water
+        state.last_synced_at = now
+        state.save(update_fields=['high_water', 'last_synced_at'])
+    return report
+
+
+def remove_resources(resources, now, report):
+    """Marque les ressources supprimées et retire leurs images ; une autre image devient principale."""
+    image_ids = [resource.product_image_id for resource in resources if resource.product_image_id]
+    images = list(ProductImage.objects.filter(pk__in=image_ids).only('id', 'product_id', 'is_main'))
+    for resource in resources:
+        resource.deleted_at = now
+        resource.product_image_id = None
+    ProductImage.objects.filter(pk__in=image_ids).delete()
+
+    orphaned = {image.product_id for image in images if image.is_main}
+    promoted = []
+    for image in ProductImage.objects.filter(product_id__in=orphaned).order_by('product_id', 'id'):
+        if image.product_id in orphaned:
+            orphaned.discard(image.product_id)
+            image.is_main = True
+            promoted.append(image)
+    ProductImage.objects.bulk_update(promoted, ['is_main'])
+    report.products.update(image.product_id for image in images)
+    report.deleted = len(resources)
+
+
+def assign_resources(category, resources, report):
+    """Rattache des ressources aux produits de la catégorie ; retourne les ressources modifiées."""
+    if not resources:
+        return []
+    products = Product.objects.filter(category=category, is_published=True).order_by('created_at', 'id')
+    by_slug = {product.slug: product for product in products}
+    with_image = set(
+        ProductImage.objects.filter(product__in=products).values_list('product_id', flat=True).distinct()
+    )
+    without_image = [product for product in by_slug.values() if product.pk not in with_image]
+
+    # Correspondance par slug d'abord, puis produits sans image dans l'ordre de création
+    matches = []
+    for resource in sorted(resources, key=lambda r: (r.created_at is None, r.created_at, r.public_id)):
+        product = by_slug.get(resource.public_id.rsplit('/', 1)[-1])
+        if product is not None and product in without_image:
+            without_image.remove(product)
+        matches.append((resource, product))
+
+    pairs = []
+    for resource, product in matches:
+        if product is None:
+            if not without_image:
+                continue
+            product = without_image.pop(0)
+        pairs.append((resource, ProductImage(
+            product=product, image=resource.secure_url, is_main=product.pk not in with_image,
+        )))
+        with_image.add(product.pk)
+
+    ProductImage.objects.bulk_create([image for _, image in pairs])
+    for resource, image in pairs:
+        resource.product_image_id = image.pk
+        report.products.add(image.product_id)
+        report.images.add(image.pk)
+    report.assigned = len(pairs)
+    return [resource for resource, _ in pairs]
+
+
+def sync_folders(api=None, root=ROOT_FOLDER, full=False, page_size=PAGE_SIZE, fetch_metadata=True, progress=None):
+    """
+    Synchronise chaque sous-dossier de `root` avec la catégorie du même nom, puis calcule les
+    métadonnées d'affichage (dimensions, BlurHash, couleur) des images créées ou modifiées.
+    `progress(pourcentage, message)` est appelé avant chaque dossier.
+    """
+    api = api or default_api()
+    progress = progress or (lambda percent, message='': None)
+    categories = {category.name.lower(): category for category in Category.objects.all()}
+    reports = []
+    folders = api.subfolders(root)['folders']
+    for i, folder_info in enumerate(folders):
+        folder = f"{root}/{folder_info['name']}"
+        progress(90 * i // len(folders), f"Dossier {folder}")
+        category = categories.get(folder_info['name'].lower())
+        if category is None:
+            reports.append(FolderReport(folder, skipped=f"Catégorie '{folder_info['name']}' non trouvée"))
+            continue
+        reports.append(sync_folder(api, folder, category, full=full, page_size=page_size))
+    images = set().union(*(report.images for report in reports))
+    if images and fetch_metadata:
+        progress(90, "Métadonnées des images")
+        backfill_image_metadata(ProductImage.objects.filter(pk__in=images))
+    if any(report.products for report in reports):
+        invalidate_catalog_cache()
+    return reports
@@ -0,0 +1,139 @@
+"""
+Sérialisation rapide, en lecture seule, des listes publiques de produits.
+
+Même sortie que ProductSerializer / ProductImageSerializer (clés, ordre et formats
+identiques), mais construite directement à partir de lignes `.values()` et d'une seule
+requête groupée pour les images : ni instances de modèles, ni introspection DRF par
+champ. Le prix et la date reprennent les champs DRF du sérialiseur pour garder
+exactement le même format.
+
+Champs partiels (voir products.sparse_fields) : avec `fields`, seules les colonnes
+nécessaires sont lues et les images ne sont chargées que si elles sont demandées ;
+`expand` remplace les identifiants de catégorie / sous-catégorie par {id, name, slug}.
+"""
+from functools import lru_cache
+
+from django.db.models import F
+
+from .image_urls import image_variants
+from .models import ProductImage
+from .serializers import ProductSerializer
+
+# Champs de ProductSerializer, dans son ordre, puis champs disponibles sur demande
+PRODUCT_FIELDS = (
+    'id', 'name', 'slug', 'description', 'price', 'stock', 'available', 'featured', 'category',
+    'category_name', 'subcategory', 'subcategory_name', 'images', 'created_at',
+)
+OPTIONAL_PRODUCT_FIELDS = ('main_image',)
+PRODUCT_EXPANSIONS = ('category', 'subcategory')
+
+# Colonnes lues pour chaque champ (id et created_at, utiles à la pagination, toujours lus)
+COLUMNS = {
+    'category': ('category_id',),
+    'category_name': ('category_name',),
+    'subcategory': ('subcategory_id',),
+    'subcategory_name': ('subcategory_id', 'subcategory_name'),
+    'images': (),
+    'main_image': (),
+}
+EXPANDED_COLUMNS = {
+    'category': ('category_id', 'category_name', 'category_slug'),
+    'subcategory': ('subcategory_id', 'subcategory_name', 'subcategory_slug'),
+}
+JOINED_COLUMNS = {
+    'category_name': F('category__name'),
+    'category_slug': F('category__slug'),
+    'subcategory_name': F('subcategory__name'),
+    'subcategory_slug': F('subcategory__slug'),
+}
+IMAGE_VALUES = (
+    'id', 'product_id', 'image', 'is_main', 'width', 'height', 'bytes', 'blurhash', 'dominant_color',
+)
+
+
+@lru_cache(maxsize=None)
+def drf_fields():
+    fields = ProductSerializer().fields
+    return fields['price'], fields['created_at']
+
+
+def product_values(queryset, fields=None, expand=()):
+    """Lignes (dicts) d'un queryset de produits, limitées aux colonnes des champs demandés."""
+    columns = {'id': None, 'created_at': None}
+    for name in fields or PRODUCT_FIELDS:
+        columns.update(dict.fromkeys(COLUMNS.get(name, (name,))))
+    for name in expand:
+        if fields is None or name in fields:
+            columns.update(dict.fromkeys(EXPANDED_COLUMNS[name]))
+    return queryset.select_related(None).prefetch_related(None).values(
+        *(column for column in columns if column not in JOINED_COLUMNS),
+        **{column: JOINED_COLUMNS[column] for column in columns if column in JOINED_COLUMNS},
+    )
+
+
+def images_by_product(product_ids):
+    """{product_id: [image, ...]} en une requête, principale en premier (comme with_catalog_relations)."""
+    grouped = {pk: [] for pk in product_ids}
+    rows = (
+        ProductImage.objects.filter(product_id__in=product_ids)
+        .order_by('product_id', '-is_main', 'id')
+        .values_list(*IMAGE_VALUES)
+    )
+    for pk, product_id, image, is_main, width, height, size, blurhash, dominant_color in rows:
+        grouped[product_id].append({
+            'id': pk,
+            'image': image,
+            'is_main': is_main,
+            'image_url': image or None,
+            'variants': image_variants(image, width=width, height=height),
+            'width': width,
+            'height': height,
+            'bytes': size,
+            'blurhash': blurhash,
+            'dominant_color': dominant_color,
+        })
+    return grouped
+
+
+def related(row, name):
+    if row[f'{name}_id'] is None:
+        return None
+    return {'id': row[f'{name}_id'], 'name': row[f'{name}_name'], 'slug': row[f'{name}_slug']}
+
+
+def serialize_products(rows, fields=None, expand=()):
+    """
+    Liste de dicts au format de ProductSerializer(many=True).data pour des lignes
+    product_values() ; `fields` et `expand` comme pour product_values().
+    """
+    rows = list(rows)
+    names = PRODUCT_FIELDS if fields is None else [
+        name for name in PRODUCT_FIELDS + OPTIONAL_PRODUCT_FIELDS if name in fields
+    ]
+    wanted = set(names)
+    images = {}
+    if wanted & {'images', 'main_image'}:
+        images = images_by_product([row['id'] for row in rows])
+    price, created_at = drf_fields()
+
+    builders = {
+        'price': lambda row: price.to_representation(row['price']),
+        'category': lambda row: related(row, 'category') if 'category' in expand else row['category_id'],
+        'subcategory': lambda row: related(row, 'subcategory') if 'subcategory' in expand else row['subcategory_id'],
+        'images': lambda row: images[row['id']],
+        'main_image': lambda row: images[row['id']][0] if images[row['id']] else None,
+        'created_at': lambda row: created_at.to_representation(row['created_at']),
+    }
+    plain = lambda name: lambda row: row[name]  # noqa: E731
+    getters = [(name, builders.get(name) or plain(name)) for name in names]
+
+    data = []
+    for row in rows:
+        item = {}
+        for name, getter in getters:
+            # Sans sous-catégorie, DRF omet `subcategory_name` (source 'subcategory.name')
+            if name == 'subcategory_name' and row['subcategory_id'] is None:
+                continue
+            item[name] = getter(row)
+        data.append(item)
+    return data
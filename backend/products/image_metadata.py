@@ -0,0 +1,167 @@
+"""
+Métadonnées d'affichage d'une image, calculées une fois à l'import (Pillow) :
+dimensions, poids, placeholder BlurHash et couleur dominante. Elles permettent au frontend
+de réserver la place de l'image et d'afficher un aperçu avant son téléchargement.
+"""
+import io
+import math
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from django.utils import timezone
+
+from products.cache import invalidate_catalog_cache
+from products.models import Product, ProductImage
+
+try:
+    from PIL import Image
+except ImportError:  # Sans Pillow : dimensions et placeholder indisponibles
+    Image = None
+
+BLURHASH_COMPONENTS = (4, 3)
+DOWNLOAD_TIMEOUT = 15
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def encode83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def srgb_to_linear(value):
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb(value):
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash(image, components=BLURHASH_COMPONENTS):
+    """Encodage BlurHash (https://blurha.sh) sur une réduction 32x32 de l'image."""
+    x_components, y_components = components
+    small = image.convert('RGB')
+    small.thumbnail((32, 32))
+    width, height = small.size
+    pixels = [tuple(srgb_to_linear(c) for c in pixel) for pixel in small.getdata()]
+
+    factors = []
+    for j in range(y_components):
+        cos_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(x_components):
+            cos_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                for x in range(width):
+                    basis = cos_x[x] * cos_y[y]
+                    pr, pg, pb = pixels[y * width + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = encode83((x_components - 1) + (y_components - 1) * 9, 1)
+    maximum = max((abs(v) for factor in ac for v in factor), default=0)
+    quantised_max = max(0, min(82, int(math.floor(maximum * 166 - 0.5)))) if ac else 0
+    maximum_value = (quantised_max + 1) / 166
+    result += encode83(quantised_max, 1)
+    result += encode83((linear_to_srgb(dc[0]) << 16) + (linear_to_srgb(dc[1]) << 8) + linear_to_srgb(dc[2]), 4)
+
+    def quantise(v):
+        return max(0, min(18, int(math.floor(math.copysign(abs(v / maximum_value) ** 0.5, v) * 9 + 9.5))))
+
+    for r, g, b in ac:
+        result += encode83(quantise(r) * 19 * 19 + quantise(g) * 19 + quantise(b), 2)
+    return result
+
+
+def dominant_color(image):
+    """Couleur la plus représentée (#rrggbb) après réduction à une palette de 5 couleurs."""
+    small = image.convert('RGB')
+    small.thumbnail((64, 64))
+    paletted = small.quantize(colors=5)
+    count, index = max(paletted.getcolors())
+    r, g, b = paletted.getpalette()[index * 3:index * 3 + 3]
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def image_metadata(data):
+    """{width, height, bytes, blurhash, dominant_color} d'une image ; valeurs vides si illisible."""
+    metadata = {'width': None, 'height': None, 'bytes': len(data), 'blurhash': '', 'dominant_color': ''}
+    if Image is None:
+        return metadata
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            metadata.update(
+                width=image.width,
+                height=image.height,
+                blurhash=blurhash(image),
+                dominant_color=dominant_color(image),
+            )
+    except Exception:
+        pass
+    return metadata
+
+
+def download(url):
+    response = requests.get(url, timeout=DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+def pending_images(queryset):
+    """Images jamais traitées : ni BlurHash ni poids (0 : téléchargement en échec)."""
+    return queryset.filter(blurhash='', bytes__isnull=True)
+
+
+def save_metadata(batch):
+    """Écrit un lot d'images et date les produits concernés (ETag et Last-Modified du catalogue)."""
+    ProductImage.objects.bulk_update(batch, ProductImage.METADATA_FIELDS)
+    Product.objects.filter(pk__in={row.product_id for row in batch}).update(updated_at=timezone.now())
+
+
+def backfill_image_metadata(queryset, workers=8, batch_size=100, fetch=download):
+    """
+    Calcule les métadonnées des images du queryset : téléchargements et calculs en parallèle
+    (une fois par URL), écritures groupées par lots de `batch_size` (bulk_update).
+    Les produits modifiés sont redatés et le cache du catalogue invalidé, comme pour
+    la synchronisation Cloudinary. Une image illisible garde `bytes` renseigné sans
+    BlurHash, une image introuvable reçoit `bytes=0` : ni l'une ni l'autre n'est
+    retéléchargée par les passes suivantes (voir pending_images).
+    Retourne (images mises à jour, URLs en échec).
+    """
+    rows_by_url = defaultdict(list)
+    for row in queryset.only('id', 'product_id', 'image', *ProductImage.METADATA_FIELDS):
+        rows_by_url[row.image].append(row)
+
+    updated, failed = 0, 0
+    batch, failed_ids = [], []
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = {executor.submit(lambda url: image_metadata(fetch(url)), url): url for url in rows_by_url}
+        for future in as_completed(futures):
+            try:
+                metadata = future.result()
+            except Exception:
+                failed += 1
+                failed_ids.extend(row.pk for row in rows_by_url[futures[future]])
+                continue
+            for row in rows_by_url[futures[future]]:
+                row.copy_metadata(metadata)
+                batch.append(row)
+            if len(batch) >= batch_size:
+                save_metadata(batch)
+                updated += len(batch)
+                batch = []
+    if batch:
+        save_metadata(batch)
+        updated += len(batch)
+    ProductImage.objects.filter(pk__in=failed_ids).update(bytes=0)
+    if updated:
+        invalidate_catalog_cache()
+    return updated, failed
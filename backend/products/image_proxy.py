@@ -0,0 +1,219 @@
+"""
+Proxy d'images pour les sources externes (Unsplash, Pexels) : le navigateur ne contacte plus
+ces origines, il reçoit des dérivés WebP redimensionnés servis par le backend.
+
+- Les URLs du proxy (`proxy_url`) portent l'URL d'origine et la taille demandée, signées
+  (django.core.signing) : le proxy ne sert que les variantes générées par le backend.
+- Chaque original est téléchargé une seule fois, en flux et dans la limite de
+  IMAGE_PROXY_MAX_ORIGINAL_BYTES, puis gardé sur disque ; chaque dérivé est
+  stocké sous l'empreinte SHA-256 de (URL, largeur, hauteur, qualité), donc immuable :
+  il est servi avec `Cache-Control: immutable` et un ETag.
+- Le cache (IMAGE_PROXY_ROOT) est borné à IMAGE_PROXY_MAX_BYTES : les fichiers les moins
+  récemment servis sont supprimés en premier (LRU sur la date de modification, mise à jour
+  à chaque accès).
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Sans Pillow : redirection vers l'original
+    Image = None
+
+SIGNING_SALT = 'products.image_proxy'
+MAX_DIMENSION = 3200
+DOWNLOAD_TIMEOUT = 15
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+EVICT_EVERY = 100  # écritures entre deux passes d'éviction
+
+_locks = {}  # clé -> [verrou, nombre de threads qui le détiennent ou l'attendent]
+_locks_guard = threading.Lock()
+_writes = 0
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def is_enabled():
+    return get_setting('IMAGE_PROXY_ENABLED', False)
+
+
+def proxied_hosts():
+    return get_setting('IMAGE_PROXY_HOSTS', ('images.unsplash.com', 'images.pexels.com'))
+
+
+def is_proxied(url):
+    return is_enabled() and urlsplit(url).netloc in proxied_hosts()
+
+
+def cache_root():
+    return get_setting('IMAGE_PROXY_ROOT', os.path.join(settings.BASE_DIR, 'image_cache'))
+
+
+def proxy_url(url, width, height=None):
+    """URL locale du dérivé WebP de `url` à la taille demandée (hauteur None : proportions d'origine)."""
+    token = signing.dumps([url, width, height], salt=SIGNING_SALT, compress=True)
+    return reverse('api-image-derivative', kwargs={'token': token})
+
+
+def parse_token(token):
+    """(url, largeur, hauteur) d'un jeton signé ; lève signing.BadSignature ou ValueError."""
+    url, width, height = signing.loads(token, salt=SIGNING_SALT)
+    if urlsplit(url).netloc not in proxied_hosts():
+        raise ValueError(f"Hôte non autorisé : {url}")
+    if not 0 < int(width) <= MAX_DIMENSION or (height is not None and not 0 < int(height) <= MAX_DIMENSION):
+        raise ValueError(f"Dimensions invalides : {width}x{height}")
+    return url, int(width), int(height) if height is not None else None
+
+
+def digest(*parts):
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def cache_path(kind, key, extension=''):
+    return os.path.join(cache_root(), kind, key[:2], key + extension)
+
+
+@contextmanager
+def key_lock(key):
+    """Verrou par clé ; retiré du dictionnaire quand plus aucun thread ne l'attend."""
+    with _locks_guard:
+        entry = _locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _locks[key]
+
+
+def write_atomic(path, data):
+    """Écriture dans un fichier temporaire puis renommage : jamais de fichier partiel servi."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    global _writes
+    _writes += 1
+    if _writes % EVICT_EVERY == 0:
+        evict()
+
+
+def touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def download(url, max_bytes):
+    """Télécharge `url` en flux ; lève ValueError au-delà de `max_bytes` (annoncés ou reçus)."""
+    response = requests.get(url, timeout=DOWNLOAD_TIMEOUT, stream=True)
+    try:
+        response.raise_for_status()
+        declared = response.headers.get('Content-Length', '')
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise ValueError(f"Original trop volumineux : {url}")
+        data = bytearray()
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            data += chunk
+            if len(data) > max_bytes:
+                raise ValueError(f"Original trop volumineux : {url}")
+        return bytes(data)
+    finally:
+        response.close()
+
+
+def fetch_original(url):
+    """Octets de l'original, téléchargé une seule fois."""
+    path = cache_path('originals', digest(url))
+    if not os.path.exists(path):
+        data = download(url, get_setting('IMAGE_PROXY_MAX_ORIGINAL_BYTES', 20 * 1024 * 1024))
+        write_atomic(path, data)
+        return data
+    touch(path)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def render(data, width, height, quality):
+    """Dérivé WebP : recadrage centré si la hauteur est fixée, sinon réduction sans agrandissement."""
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        if height:
+            image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            image.thumbnail((width, MAX_DIMENSION), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format='WEBP', quality=quality, method=4)
+        return buffer.getvalue()
+
+
+def derivative_key(url, width, height=None):
+    """Empreinte du dérivé, qui sert aussi d'ETag."""
+    return digest(url, width, height, get_setting('IMAGE_PROXY_QUALITY', 80))
+
+
+def derivative(url, width, height=None):
+    """(chemin, clé) du dérivé WebP sur disque, généré au premier accès."""
+    quality = get_setting('IMAGE_PROXY_QUALITY', 80)
+    key = derivative_key(url, width, height)
+    path = cache_path('derivatives', key, '.webp')
+    if os.path.exists(path):
+        touch(path)
+        return path, key
+    # Un seul calcul par dérivé et par processus ; entre processus, le renommage atomique suffit
+    with key_lock(key):
+        if not os.path.exists(path):
+            write_atomic(path, render(fetch_original(url), width, height, quality))
+    return path, key
+
+
+def evict(max_bytes=None):
+    """Supprime les fichiers les moins récemment utilisés au-delà de `max_bytes`. Retourne (fichiers, octets) supprimés."""
+    max_bytes = max_bytes if max_bytes is not None else get_setting('IMAGE_PROXY_MAX_BYTES', 512 * 1024 * 1024)
+    entries = []
+    for directory, _, files in os.walk(cache_root()):
+        for name in files:
+            if name.endswith('.tmp'):  # écriture en cours
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed, freed = 0, 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        freed += size
+    return removed, freed
@@ -0,0 +1,220 @@
+"""
+Registre des images envoyées sur Cloudinary, pour ne jamais transférer ni stocker deux fois
+les mêmes octets.
+
+Chaque image uploadée est enregistrée (ImageAsset) avec :
+- le SHA-256 de son contenu : doublon exact ;
+- un hash perceptuel (dHash 64 bits, via Pillow) : même photo réencodée ou redimensionnée,
+  signalée si la distance de Hamming est au plus PERCEPTUAL_THRESHOLD. Le dHash ignore la
+  couleur (deux déclinaisons d'un même modèle sont à 1 ou 2 bits) : un quasi-doublon n'est
+  jamais réutilisé automatiquement, il est seulement signalé pour vérification
+  (comme find_duplicate_images) ;
+- les URLs sources déjà téléchargées (ImageSource), consultées avant tout téléchargement ;
+- ses métadonnées d'affichage (products.image_metadata), recopiées sur les ProductImage.
+
+`upload_image()` enchaîne ces vérifications pour les scripts et le seeder. Les imports
+parallèles utilisent `fingerprint()` / `upload_bytes()` (sans base de données) dans leurs
+threads, puis `find_existing()` / `find_similar()` / `record()` depuis le thread principal.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+import cloudinary.uploader
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+
+from products.image_metadata import blurhash, dominant_color
+from products.models import ImageAsset, ImageSource
+
+try:
+    from PIL import Image
+except ImportError:  # Sans Pillow : déduplication exacte seulement
+    Image = None
+
+PERCEPTUAL_THRESHOLD = 6
+DOWNLOAD_TIMEOUT = 15
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    sha256: str
+    phash: str = ''
+    size: int = 0
+    width: Optional[int] = None
+    height: Optional[int] = None
+    blurhash: str = ''
+    dominant_color: str = ''
+
+
+def perceptual_hash(image):
+    """dHash : compare chaque pixel à son voisin de droite sur une vignette 9x8 en niveaux de gris."""
+    pixels = list(image.convert('L').resize((9, 8)).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f'{value:016x}'
+
+
+def fingerprint(data):
+    sha256 = hashlib.sha256(data).hexdigest()
+    if Image is None:
+        return Fingerprint(sha256, size=len(data))
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return Fingerprint(
+                sha256, perceptual_hash(image), len(data), image.width, image.height,
+                blurhash(image), dominant_color(image),
+            )
+    except Exception:
+        # Contenu illisible par Pillow : seul le hash exact est utilisable
+        return Fingerprint(sha256, size=len(data))
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+class PerceptualIndex:
+    """Hashs perceptuels du registre en mémoire, rechargés quand le registre change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self._hashes = []
+
+    def ensure_loaded(self):
+        aggregate = ImageAsset.objects.exclude(phash='').aggregate(total=Count('pk'), last=Max('pk'))
+        signature = (aggregate['total'], aggregate['last'])
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature != self._signature:
+                self._hashes = [
+                    (int(phash, 16), pk)
+                    for pk, phash in ImageAsset.objects.exclude(phash='').values_list('pk', 'phash').iterator()
+                ]
+                self._signature = signature
+
+    def nearest(self, phash, threshold=PERCEPTUAL_THRESHOLD):
+        """Identifiant de l'image la plus proche à `threshold` bits près, ou None."""
+        if not phash:
+            return None
+        self.ensure_loaded()
+        value = int(phash, 16)
+        best = None
+        for candidate, pk in self._hashes:
+            distance = bin(value ^ candidate).count('1')
+            if distance <= threshold and (best is None or distance < best[0]):
+                best = (distance, pk)
+        return best[1] if best else None
+
+
+perceptual_index = PerceptualIndex()
+
+
+def find_existing(fingerprints):
+    """{sha256: ImageAsset} des empreintes déjà enregistrées, au contenu identique."""
+    return {
+        asset.sha256: asset
+        for asset in ImageAsset.objects.filter(sha256__in={fp.sha256 for fp in fingerprints})
+    }
+
+
+def find_similar(fingerprints):
+    """
+    {sha256: ImageAsset} des images enregistrées perceptuellement proches (à vérifier :
+    même photo réencodée, ou autre couleur du même modèle) ; jamais réutilisées d'office.
+    """
+    near = {}
+    for fp in fingerprints:
+        pk = perceptual_index.nearest(fp.phash)
+        if pk is not None:
+            near[fp.sha256] = pk
+    assets = ImageAsset.objects.in_bulk(set(near.values())) if near else {}
+    return {sha256: assets[pk] for sha256, pk in near.items() if pk in assets and assets[pk].sha256 != sha256}
+
+
+def find_by_source(url):
+    source = ImageSource.objects.select_related('asset').filter(url=url).first()
+    return source.asset if source else None
+
+
+def upload_bytes(data, **options):
+    """Upload brut vers Cloudinary (sans accès base, utilisable dans un thread)."""
+    options.setdefault('resource_type', 'image')
+    return cloudinary.uploader.upload(data, **options)
+
+
+def record(fp, upload_result, source_url=None):
+    """Enregistre une image uploadée ; si une autre l'a enregistrée entre-temps, retourne celle-ci."""
+    try:
+        with transaction.atomic():
+            asset = ImageAsset.objects.create(
+                sha256=fp.sha256,
+                phash=fp.phash,
+                url=upload_result.get('secure_url') or upload_result['url'],
+                public_id=upload_result.get('public_id', ''),
+                width=upload_result.get('width') or fp.width,
+                height=upload_result.get('height') or fp.height,
+                bytes=fp.size,
+                blurhash=fp.blurhash,
+                dominant_color=fp.dominant_color,
+            )
+    except IntegrityError:
+        asset = ImageAsset.objects.get(sha256=fp.sha256)
+    if source_url:
+        add_source(asset, source_url)
+    return asset
+
+
+def add_source(asset, url):
+    ImageSource.objects.get_or_create(url=url, defaults={'asset': asset})
+
+
+def read_source(source):
+    """Octets d'une image : bytes, fichier ouvert, chemin local ou URL http(s)."""
+    if isinstance(source, bytes):
+        return source
+    if hasattr(source, 'read'):
+        return source.read()
+    if isinstance(source, str) and source.startswith(('http://', 'https://')):
+        response = requests.get(source, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        return response.content
+    with open(os.fspath(source), 'rb') as f:
+        return f.read()
+
+
+def upload_image(source, source_url=None, **options):
+    """
+    Upload dédupliqué : retourne l'URL Cloudinary de l'image, en réutilisant une image déjà
+    enregistrée (même URL source ou mêmes octets) plutôt que de l'envoyer. Un quasi-doublon
+    est uploadé et signalé dans les logs. Les options sont passées à cloudinary.uploader.upload.
+    """
+    if source_url is None and isinstance(source, str) and source.startswith(('http://', 'https://')):
+        source_url = source
+    if source_url:
+        asset = find_by_source(source_url)
+        if asset is not None:
+            return asset.url
+
+    data = read_source(source)
+    fp = fingerprint(data)
+    asset = find_existing([fp]).get(fp.sha256)
+    if asset is None:
+        similar = find_similar([fp]).get(fp.sha256)
+        asset = record(fp, upload_bytes(data, **options))
+        if similar is not None:
+            logger.warning("Image %s proche de %s : vérifier s'il s'agit d'un doublon", asset.url, similar.url)
+    if source_url:
+        add_source(asset, source_url)
+    return asset.url
@@ -0,0 +1,121 @@
+"""
+Variantes responsives des images (vignette, carte, zoom) obtenues uniquement par réécriture
+d'URL, sans appel d'API :
+- Cloudinary : transformation insérée après /image/upload/ (c_fill,g_auto,w_,h_,f_auto,q_auto) ;
+- Unsplash (imgix) : paramètres w, h, fit=crop, auto=format, fm ;
+- Pexels : paramètres w, h, fit=crop, auto=compress.
+Avec IMAGE_PROXY_ENABLED, les images Unsplash et Pexels passent par le proxy local
+(products.image_proxy) qui sert des dérivés WebP. Les autres URLs sont renvoyées telles quelles.
+
+Chaque variante expose son URL (format négocié par le CDN), ses dimensions, un `srcset`
+1x/2x et, quand le CDN le permet, des URLs AVIF et WebP explicites pour <picture>.
+"""
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .image_proxy import is_proxied, proxy_url
+
+PRODUCT_VARIANTS = {
+    'thumbnail': (150, 150),
+    'card': (600, 600),  # cartes produit carrées
+    'zoom': (1600, None),  # taille limitée, proportions d'origine
+}
+
+CATEGORY_VARIANTS = {
+    'thumbnail': (200, 150),
+    'card': (600, 450),
+    'banner': (1600, 500),
+}
+
+EXPLICIT_FORMATS = ('avif', 'webp')
+
+
+def cloudinary_url(url, width, height, fmt):
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    prefix, _, rest = path.partition('/upload/')
+    crop = f'c_fill,g_auto,w_{width},h_{height}' if height else f'c_limit,w_{width}'
+    transformation = f'{crop},f_{fmt},q_auto'
+    return urlunsplit(('https', netloc, f'{prefix}/upload/{transformation}/{rest}', query, fragment))
+
+
+def imgix_url(url, width, height, fmt, extra):
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    params = dict(parse_qsl(query))
+    for key in ('w', 'h', 'fit', 'crop', 'fm', 'auto', 'q', 'dpr', 'cs'):
+        params.pop(key, None)
+    params['w'] = str(width)
+    if height:
+        params['h'] = str(height)
+        params['fit'] = 'crop'
+    params.update(extra)
+    if fmt != 'auto':
+        # auto=format prendrait le pas sur le format explicite
+        params['fm'] = fmt
+        if params.get('auto') == 'format':
+            del params['auto']
+    return urlunsplit((scheme, netloc, path, urlencode(params), fragment))
+
+
+def transformer_for(url, proxy=False):
+    """Fonction (url, largeur, hauteur, format) du CDN de l'URL, et formats explicites gérés."""
+    if proxy:
+        # Le proxy ne produit que du WebP
+        return lambda u, w, h, fmt: proxy_url(u, w, h), ()
+    netloc = urlsplit(url).netloc
+    if netloc == 'res.cloudinary.com' and '/image/upload/' in url:
+        return cloudinary_url, EXPLICIT_FORMATS
+    if netloc == 'images.unsplash.com':
+        return lambda u, w, h, fmt: imgix_url(u, w, h, fmt, {'auto': 'format', 'q': '75'}), EXPLICIT_FORMATS
+    if netloc == 'images.pexels.com':
+        return lambda u, w, h, fmt: imgix_url(u, w, h, fmt, {'auto': 'compress', 'cs': 'tinysrgb'}), ()
+    return None, ()
+
+
+def limited_size(width, height, intrinsic_width, intrinsic_height):
+    """Dimensions réelles d'une variante c_limit (sans agrandissement) si l'original est connu."""
+    if height or not (intrinsic_width and intrinsic_height):
+        return width, height
+    scale = min(1, width / intrinsic_width)
+    return round(intrinsic_width * scale), round(intrinsic_height * scale)
+
+
+def srcset(transform, url, width, height, intrinsic_width, intrinsic_height):
+    """Candidats 1x et 2x ; le 2x est omis s'il dépasserait l'original (même largeur réelle)."""
+    candidates = {}
+    for density in (1, 2):
+        w, h = width * density, height * density if height else None
+        actual = limited_size(w, h, intrinsic_width, intrinsic_height)[0]
+        candidates.setdefault(actual, transform(url, w, h, 'auto'))
+    return ', '.join(f'{candidate} {actual}w' for actual, candidate in candidates.items())
+
+
+# Résultat partagé entre appels : à ne pas modifier
+@lru_cache(maxsize=8192)
+def _variants(url, variants, intrinsic_width=None, intrinsic_height=None, proxy=False):
+    transform, formats = transformer_for(url, proxy)
+    result = {}
+    for name, (width, height) in variants:
+        if transform is None:
+            result[name] = {'url': url, 'width': width, 'height': height, 'srcset': ''}
+            continue
+        actual_width, actual_height = limited_size(width, height, intrinsic_width, intrinsic_height)
+        variant = {
+            'url': transform(url, width, height, 'auto'),
+            'width': actual_width,
+            'height': actual_height,
+            'srcset': srcset(transform, url, width, height, intrinsic_width, intrinsic_height),
+        }
+        for fmt in formats:
+            variant[fmt] = transform(url, width, height, fmt)
+        result[name] = variant
+    return result
+
+
+def image_variants(url, variants=PRODUCT_VARIANTS, width=None, height=None):
+    """
+    {nom: {url, width, height, srcset[, avif, webp]}} pour une URL d'image, {} si vide.
+    `width`/`height` (dimensions d'origine) complètent les variantes à proportions libres.
+    """
+    if not url:
+        return {}
+    return _variants(url, tuple(variants.items()), width, height, is_proxied(url))
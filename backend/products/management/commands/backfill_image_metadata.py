@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.image_metadata import backfill_image_metadata, pending_images
+from products.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = "Calcule dimensions, poids, BlurHash et couleur dominante des images produits existantes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Téléchargements simultanés')
+        parser.add_argument('--batch-size', type=int, default=100, help='Images mises à jour par UPDATE groupé')
+        parser.add_argument('--limit', type=int, help="Nombre maximal d'images à traiter")
+        parser.add_argument('--force', action='store_true', help='Recalculer aussi les images déjà renseignées ou en échec')
+
+    def handle(self, *args, **options):
+        queryset = ProductImage.objects.order_by('id')
+        if not options['force']:
+            queryset = pending_images(queryset)
+        if options['limit']:
+            queryset = queryset[:options['limit']]
+
+        started = time.perf_counter()
+        updated, failed = backfill_image_metadata(
+            queryset, workers=options['workers'], batch_size=options['batch_size']
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{updated} images mises à jour, {failed} URLs en échec '
+            f'({elapsed:.1f} s, {updated / elapsed if elapsed else 0:.1f} images/s)'
+        ))
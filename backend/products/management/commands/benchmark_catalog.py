@@ -0,0 +1,114 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from jaelleshop.fast_json import FastJSONRenderer, orjson
+from products.api.views import get_catalog_products
+from products.fast_serializers import product_values, serialize_products
+from products.image_urls import _variants
+from products.models import Category, SubCategory, Product, ProductImage
+from products.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le coût par produit de la sérialisation des listes du catalogue (ProductSerializer "
+        "et chemin rapide) et du rendu JSON (json standard et orjson) sur un catalogue de test "
+        "créé puis annulé dans une transaction"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help='Nombre de produits générés')
+        parser.add_argument('--images', type=int, default=2, help='Images par produit')
+        parser.add_argument('--repeat', type=int, default=3, help='Mesures par variante (meilleure retenue)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            category = self.create_catalog(options['products'], options['images'])
+            self.run(category, options['products'], options['repeat'])
+            # Rien n'est conservé en base
+            transaction.set_rollback(True)
+
+    def create_catalog(self, size, images):
+        category = Category.objects.create(name='Benchmark', slug='benchmark-catalog', is_published=True)
+        subcategory = SubCategory.objects.create(category=category, name='Benchmark', slug='benchmark', is_published=True)
+        products = Product.objects.bulk_create([
+            Product(
+                category=category,
+                subcategory=subcategory if i % 4 else None,
+                name=f'Produit {i}',
+                slug=f'benchmark-produit-{i}',
+                description='Description du produit de test. ' * 8,
+                price=Decimal('19.99') + i % 100,
+                stock=10,
+                is_published=True,
+            )
+            for i in range(size)
+        ], batch_size=1000)
+        ProductImage.objects.bulk_create([
+            ProductImage(
+                product=product,
+                image=f'https://res.cloudinary.com/demo/image/upload/v1/benchmark/{product.pk}-{n}.jpg',
+                is_main=n == 0,
+                width=1200,
+                height=1500,
+            )
+            for product in products for n in range(images)
+        ], batch_size=1000)
+        return category
+
+    def measure(self, serialize, repeat):
+        best, output = None, None
+        for _ in range(repeat):
+            _variants.cache_clear()
+            started = time.perf_counter()
+            output = JSONRenderer().render(serialize())
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
+
+    def run(self, category, size, repeat):
+        def queryset():
+            return get_catalog_products(category=category).order_by('-created_at', '-id')
+
+        drf, drf_output = self.measure(lambda: ProductSerializer(queryset(), many=True).data, repeat)
+        fast, fast_output = self.measure(lambda: serialize_products(product_values(queryset())), repeat)
+        if drf_output != fast_output:
+            raise CommandError('Le chemin rapide ne produit pas le même JSON que ProductSerializer')
+
+        for label, elapsed in (('ProductSerializer', drf), ('Chemin rapide', fast)):
+            self.stdout.write(
+                f'{label:<18} {elapsed:7.2f} s  {elapsed / size * 1e6:8.1f} µs/produit '
+                '(requêtes, sérialisation et rendu JSON)'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{size} produits, JSON identique ({len(fast_output) / 1024 / 1024:.1f} Mo), '
+            f'chemin rapide {drf / fast:.1f}x plus rapide'
+        ))
+
+        self.compare_renderers(serialize_products(product_values(queryset())), size, repeat)
+
+    def compare_renderers(self, data, size, repeat):
+        """Rendu de la même réponse par le JSONRenderer de DRF et par FastJSONRenderer."""
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson non installé : FastJSONRenderer utilise le module json standard'))
+        timings = {}
+        for label, renderer in (('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())):
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                output = renderer.render(data)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = (best, output)
+            self.stdout.write(
+                f'{label:<18} {best * 1000:7.1f} ms {best / size * 1e6:8.2f} µs/produit '
+                f'{len(output) / 1024 / 1024 / best:8.1f} Mo/s'
+            )
+        (standard, expected), (fast, output) = timings['JSONRenderer'], timings['FastJSONRenderer']
+        if output != expected:
+            raise CommandError('FastJSONRenderer ne produit pas le même JSON que JSONRenderer')
+        self.stdout.write(self.style.SUCCESS(f'Rendu identique, FastJSONRenderer {standard / fast:.1f}x plus rapide'))
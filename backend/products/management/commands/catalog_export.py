@@ -0,0 +1,41 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.catalog_io import CHUNK_SIZE, iter_rows, write_csv, write_jsonl
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl}
+
+
+class Command(BaseCommand):
+    help = "Exporte le catalogue (catégories, sous-catégories, produits et images) en CSV ou JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier de sortie ('-' pour la sortie standard)")
+        parser.add_argument('--format', choices=sorted(WRITERS), help="Format (déduit de l'extension par défaut)")
+        parser.add_argument('--published-only', action='store_true', help='Uniquement le catalogue publié')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Lignes lues par aller-retour base')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or next((name for name in WRITERS if path.endswith(f'.{name}')), None)
+        if fmt is None:
+            if path != '-':
+                raise CommandError("Format indéterminé : utiliser --format csv|jsonl")
+            fmt = 'jsonl'
+        rows = iter_rows(published_only=options['published_only'], chunk_size=options['chunk_size'])
+
+        started = time.perf_counter()
+        if path == '-':
+            count = WRITERS[fmt](rows, sys.stdout)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                count = WRITERS[fmt](rows, stream)
+        elapsed = time.perf_counter() - started
+
+        # Sur la sortie d'erreur quand l'export lui-même va sur la sortie standard
+        out = self.stderr if path == '-' else self.stdout
+        out.write(self.style.SUCCESS(
+            f'{count} lignes exportées ({elapsed:.1f} s, {count / elapsed if elapsed else 0:.0f} lignes/s)'
+        ))
@@ -0,0 +1,48 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.catalog_io import BATCH_SIZE, import_rows, read_csv, read_jsonl
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = "Importe (crée ou met à jour par slug) un catalogue CSV ou JSON Lines produit par catalog_export"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier à importer ('-' pour l'entrée standard)")
+        parser.add_argument('--format', choices=sorted(READERS), help="Format (déduit de l'extension par défaut)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Lignes écrites par transaction')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or next((name for name in READERS if path.endswith(f'.{name}')), None)
+        if fmt is None:
+            raise CommandError("Format indéterminé : utiliser --format csv|jsonl")
+
+        started = time.perf_counter()
+        if path == '-':
+            report = import_rows(READERS[fmt](sys.stdin), batch_size=options['batch_size'])
+        else:
+            try:
+                stream = open(path, encoding='utf-8', newline='')
+            except OSError as e:
+                raise CommandError(f"Impossible d'ouvrir {path} : {e}")
+            with stream:
+                report = import_rows(READERS[fmt](stream), batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        for line, error in report.errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(self.style.WARNING(f'Ligne {line} ignorée : {error}'))
+        if len(report.errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(self.style.WARNING(f'... {len(report.errors) - MAX_REPORTED_ERRORS} autres lignes ignorées'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{report.rows} lignes lues en {report.batches} lots : {report.categories} catégories, '
+            f'{report.subcategories} sous-catégories, {report.products} produits, '
+            f'{report.images_created} images ajoutées, {report.images_deleted} supprimées, '
+            f'{len(report.errors)} erreurs ({elapsed:.1f} s, {report.rows / elapsed if elapsed else 0:.0f} lignes/s)'
+        ))
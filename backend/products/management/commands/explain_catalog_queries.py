@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from products.api.views import get_catalog_products, get_catalog_categories
+from products.models import Category, SubCategory
+
+class Command(BaseCommand):
+    help = "Exécute EXPLAIN sur les requêtes des endpoints publics du catalogue et signale les parcours séquentiels"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE (PostgreSQL uniquement)')
+        parser.add_argument('--verbose-plans', action='store_true', help='Affiche le plan complet de chaque requête')
+        parser.add_argument('--fail-on-seq-scan', action='store_true', help='Termine en erreur si un parcours séquentiel est détecté')
+
+    def endpoint_queries(self):
+        """Requêtes principales des endpoints de products/api/urls.py (hors préchargements)."""
+        category = Category.objects.filter(is_published=True).first()
+        subcategory = SubCategory.objects.filter(is_published=True).first()
+        queries = {
+            'categories/': get_catalog_categories().order_by('-products_count'),
+            'subcategories/': SubCategory.objects.filter(is_published=True).with_products_count(),
+            'products/': get_catalog_products().order_by('-created_at', '-id')[:100],
+            'products/?sort_by=price': get_catalog_products().order_by('price', '-id')[:100],
+            'products/featured/': get_catalog_products(featured=True)[:8],
+            'products/search/?q=chemise': get_catalog_products().search('chemise').order_by('-search_rank')[:100],
+            'products/<slug>/': get_catalog_products(slug='exemple'),
+        }
+        if category:
+            queries['categories/<slug>/products/'] = get_catalog_products(category=category).order_by('-created_at', '-id')[:100]
+            queries['subcategories/by_category/'] = SubCategory.objects.filter(
+                category=category, is_published=True
+            ).with_products_count().order_by('name')
+        if subcategory:
+            queries['subcategories/<slug>/products/'] = get_catalog_products(subcategory=subcategory).order_by('-created_at', '-id')[:100]
+        return queries
+
+    def sequential_scans(self, plan):
+        """Lignes du plan correspondant à un parcours complet de table."""
+        lines = []
+        for line in plan.splitlines():
+            if connection.vendor == 'postgresql' and 'Seq Scan' in line:
+                lines.append(line.strip())
+            elif connection.vendor == 'sqlite' and 'SCAN' in line and 'USING' not in line:
+                lines.append(line.strip())
+        return lines
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options['analyze']:
+            if connection.vendor != 'postgresql':
+                raise CommandError('--analyze est réservé à PostgreSQL')
+            explain_options['analyze'] = True
+
+        flagged = 0
+        for endpoint, queryset in self.endpoint_queries().items():
+            plan = queryset.explain(**explain_options)
+            scans = self.sequential_scans(plan)
+            if scans:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f'/api/{endpoint} : parcours séquentiel'))
+                for line in scans:
+                    self.stdout.write(f'    {line}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'/api/{endpoint} : OK'))
+            if options['verbose_plans']:
+                self.stdout.write(plan)
+
+        if flagged:
+            self.stdout.write(self.style.WARNING(
+                f'{flagged} requête(s) avec parcours séquentiel. Sur de petites tables le planificateur '
+                'préfère souvent un parcours séquentiel : vérifier avec un volume réaliste (ANALYZE à jour).'
+            ))
+            if options['fail_on_seq_scan']:
+                raise CommandError('Parcours séquentiels détectés')
+        else:
+            self.stdout.write(self.style.SUCCESS('Aucun parcours séquentiel détecté'))
@@ -0,0 +1,55 @@
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.image_registry import PERCEPTUAL_THRESHOLD, fingerprint, hamming
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+class Command(BaseCommand):
+    help = 'Liste les images en double (contenu identique ou quasi identique) dans un dossier local'
+
+    def add_arguments(self, parser):
+        parser.add_argument('folder', nargs='?', help='Dossier à analyser (défaut : MEDIA_ROOT)')
+        parser.add_argument('--threshold', type=int, default=PERCEPTUAL_THRESHOLD, help='Distance maximale entre hashs perceptuels')
+
+    def handle(self, *args, **options):
+        folder = options['folder'] or settings.MEDIA_ROOT
+        prints = {}
+        for root, _, files in os.walk(folder):
+            for name in files:
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    with open(path, 'rb') as f:
+                        prints[path] = fingerprint(f.read())
+
+        # Regroupement : même contenu, puis quasi-doublons entre représentants des groupes
+        groups = defaultdict(list)
+        for path, fp in sorted(prints.items()):
+            groups[fp.sha256].append(path)
+        representatives = [(paths[0], prints[paths[0]].phash) for paths in groups.values()]
+        merged = {}
+        for i, (path, phash) in enumerate(representatives):
+            for other, other_phash in representatives[:i]:
+                if phash and other_phash and hamming(phash, other_phash) <= options['threshold']:
+                    merged[path] = merged.get(other, other)
+                    break
+
+        clusters = defaultdict(list)
+        for paths in groups.values():
+            clusters[merged.get(paths[0], paths[0])].extend(paths)
+        duplicates = [paths for paths in clusters.values() if len(paths) > 1]
+
+        wasted = 0
+        for paths in duplicates:
+            self.stdout.write(self.style.WARNING(f'{len(paths)} copies :'))
+            for path in paths:
+                self.stdout.write(f'   - {os.path.relpath(path, folder)}')
+            wasted += sum(prints[path].size for path in paths[1:])
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(prints)} images analysées, {len(duplicates)} groupes de doublons, '
+            f'{wasted / 1024:.0f} Ko récupérables'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from products.image_proxy import cache_root, evict, get_setting
+
+
+class Command(BaseCommand):
+    help = "Réduit le cache disque du proxy d'images en supprimant les fichiers les moins récemment servis"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-mb', type=int,
+            help='Taille maximale du cache en Mo (par défaut IMAGE_PROXY_MAX_BYTES)',
+        )
+
+    def handle(self, *args, **options):
+        max_bytes = options['max_mb'] * 1024 * 1024 if options['max_mb'] is not None else None
+        removed, freed = evict(max_bytes)
+        limit = max_bytes if max_bytes is not None else get_setting('IMAGE_PROXY_MAX_BYTES', 0)
+        self.stdout.write(self.style.SUCCESS(
+            f'{removed} fichiers supprimés ({freed / 1024 / 1024:.1f} Mo) dans {cache_root()}, '
+            f'limite {limit / 1024 / 1024:.0f} Mo'
+        ))
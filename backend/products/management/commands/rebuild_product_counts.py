@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from products.cache import invalidate_catalog_cache
+from products.models import Category, SubCategory, refresh_product_counts
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs dénormalisés de produits publiés des catégories et sous-catégories'
+
+    def handle(self, *args, **options):
+        refresh_product_counts()
+        invalidate_catalog_cache()
+        self.stdout.write(self.style.SUCCESS(
+            f'Compteurs recalculés pour {Category.objects.count()} catégories '
+            f'et {SubCategory.objects.count()} sous-catégories'
+        ))
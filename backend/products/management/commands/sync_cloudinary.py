@@ -1,19 +1,50 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 import cloudinary.api
 import cloudinary
-from products.models import Category, Product, ProductImage
+from products.cloudinary_sync import PAGE_SIZE, ROOT_FOLDER, sync_folders
+from products.models import Product
 
 class Command(BaseCommand):
     help = 'Synchronise les images Cloudinary existantes avec les produits'
+    # progress(pourcentage, message) : avancement par dossier (voir jobs.queue.run_command)
+    stealth_options = ('progress',)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Ignorer les points de reprise et tout reparcourir')
+        parser.add_argument('--root', default=ROOT_FOLDER, help='Dossier Cloudinary contenant les dossiers de catégories')
+        parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Ressources par page (max 500)')
+        parser.add_argument('--structure', action='store_true', help='Afficher aussi la structure des dossiers')
+        parser.add_argument('--skip-metadata', action='store_true', help='Ne pas calculer dimensions et placeholders (voir backfill_image_metadata)')
 
     def handle(self, *args, **options):
         self.stdout.write("=== Synchronisation des images Cloudinary ===\n")
         
         # Afficher la structure actuelle
-        self.list_cloudinary_structure()
+        if options['structure']:
+            self.list_cloudinary_structure()
         
-        # Synchroniser les images
-        self.sync_images_to_products()
+        # Synchroniser les images (incrémental : seules les ressources nouvelles ou modifiées)
+        try:
+            reports = sync_folders(
+                root=options['root'],
+                full=options['full'],
+                page_size=min(options['page_size'], PAGE_SIZE),
+                fetch_metadata=not options['skip_metadata'],
+                progress=options.get('progress'),
+            )
+        except Exception as e:
+            raise CommandError(f"Erreur lors de la récupération des images Cloudinary: {e}") from e
+
+        for report in reports:
+            self.stdout.write(f"\n--- {report.folder} ---")
+            if report.skipped:
+                self.stdout.write(self.style.WARNING(report.skipped))
+                continue
+            self.stdout.write(
+                f"{report.fetched} ressources lues en {report.pages} page(s) : {report.created} nouvelles, "
+                f"{report.changed} modifiées, {report.unchanged} inchangées, {report.assigned} rattachées, "
+                f"{report.deleted} supprimées"
+            )
         
         # Vérifier le résultat
         self.stdout.write("\n=== Vérification finale ===")
@@ -25,105 +56,7 @@ class Command(BaseCommand):
         if total_products > 0:
             percentage = (products_with_images/total_products*100)
             self.stdout.write(f"Pourcentage: {percentage:.1f}%")
-
-    def get_cloudinary_images_by_folder(self):
-        """Récupère toutes les images de Cloudinary organisées par dossier"""
-        try:
-            self.stdout.write("Récupération des images depuis Cloudinary...")
-            
-            # Récupérer toutes les images du dossier jaelleshop/products
-            images_by_folder = {}
-            
-            # Lister tous les dossiers de catégories
-            folders = cloudinary.api.subfolders('jaelleshop/products')
-            
-            for folder_info in folders['folders']:
-                folder_name = folder_info['name']
-                folder_path = f"jaelleshop/products/{folder_name}"
-                
-                self.stdout.write(f"Traitement du dossier: {folder_path}")
-                
-                # Récupérer les images de ce dossier
-                try:
-                    result = cloudinary.api.resources(
-                        type="upload",
-                        prefix=folder_path,
-                        max_results=100
-                    )
-                    
-                    images_by_folder[folder_name] = []
-                    for resource in result['resources']:
-                        images_by_folder[folder_name].append({
-                            'public_id': resource['public_id'],
-                            'secure_url': resource['secure_url'],
-                            'created_at': resource['created_at']
-                        })
-                    
-                    self.stdout.write(f"  - {len(images_by_folder[folder_name])} images trouvées")
-                    
-                except Exception as e:
-                    self.stdout.write(f"  - Erreur lors du traitement du dossier {folder_path}: {e}")
-                    images_by_folder[folder_name] = []
-            
-            return images_by_folder
-            
-        except Exception as e:
-            self.stdout.write(f"Erreur lors de la récupération des images Cloudinary: {e}")
-            return {}
-
-    def sync_images_to_products(self):
-        """Synchronise les images Cloudinary avec les produits"""
-        self.stdout.write("\n=== Synchronisation des images Cloudinary avec les produits ===")
-        
-        # Récupérer les images de Cloudinary
-        cloudinary_images = self.get_cloudinary_images_by_folder()
-        
-        if not cloudinary_images:
-            self.stdout.write("Aucune image trouvée dans Cloudinary")
-            return
-        
-        # Traiter chaque catégorie
-        for category_folder, images in cloudinary_images.items():
-            self.stdout.write(f"\n--- Traitement de la catégorie: {category_folder} ---")
-            
-            # Trouver la catégorie correspondante
-            try:
-                category = Category.objects.get(name__iexact=category_folder)
-            except Category.DoesNotExist:
-                self.stdout.write(f"Catégorie '{category_folder}' non trouvée en base de données")
-                continue
-            
-            # Récupérer les produits de cette catégorie
-            products = Product.objects.filter(category=category, is_published=True)
-            
-            if not products.exists():
-                self.stdout.write(f"Aucun produit trouvé pour la catégorie {category_folder}")
-                continue
-            
-            self.stdout.write(f"Produits trouvés: {products.count()}")
-            self.stdout.write(f"Images disponibles: {len(images)}")
-            
-            # Assigner les images aux produits
-            for i, product in enumerate(products):
-                if i >= len(images):
-                    self.stdout.write(f"Plus d'images disponibles pour le produit: {product.name}")
-                    break
-                
-                # Supprimer les anciennes images du produit
-                ProductImage.objects.filter(product=product).delete()
-                
-                # Assigner la nouvelle image
-                image_data = images[i]
-                product_image = ProductImage.objects.create(
-                    product=product,
-                    image=image_data['secure_url'],
-                    is_main=True
-                )
-                
-                self.stdout.write(f"✓ Image assignée au produit: {product.name}")
-                self.stdout.write(f"  URL: {image_data['secure_url']}")
-        
-        self.stdout.write("\n=== Synchronisation terminée ===")
+        self.stdout.write(self.style.SUCCESS("=== Synchronisation terminée ==="))
 
     def list_cloudinary_structure(self):
         """Affiche la structure des dossiers Cloudinary"""
@@ -1,11 +1,17 @@
+import json
 import os
-import sys
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils.text import slugify
-import cloudinary.uploader
-from products.models import Category, Product, ProductImage
+from products.cache import invalidate_catalog_cache
+from products.image_registry import find_existing, find_similar, fingerprint, record, upload_bytes
+from products.models import (
+    Category, Product, ProductImage, ImageAsset, denormalized_counts_enabled, refresh_product_counts,
+)
 
 # Descriptions par type de produit
 DESCRIPTIONS = {
@@ -42,20 +48,61 @@ PRICE_RANGES = {
     "default": (29.99, 99.99)
 }
 
+class UploadManifest:
+    """
+    Journal JSON des uploads d'un dossier, réécrit de façon atomique après chaque image.
+    Une image déjà uploadée n'est pas renvoyée à Cloudinary lors d'une reprise ;
+    une image dont le produit est créé est marquée `created`.
+    """
+
+    def __init__(self, path, reset=False):
+        self.path = path
+        self.entries = {}
+        if not reset and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def get(self, image_file):
+        return self.entries.get(image_file, {})
+
+    def record(self, image_file, **values):
+        self.entries.setdefault(image_file, {}).update(values)
+
+    def save(self):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def product_type_for(product_name):
+    for key in DESCRIPTIONS.keys():
+        if key != 'default' and key.lower() in product_name.lower():
+            return key
+    return 'default'
+
+
 class Command(BaseCommand):
     help = 'Upload de nouvelles images de produits depuis un dossier local vers Cloudinary et création des produits'
+    # progress(pourcentage, message) : avancement des uploads (tâches de fond, voir jobs.queue.run_command)
+    stealth_options = ('progress',)
 
     def add_arguments(self, parser):
         parser.add_argument('folder_path', type=str, help='Chemin vers le dossier contenant les images')
         parser.add_argument('--category', type=str, help='Catégorie à laquelle ajouter les produits')
+        parser.add_argument('--workers', type=int, default=8, help='Uploads Cloudinary simultanés')
+        parser.add_argument('--batch-size', type=int, default=50, help='Produits créés par INSERT groupé')
+        parser.add_argument('--manifest', type=str, help='Fichier de reprise (défaut : <dossier>/.upload_manifest.json)')
+        parser.add_argument('--restart', action='store_true', help='Ignorer le manifeste existant')
 
     def handle(self, *args, **options):
         folder_path = options['folder_path']
         category_name = options.get('category')
 
+        progress = options.get('progress') or (lambda percent, message='': None)
+
         if not os.path.exists(folder_path):
-            self.stdout.write(self.style.ERROR(f'Le dossier {folder_path} n\'existe pas'))
-            return
+            raise CommandError(f'Le dossier {folder_path} n\'existe pas')
 
         # Vérifier si la catégorie existe
         if category_name:
@@ -63,18 +110,17 @@ class Command(BaseCommand):
                 category = Category.objects.get(name=category_name)
                 self.stdout.write(self.style.SUCCESS(f'Catégorie trouvée: {category.name}'))
             except Category.DoesNotExist:
-                self.stdout.write(self.style.ERROR(f'La catégorie {category_name} n\'existe pas'))
-                return
+                raise CommandError(f'La catégorie {category_name} n\'existe pas')
         else:
             # Afficher les catégories disponibles
             categories = Category.objects.all()
             self.stdout.write(self.style.WARNING('Aucune catégorie spécifiée. Catégories disponibles:'))
             for cat in categories:
                 self.stdout.write(f'- {cat.name}')
-            return
+            raise CommandError('Aucune catégorie spécifiée (--category)')
 
         # Liste des fichiers d'images dans le dossier
-        image_files = [f for f in os.listdir(folder_path) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+        image_files = sorted(f for f in os.listdir(folder_path) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
         
         if not image_files:
             self.stdout.write(self.style.ERROR(f'Aucune image trouvée dans le dossier {folder_path}'))
@@ -82,70 +128,161 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f'Trouvé {len(image_files)} images à traiter'))
 
-        # Pour chaque image, créer un nouveau produit
-        for i, image_file in enumerate(image_files):
-            # Nom du produit basé sur le nom du fichier
+        manifest = UploadManifest(
+            options.get('manifest') or os.path.join(folder_path, '.upload_manifest.json'),
+            reset=options['restart'],
+        )
+
+        # Nom du produit basé sur le nom du fichier ; slugs existants chargés en une requête
+        candidates = {}
+        for image_file in image_files:
             product_name = os.path.splitext(image_file)[0].replace('_', ' ').title()
-            
-            # Vérifier si le produit existe déjà
-            slug = slugify(product_name)
-            if Product.objects.filter(slug=slug).exists():
-                self.stdout.write(self.style.WARNING(f'Le produit {product_name} existe déjà. Ignoré.'))
+            candidates.setdefault(slugify(product_name), (image_file, product_name))
+        existing_slugs = set(Product.objects.filter(slug__in=candidates).values_list('slug', flat=True))
+
+        todo = []
+        skipped = 0
+        for slug, (image_file, product_name) in candidates.items():
+            if slug in existing_slugs:
+                if not manifest.get(image_file).get('created'):
+                    self.stdout.write(self.style.WARNING(f'Le produit {product_name} existe déjà. Ignoré.'))
+                skipped += 1
                 continue
-            
-            # Chemin complet de l'image
-            image_path = os.path.join(folder_path, image_file)
-            
+            todo.append((image_file, product_name, slug))
+
+        self.folder = f'jaelleshop/products/{category.name.lower()}'
+        self.category = category
+        self.batch_size = max(options['batch_size'], 1)
+        self.created = 0
+        self.failed = 0
+        self.last_error = None
+        uploaded = 0
+        pending = []
+        started = time.perf_counter()
+
+        resumed = [item for item in todo if manifest.get(item[0]).get('url')]
+        to_upload = [item for item in todo if not manifest.get(item[0]).get('url')]
+        if resumed:
+            self.stdout.write(self.style.SUCCESS(f'{len(resumed)} images déjà uploadées reprises depuis le manifeste'))
+        pending.extend(resumed)
+
+        deduplicated = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            # Empreintes calculées en parallèle, puis registre d'images consulté en une fois :
+            # une image déjà uploadée (même contenu) n'est pas renvoyée ; un quasi-doublon
+            # (peut-être une autre couleur du même modèle) est uploadé et signalé
+            fingerprints = dict(zip(
+                [image_file for image_file, _, _ in to_upload],
+                executor.map(self.read_fingerprint, [os.path.join(folder_path, f) for f, _, _ in to_upload]),
+            ))
+            existing = find_existing(fingerprints.values())
+            uploads = {}
+            for item in to_upload:
+                fp = fingerprints[item[0]]
+                if fp.sha256 in existing:
+                    deduplicated += 1
+                    manifest.record(item[0], slug=item[2], url=existing[fp.sha256].url)
+                    pending.append(item)
+                else:
+                    # Fichiers identiques dans le dossier : un seul upload pour tous
+                    uploads.setdefault(fp.sha256, []).append(item)
+            manifest.save()
+            similar = find_similar(fingerprints[items[0][0]] for items in uploads.values())
+
+            futures = {
+                executor.submit(self.upload, os.path.join(folder_path, items[0][0]), items[0][2]): items
+                for items in uploads.values()
+            }
+            for future in as_completed(futures):
+                items = futures[future]
+                try:
+                    asset = record(fingerprints[items[0][0]], future.result())
+                except Exception as e:
+                    self.failed += len(items)
+                    self.last_error = e
+                    self.stdout.write(self.style.ERROR(f'Erreur lors de l\'upload de l\'image pour {items[0][1]}: {str(e)}'))
+                    continue
+                uploaded += 1
+                progress(100 * uploaded // len(futures), f'{uploaded}/{len(futures)} images uploadées')
+                deduplicated += len(items) - 1
+                for image_file, product_name, slug in items:
+                    manifest.record(image_file, slug=slug, url=asset.url)
+                    pending.append((image_file, product_name, slug))
+                manifest.save()
+                if len(pending) >= self.batch_size:
+                    self.create_products(pending, manifest)
+                    pending = []
+
+        if pending:
+            self.create_products(pending, manifest)
+
+        if self.created:
+            if denormalized_counts_enabled():
+                refresh_product_counts(category_ids=[category.pk])
+            invalidate_catalog_cache()
+
+        elapsed = time.perf_counter() - started
+        rate = uploaded / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS('Importation terminée'))
+        self.stdout.write(self.style.SUCCESS(
+            f'   - {self.created} produits créés, {uploaded} images uploadées, '
+            f'{deduplicated} doublons réutilisés, {skipped} ignorés, {self.failed} échecs'
+        ))
+        self.stdout.write(self.style.SUCCESS(f'   - {elapsed:.1f} s, {rate:.2f} images/s'))
+        if similar:
+            self.stdout.write(self.style.WARNING(
+                f'{len(similar)} images proches d\'images déjà enregistrées, uploadées quand même (à vérifier) :'
+            ))
+            for items in uploads.values():
+                asset = similar.get(fingerprints[items[0][0]].sha256)
+                if asset is not None:
+                    self.stdout.write(f'   - {items[0][0]} ~ {asset.url}')
+        if self.failed:
+            # Cause chaînée : une erreur transitoire (réseau, limite Cloudinary) fait relancer la tâche
+            raise CommandError(f'{self.failed} images en échec') from self.last_error
+
+    def read_fingerprint(self, image_path):
+        with open(image_path, 'rb') as f:
+            return fingerprint(f.read())
+
+    def upload(self, image_path, slug):
+        """Upload d'une image (exécuté dans le pool de threads) ; retourne la réponse Cloudinary."""
+        with open(image_path, 'rb') as f:
+            return upload_bytes(f.read(), folder=self.folder, public_id=slug)
+
+    def create_products(self, batch, manifest):
+        """Crée les produits d'un lot et leurs images principales en deux INSERT groupés."""
+        products = []
+        for image_file, product_name, slug in batch:
             # Déterminer le type de produit pour la description et le prix
-            product_type = "default"
-            for key in DESCRIPTIONS.keys():
-                if key.lower() in product_name.lower():
-                    product_type = key
-                    break
-            
-            # Définir la description
-            description = DESCRIPTIONS[product_type]
-            
-            # Définir le prix
+            product_type = product_type_for(product_name)
             min_price, max_price = PRICE_RANGES[product_type]
-            price = round(random.uniform(min_price, max_price), 2)
-            
-            # Créer le produit
-            product = Product(
-                category=category,
+            products.append(Product(
+                category=self.category,
                 name=product_name,
                 slug=slug,
-                description=description,
-                price=Decimal(str(price)),
+                description=DESCRIPTIONS[product_type],
+                price=Decimal(str(round(random.uniform(min_price, max_price), 2))),
                 stock=random.randint(5, 20),  # Stock aléatoire
                 featured=random.choice([True, False]),
                 is_published=True
-            )
-            product.save()
-            
-            try:
-                # Upload de l'image vers Cloudinary
-                upload_result = cloudinary.uploader.upload(
-                    image_path,
-                    folder=f'jaelleshop/products/{category.name.lower()}',
-                    public_id=slug,
-                    resource_type="image"
-                )
-                
-                # Créer l'image du produit
-                product_image = ProductImage(
-                    product=product,
-                    is_main=True  # Image principale
-                )
-                product_image.image = upload_result['url']
-                product_image.save()
-                
-                self.stdout.write(self.style.SUCCESS(f'Produit {product_name} créé avec succès avec image'))
-                self.stdout.write(self.style.SUCCESS(f'   - Prix: {price} €'))
-                self.stdout.write(self.style.SUCCESS(f'   - Type: {product_type}'))
-            except Exception as e:
-                # Supprimer le produit si l'upload a échoué
-                product.delete()
-                self.stdout.write(self.style.ERROR(f'Erreur lors de l\'upload de l\'image pour {product_name}: {str(e)}'))
-        
-        self.stdout.write(self.style.SUCCESS('Importation terminée')) 
\ No newline at end of file
+            ))
+
+        # Dimensions, placeholder et couleur calculés à l'upload (registre d'images)
+        urls = [manifest.get(image_file)['url'] for image_file, _, _ in batch]
+        assets = {asset.url: asset for asset in ImageAsset.objects.filter(url__in=urls)}
+        images = []
+        for product, url in zip(products, urls):
+            image = ProductImage(product=product, image=url, is_main=True)
+            image.copy_metadata(assets.get(url))
+            images.append(image)
+
+        with transaction.atomic():
+            Product.objects.bulk_create(products)
+            ProductImage.objects.bulk_create(images)
+
+        for image_file, product_name, slug in batch:
+            manifest.record(image_file, created=True)
+            self.stdout.write(self.style.SUCCESS(f'Produit {product_name} créé avec succès avec image'))
+        manifest.save()
+        self.created += len(products)
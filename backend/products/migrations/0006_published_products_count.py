@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counts(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    for model_name, field in (('Category', 'category'), ('SubCategory', 'subcategory')):
+        model = apps.get_model('products', model_name)
+        published = (
+            Product.objects.filter(is_published=True, **{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        model.objects.update(published_products_count=Coalesce(
+            Subquery(published, output_field=models.IntegerField()), 0
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_auto_20250605_1351'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='subcategory',
+            name='published_products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Recherche plein texte PostgreSQL : configuration française insensible aux accents,
+# vecteur pondéré (nom A, catégorie B, description C) maintenu par triggers, index GIN.
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+            ALTER TEXT SEARCH CONFIGURATION french_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+        END IF;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION products_product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('french_unaccent', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('french_unaccent', coalesce(
+                (SELECT name FROM products_category WHERE id = NEW.category_id), ''
+            )), 'B') ||
+            setweight(to_tsvector('french_unaccent', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER products_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, category_id ON products_product
+    FOR EACH ROW EXECUTE PROCEDURE products_product_search_vector_update()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION products_category_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.name IS DISTINCT FROM OLD.name THEN
+            UPDATE products_product SET name = name WHERE category_id = NEW.id;
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER products_category_search_vector_trigger
+    AFTER UPDATE OF name ON products_category
+    FOR EACH ROW EXECUTE PROCEDURE products_category_search_vector_update()
+    """,
+    "CREATE INDEX products_product_search_vector_gin ON products_product USING GIN (search_vector)",
+    "UPDATE products_product SET name = name",
+]
+
+BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS products_product_search_vector_gin",
+    "DROP TRIGGER IF EXISTS products_category_search_vector_trigger ON products_category",
+    "DROP FUNCTION IF EXISTS products_category_search_vector_update()",
+    "DROP TRIGGER IF EXISTS products_product_search_vector_trigger ON products_product",
+    "DROP FUNCTION IF EXISTS products_product_search_vector_update()",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS french_unaccent",
+]
+
+
+def run_on_postgresql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_published_products_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_on_postgresql(FORWARD_SQL), run_on_postgresql(BACKWARD_SQL)),
+    ]
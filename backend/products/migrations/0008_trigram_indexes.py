@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Index trigrammes (pg_trgm) pour l'autocomplétion tolérante aux fautes de frappe.
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX products_product_name_trgm ON products_product USING GIN (name gin_trgm_ops)",
+    "CREATE INDEX products_category_name_trgm ON products_category USING GIN (name gin_trgm_ops)",
+    "CREATE INDEX products_subcategory_name_trgm ON products_subcategory USING GIN (name gin_trgm_ops)",
+]
+
+BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS products_product_name_trgm",
+    "DROP INDEX IF EXISTS products_category_name_trgm",
+    "DROP INDEX IF EXISTS products_subcategory_name_trgm",
+]
+
+
+def run_on_postgresql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgresql(FORWARD_SQL), run_on_postgresql(BACKWARD_SQL)),
+    ]
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_image_registry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CloudinarySyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('folder', models.CharField(max_length=255, unique=True)),
+                ('high_water', models.DateTimeField(blank=True, null=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Synchronisation Cloudinary',
+                'verbose_name_plural': 'Synchronisations Cloudinary',
+            },
+        ),
+        migrations.CreateModel(
+            name='CloudinaryResource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_id', models.CharField(max_length=255, unique=True)),
+                ('folder', models.CharField(db_index=True, max_length=255)),
+                ('secure_url', models.URLField(max_length=1000)),
+                ('tag', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('product_image', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cloudinary_resource', to='products.productimage')),
+            ],
+            options={
+                'verbose_name': 'Ressource Cloudinary',
+                'verbose_name_plural': 'Ressources Cloudinary',
+            },
+        ),
+    ]
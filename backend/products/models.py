@@ -1,15 +1,38 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 
+def denormalized_counts_enabled():
+    """Les compteurs de produits sont-ils maintenus en base (CATALOG_DENORMALIZED_COUNTS) ?"""
+    return getattr(settings, 'CATALOG_DENORMALIZED_COUNTS', False)
+
+class ProductsCountQuerySet(models.QuerySet):
+    def with_products_count(self):
+        """
+        Annote `products_count` (produits publiés) : lecture du compteur dénormalisé
+        s'il est activé, sinon agrégation groupée en une seule requête.
+        """
+        if denormalized_counts_enabled():
+            return self.annotate(products_count=models.F('published_products_count'))
+        return self.annotate(
+            products_count=Count('products', filter=Q(products__is_published=True))
+        )
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField(blank=True)
     image = models.URLField(max_length=1000, blank=True, null=True)
     is_published = models.BooleanField(default=False, verbose_name="Publié")
+    published_products_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductsCountQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Catégorie"
         verbose_name_plural = "Catégories"
@@ -36,14 +59,23 @@ class SubCategory(models.Model):
     slug = models.SlugField(max_length=100)
     description = models.TextField(blank=True)
     is_published = models.BooleanField(default=False, verbose_name="Publié")
+    published_products_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductsCountQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Sous-catégorie"
         verbose_name_plural = "Sous-catégories"
         ordering = ['name']
         unique_together = ('category', 'slug')
+        indexes = [
+            models.Index(
+                fields=['category', 'name'], name='subcategory_published_idx',
+                condition=Q(is_published=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.category.name} - {self.name}"
@@ -53,6 +85,25 @@ class SubCategory(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+class ProductQuerySet(models.QuerySet):
+    def published(self):
+        """Produits visibles sur la boutique (disponibles et publiés)."""
+        return self.filter(available=True, is_published=True)
+
+    def with_catalog_relations(self):
+        """
+        Précharge la catégorie, la sous-catégorie et les images (principale en premier)
+        pour que la sérialisation d'une liste ne fasse pas une requête par produit.
+        """
+        return self.select_related('category', 'subcategory').defer('search_vector').prefetch_related(
+            models.Prefetch('images', queryset=ProductImage.objects.order_by('-is_main', 'id'))
+        )
+
+    def search(self, query):
+        """Recherche plein texte classée (voir products.search)."""
+        from .search import search_products
+        return search_products(self, query)
+
 class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     subcategory = models.ForeignKey(SubCategory, on_delete=models.SET_NULL, related_name='products', null=True, blank=True)
@@ -64,13 +115,40 @@ class Product(models.Model):
     available = models.BooleanField(default=True)
     featured = models.BooleanField(default=False)
     is_published = models.BooleanField(default=False, verbose_name="Publié")
+    # Maintenu par un trigger PostgreSQL (migration 0007), vide sous SQLite
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
         ordering = ['-created_at']
+        # Index partiels calqués sur les requêtes publiques (produits publiés et disponibles)
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'], name='product_visible_created_idx',
+                condition=Q(is_published=True, available=True),
+            ),
+            models.Index(
+                fields=['price'], name='product_visible_price_idx',
+                condition=Q(is_published=True, available=True),
+            ),
+            models.Index(
+                fields=['-created_at'], name='product_featured_created_idx',
+                condition=Q(featured=True, is_published=True, available=True),
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'], name='product_category_created_idx',
+                condition=Q(is_published=True, available=True),
+            ),
+            models.Index(
+                fields=['subcategory', '-created_at', '-id'], name='product_subcat_created_idx',
+                condition=Q(is_published=True, available=True),
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -80,10 +158,42 @@ class Product(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+def refresh_product_counts(category_ids=None, subcategory_ids=None):
+    """
+    Recalcule les compteurs dénormalisés `published_products_count`.
+    Sans identifiants, toutes les catégories et sous-catégories sont recalculées.
+    """
+    targets = (
+        (Category, 'category', category_ids),
+        (SubCategory, 'subcategory', subcategory_ids),
+    )
+    for model, field, ids in targets:
+        queryset = model.objects.all()
+        if ids is not None:
+            queryset = queryset.filter(pk__in=[pk for pk in ids if pk])
+        published = (
+            Product.objects.filter(is_published=True, **{field: models.OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        queryset.update(published_products_count=Coalesce(
+            models.Subquery(published, output_field=models.IntegerField()), 0
+        ))
+
 class ProductImage(models.Model):
+    METADATA_FIELDS = ('width', 'height', 'bytes', 'blurhash', 'dominant_color')
+
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.URLField(max_length=500)
     is_main = models.BooleanField(default=False)
+    # Métadonnées d'affichage calculées à l'import (products.image_metadata)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    bytes = models.PositiveIntegerField(null=True, blank=True)
+    blurhash = models.CharField(max_length=64, blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -92,6 +202,29 @@ class ProductImage(models.Model):
 
     def __str__(self):
         return f"Image de {self.product.name} - {'Principale' if self.is_main else 'Secondaire'}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # URL lue en base : le registre n'est consulté à l'enregistrement que si elle change
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.width is None and self.image and self.image != getattr(self, '_loaded_image', None):
+            # Image uploadée via le registre : métadonnées déjà calculées
+            self.copy_metadata(ImageAsset.objects.filter(url=self.image).first())
+        super().save(*args, **kwargs)
+        self._loaded_image = self.image
+
+    def copy_metadata(self, source):
+        """Copie les métadonnées d'un objet ou d'un dict (ImageAsset, image_metadata())."""
+        if not source:
+            return
+        for field in self.METADATA_FIELDS:
+            value = source.get(field) if isinstance(source, dict) else getattr(source, field, None)
+            if value not in (None, ''):
+                setattr(self, field, value)
     
     @property
     def get_image_url(self):
@@ -99,3 +232,69 @@ class ProductImage(models.Model):
         if self.image:
             return self.image
         return None
+
+class ImageAsset(models.Model):
+    """Image déjà envoyée sur Cloudinary, identifiée par son contenu (voir products.image_registry)."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    phash = models.CharField(max_length=16, blank=True, db_index=True)
+    url = models.URLField(max_length=1000, db_index=True)
+    public_id = models.CharField(max_length=255, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    bytes = models.PositiveIntegerField(default=0)
+    blurhash = models.CharField(max_length=64, blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Image enregistrée"
+        verbose_name_plural = "Registre des images"
+
+    def __str__(self):
+        return self.public_id or self.sha256
+
+class ImageSource(models.Model):
+    """URL d'origine (Unsplash, Pexels...) déjà téléchargée, et l'image correspondante."""
+    url = models.URLField(max_length=1000, unique=True)
+    asset = models.ForeignKey(ImageAsset, on_delete=models.CASCADE, related_name='sources')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Source d'image"
+        verbose_name_plural = "Sources d'images"
+
+    def __str__(self):
+        return self.url
+
+class CloudinarySyncState(models.Model):
+    """Point de reprise de la synchronisation d'un dossier Cloudinary (products.cloudinary_sync)."""
+    folder = models.CharField(max_length=255, unique=True)
+    high_water = models.DateTimeField(null=True, blank=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Synchronisation Cloudinary"
+        verbose_name_plural = "Synchronisations Cloudinary"
+
+    def __str__(self):
+        return self.folder
+
+class CloudinaryResource(models.Model):
+    """Ressource Cloudinary déjà synchronisée, avec son empreinte de changement (etag ou version)."""
+    public_id = models.CharField(max_length=255, unique=True)
+    folder = models.CharField(max_length=255, db_index=True)
+    secure_url = models.URLField(max_length=1000)
+    tag = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(null=True, blank=True)
+    # Ressource absente du dossier lors de la dernière passe complète
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    product_image = models.OneToOneField(
+        ProductImage, on_delete=models.SET_NULL, null=True, blank=True, related_name='cloudinary_resource'
+    )
+
+    class Meta:
+        verbose_name = "Ressource Cloudinary"
+        verbose_name_plural = "Ressources Cloudinary"
+
+    def __str__(self):
+        return self.public_id
@@ -0,0 +1,93 @@
+"""
+Recherche plein texte du catalogue.
+
+Sur PostgreSQL, la colonne `Product.search_vector` est maintenue par un trigger
+(voir la migration 0007) : nom (poids A), catégorie (B) et description (C),
+configuration `french_unaccent` (racinisation française, insensible aux accents).
+Sur SQLite, une implémentation portable filtre sur les mêmes champs et reproduit
+les poids de classement.
+"""
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import Case, F, FloatField, Func, Q, Value, When
+from django.db.models.functions import Lower
+from django.dispatch import receiver
+
+SEARCH_CONFIG = 'french_unaccent'
+
+# Poids par défaut de ts_rank pour A, B et C
+FIELD_WEIGHTS = (
+    ('name', 1.0),
+    ('category__name', 0.4),
+    ('description', 0.2),
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def strip_accents(value):
+    if value is None:
+        return None
+    normalized = unicodedata.normalize('NFKD', value)
+    return ''.join(char for char in normalized if not unicodedata.combining(char)).lower()
+
+
+def tokenize(query):
+    """Découpe la saisie utilisateur en mots sans accents, sans caractères spéciaux."""
+    return [strip_accents(token) for token in TOKEN_RE.findall(query or '')]
+
+
+class Unaccent(Func):
+    function = 'UNACCENT'
+
+
+@receiver(connection_created)
+def register_sqlite_unaccent(sender, connection, **kwargs):
+    """Fournit UNACCENT() à SQLite pour la recherche portable."""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function('UNACCENT', 1, strip_accents, deterministic=True)
+
+
+def search_products(queryset, query):
+    """
+    Filtre `queryset` sur `query` et annote `search_rank`.
+    Chaque mot est recherché en préfixe (« chemi » trouve « chemise »).
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        # Saisie sans mot (ponctuation seule) : aucun résultat, mais `search_rank` reste triable
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+    if connections[queryset.db].vendor == 'postgresql':
+        return _search_postgresql(queryset, tokens)
+    return _search_portable(queryset, tokens)
+
+
+def _search_postgresql(queryset, tokens):
+    raw_query = ' & '.join(f'{token}:*' for token in tokens)
+    search_query = SearchQuery(raw_query, search_type='raw', config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=search_query).annotate(
+        search_rank=SearchRank(F('search_vector'), search_query)
+    )
+
+
+def _search_portable(queryset, tokens):
+    rank = Value(0.0, output_field=FloatField())
+    annotations = {
+        f'_search_{field.replace("__", "_")}': Unaccent(Lower(field))
+        for field, _ in FIELD_WEIGHTS
+    }
+    queryset = queryset.alias(**annotations)
+    for token in tokens:
+        matches = Q()
+        weights = []
+        for (field, weight), alias in zip(FIELD_WEIGHTS, annotations):
+            condition = Q(**{f'{alias}__contains': token})
+            matches |= condition
+            weights.append(When(condition, then=Value(weight)))
+        queryset = queryset.filter(matches)
+        rank = rank + Case(*weights, default=Value(0.0), output_field=FloatField())
+    return queryset.annotate(search_rank=rank)
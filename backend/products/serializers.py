@@ -1,17 +1,47 @@
 from rest_framework import serializers
-from .models import Category, SubCategory, Product, ProductImage
+from .image_urls import CATEGORY_VARIANTS, image_variants
+from .models import Category, SubCategory, Product, ProductImage, denormalized_counts_enabled
+
+def get_published_products_count(obj):
+    """
+    Nombre de produits publiés : annotation `products_count` si le queryset l'a fournie,
+    compteur dénormalisé s'il est activé, requête COUNT en dernier recours.
+    """
+    count = getattr(obj, 'products_count', None)
+    if count is not None:
+        return count
+    if denormalized_counts_enabled():
+        return obj.published_products_count
+    return obj.products.filter(is_published=True).count()
+
+class SparseFieldsMixin:
+    """`fields` (noms de champs, voir products.sparse_fields) : les autres champs sont retirés."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 class ProductImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
     
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'is_main', 'image_url']
+        fields = [
+            'id', 'image', 'is_main', 'image_url', 'variants',
+            'width', 'height', 'bytes', 'blurhash', 'dominant_color'
+        ]
         
     def get_image_url(self, obj):
         # Utiliser la méthode get_image_url du modèle
         return obj.get_image_url
 
+    def get_variants(self, obj):
+        # Vignette, carte et zoom (URLs transformées, dimensions et srcset)
+        return image_variants(obj.image, width=obj.width, height=obj.height)
+
 class SubCategorySerializer(serializers.ModelSerializer):
     products_count = serializers.SerializerMethodField()
     
@@ -20,7 +50,7 @@ class SubCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description', 'products_count']
     
     def get_products_count(self, obj):
-        return obj.products.filter(is_published=True).count()
+        return get_published_products_count(obj)
 
 class ProductSerializer(serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
@@ -36,23 +66,30 @@ class ProductSerializer(serializers.ModelSerializer):
             'images', 'created_at'
         ]
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     products_count = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     subcategories = SubCategorySerializer(many=True, read_only=True)
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'description', 'image', 'image_url', 'products_count', 'subcategories']
+        fields = [
+            'id', 'name', 'slug', 'description', 'image', 'image_url', 'image_variants',
+            'products_count', 'subcategories'
+        ]
     
     def get_products_count(self, obj):
-        return obj.products.filter(is_published=True).count()
+        return get_published_products_count(obj)
         
     def get_image_url(self, obj):
         # Utiliser la méthode get_image_url du modèle
         return obj.get_image_url
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+    def get_image_variants(self, obj):
+        return image_variants(obj.image, CATEGORY_VARIANTS)
+
+class ProductDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     subcategory = SubCategorySerializer(read_only=True)
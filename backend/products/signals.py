@@ -0,0 +1,48 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_catalog_cache
+from .models import Category, SubCategory, Product, ProductImage, denormalized_counts_enabled, refresh_product_counts
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_parents(sender, instance, **kwargs):
+    """Mémorise l'ancienne catégorie/sous-catégorie pour recompter après un déplacement."""
+    if not denormalized_counts_enabled() or instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values('category_id', 'subcategory_id').first()
+    instance._previous_parents = previous or {}
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def update_product_counts(sender, instance, **kwargs):
+    """Maintient les compteurs `published_products_count` quand un produit change."""
+    if not denormalized_counts_enabled():
+        return
+    previous = getattr(instance, '_previous_parents', {})
+    refresh_product_counts(
+        category_ids={instance.category_id, previous.get('category_id')},
+        subcategory_ids={instance.subcategory_id, previous.get('subcategory_id')},
+    )
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_product(sender, instance, **kwargs):
+    """Une image modifiée change le produit : `updated_at` sert à l'ETag des réponses."""
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_catalog_responses(sender, **kwargs):
+    """Toute modification du catalogue invalide les réponses publiques en cache."""
+    invalidate_catalog_cache()
@@ -0,0 +1,56 @@
+"""
+Instantané JSON du catalogue (catégories et produits mis en avant) injecté dans
+index.html pour que le frontend s'hydrate sans appel réseau au premier affichage.
+L'instantané est versionné par les validateurs des tables du catalogue (nombre de
+lignes et max(updated_at), voir products.cache.catalog_validators) : contrairement à
+la version du catalogue, gardée dans un cache local à chaque worker, ils sont lus en
+base et changent donc dans tous les processus après une modification.
+Ces agrégats parcourent les tables : leur résultat est gardé en cache
+CATALOG_SNAPSHOT_VERSION_TTL secondes, sous la version du catalogue (une modification
+faite dans ce processus est donc visible aussitôt, une autre au plus tard après ce délai).
+"""
+from django.conf import settings
+
+from products.api.views import get_catalog_categories, get_catalog_products
+from products.cache import catalog_validators, get_cache, get_catalog_version, get_timeout
+from products.models import Category, SubCategory, Product
+from products.serializers import CategorySerializer, ProductSerializer
+
+
+def compute_snapshot_version():
+    """ETag des tables du catalogue : trois agrégats, aucune sérialisation."""
+    etag, _ = catalog_validators([Category.objects.all(), SubCategory.objects.all(), Product.objects.all()])
+    return etag.strip('"')
+
+
+def get_snapshot_version():
+    ttl = getattr(settings, 'CATALOG_SNAPSHOT_VERSION_TTL', 5)
+    if not ttl:
+        return compute_snapshot_version()
+    return get_cache().get_or_set(
+        f'catalog:{get_catalog_version()}:snapshot-version', compute_snapshot_version, ttl
+    )
+
+
+def build_catalog_snapshot(version):
+    """Mêmes formats que /api/categories/ (résultats) et /api/products/featured/."""
+    categories = get_catalog_categories().order_by('-products_count')
+    featured = get_catalog_products(featured=True)[:8]
+    return {
+        'version': version,
+        'categories': CategorySerializer(categories, many=True).data,
+        'featured_products': ProductSerializer(featured, many=True).data,
+    }
+
+
+def get_catalog_snapshot(version=None):
+    if version is None:
+        version = get_snapshot_version()
+    cache = get_cache()
+    key = f'catalog:snapshot:{version}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_catalog_snapshot(version)
+        if get_timeout():
+            cache.set(key, snapshot, get_timeout())
+    return snapshot
@@ -0,0 +1,32 @@
+"""
+Paramètres `?fields=` et `?expand=` des endpoints du catalogue.
+
+- `fields=name,slug,price` : seuls ces champs sont renvoyés, et seules les colonnes et
+  relations correspondantes sont lues en base ;
+- `expand=category,subcategory` : les relations d'un produit sont renvoyées sous forme
+  d'objets {id, name, slug} au lieu de leurs identifiants.
+Sans ces paramètres, les réponses sont inchangées.
+"""
+
+
+class InvalidFieldset(ValueError):
+    pass
+
+
+def requested_names(request, param, allowed):
+    """Noms demandés dans `?param=a,b` (None si absent) ; InvalidFieldset si un nom est inconnu."""
+    raw = request.query_params.get(param)
+    if raw is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise InvalidFieldset(
+            f"Valeurs inconnues pour '{param}' : {', '.join(unknown)} (disponibles : {', '.join(allowed)})"
+        )
+    return names
+
+
+def requested_fieldset(request, fields, expansions=()):
+    """(fields, expand) de la requête ; expand vaut () si absent."""
+    return requested_names(request, 'fields', fields), requested_names(request, 'expand', expansions) or ()
@@ -0,0 +1,134 @@
+"""
+Autocomplétion tolérante aux fautes de frappe.
+
+Sur PostgreSQL, les noms de produits, catégories et sous-catégories sont indexés
+avec pg_trgm (index GIN `gin_trgm_ops`, migration 0008) et classés par
+`word_similarity`. Ailleurs (SQLite en local), un index de trigrammes en mémoire
+est construit à la demande et reconstruit quand le catalogue change.
+"""
+import threading
+from collections import defaultdict
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Count, Max
+
+from .models import Category, SubCategory, Product
+from .search import strip_accents, TOKEN_RE
+
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 20
+MIN_QUERY_LENGTH = 2
+# Seuil par défaut de pg_trgm.word_similarity_threshold
+SIMILARITY_THRESHOLD = 0.6
+
+
+def suggestion_sources():
+    """Querysets publics interrogés, par type de suggestion."""
+    return {
+        'products': (Product.objects.published(), ('name', 'slug')),
+        'categories': (Category.objects.filter(is_published=True), ('name', 'slug')),
+        'subcategories': (
+            SubCategory.objects.filter(is_published=True, category__is_published=True),
+            ('name', 'slug', 'category__slug'),
+        ),
+    }
+
+
+def suggest(query, limit=DEFAULT_LIMIT):
+    """Retourne les `limit` meilleurs noms de chaque type pour la saisie `query`."""
+    query = (query or '').strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        return {kind: [] for kind in suggestion_sources()}
+    if connection.vendor == 'postgresql':
+        return _suggest_postgresql(query, limit)
+    return fallback_index.search(query, limit)
+
+
+def _suggest_postgresql(query, limit):
+    results = {}
+    for kind, (queryset, fields) in suggestion_sources().items():
+        rows = (
+            queryset.filter(name__trigram_word_similar=query)
+            .annotate(score=TrigramWordSimilarity(query, 'name'))
+            .order_by('-score', 'name')
+            .values(*fields, 'score')[:limit]
+        )
+        results[kind] = [_format_row(row) for row in rows]
+    return results
+
+
+def _format_row(row):
+    row = dict(row)
+    if 'category__slug' in row:
+        row['category_slug'] = row.pop('category__slug')
+    row['score'] = round(float(row['score']), 3)
+    return row
+
+
+def trigrams(text):
+    """Trigrammes au sens de pg_trgm : mots en minuscules sans accents, bordés d'espaces."""
+    result = set()
+    for word in TOKEN_RE.findall(strip_accents(text)):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class TrigramIndex:
+    """Index inversé trigramme -> entrées, reconstruit quand la signature du catalogue change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self._entries = {}
+        self._postings = {}
+
+    def catalog_signature(self):
+        signature = []
+        for queryset, _ in suggestion_sources().values():
+            aggregate = queryset.aggregate(total=Count('pk'), last=Max('updated_at'))
+            signature.append((aggregate['total'], aggregate['last']))
+        return tuple(signature)
+
+    def ensure_built(self):
+        signature = self.catalog_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            entries = {}
+            postings = defaultdict(lambda: defaultdict(set))
+            for kind, (queryset, fields) in suggestion_sources().items():
+                entries[kind] = {}
+                for position, row in enumerate(queryset.values(*fields).iterator()):
+                    grams = trigrams(row['name'])
+                    entries[kind][position] = row
+                    for gram in grams:
+                        postings[kind][gram].add(position)
+            self._entries, self._postings = entries, postings
+            self._signature = signature
+
+    def search(self, query, limit):
+        self.ensure_built()
+        query_grams = trigrams(query)
+        results = {}
+        for kind, entries in self._entries.items():
+            shared = defaultdict(int)
+            for gram in query_grams:
+                for position in self._postings[kind].get(gram, ()):
+                    shared[position] += 1
+            scored = []
+            for position, common in shared.items():
+                row = entries[position]
+                # Approximation de word_similarity : part des trigrammes de la saisie retrouvés
+                score = common / len(query_grams) if query_grams else 0
+                if score >= SIMILARITY_THRESHOLD:
+                    scored.append((-score, row['name'], {**row, 'score': score}))
+            scored.sort(key=lambda item: item[:2])
+            results[kind] = [_format_row(row) for _, _, row in scored[:limit]]
+        return results
+
+
+fallback_index = TrigramIndex()
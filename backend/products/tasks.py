@@ -0,0 +1,28 @@
+"""Tâches de fond du catalogue (voir jobs.queue), exécutées hors des requêtes HTTP."""
+from cloudinary.exceptions import GeneralError, RateLimited
+
+from jobs.queue import TRANSIENT_ERRORS, run_command, task
+
+# Erreurs 5xx et limite de débit de l'API Cloudinary : la tâche est relancée
+CLOUDINARY_ERRORS = TRANSIENT_ERRORS + (GeneralError, RateLimited)
+
+
+@task('seed_products', retry_on=CLOUDINARY_ERRORS)
+def seed_products(job):
+    from products.api.product_seeder import seed_categories, seed_products as seed
+
+    job.report_progress(5, "Création des catégories")
+    categories = seed_categories()
+    job.report_progress(40, "Création des produits et upload des images")
+    seed(categories)
+    return {'categories': len(categories)}
+
+
+@task('sync_cloudinary', retry_on=CLOUDINARY_ERRORS)
+def sync_cloudinary(job):
+    return run_command(job, 'sync_cloudinary')
+
+
+@task('upload_new_products', retry_on=CLOUDINARY_ERRORS)
+def upload_new_products(job, folder_path, category=None):
+    return run_command(job, 'upload_new_products', folder_path, category=category)
@@ -1,3 +1,988 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from django.utils.dateparse import parse_datetime
+
+from .cloudinary_sync import sync_folders
+from . import image_proxy
+from .image_metadata import image_metadata
+from .image_registry import upload_image
+from .fast_serializers import product_values, serialize_products
+from .image_urls import image_variants
+from .models import (
+    Category, SubCategory, Product, ProductImage, ImageAsset, CloudinaryResource, refresh_product_counts,
+)
+
+
+def create_catalog(size, category=None, subcategory=None):
+    """Crée `size` produits publiés avec deux images chacun."""
+    category = category or Category.objects.create(name='Hommes', slug='hommes', is_published=True)
+    subcategory = subcategory or SubCategory.objects.create(
+        category=category, name='Chemises', slug='chemises', is_published=True
+    )
+    start = Product.objects.count()
+    for i in range(start, start + size):
+        product = Product.objects.create(
+            category=category,
+            subcategory=subcategory,
+            name=f'Produit {i}',
+            slug=f'produit-{i}',
+            description='Description',
+            price=Decimal('19.99'),
+            stock=10,
+            featured=True,
+            is_published=True,
+        )
+        ProductImage.objects.create(product=product, image=f'https://example.com/{i}-a.jpg')
+        ProductImage.objects.create(product=product, image=f'https://example.com/{i}-b.jpg', is_main=True)
+    return category, subcategory
+
+
+class CatalogQueryCountTests(TestCase):
+    """Le nombre de requêtes des listes de produits ne dépend pas du nombre de produits."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url_name, kwargs=None, query=''):
+        category, subcategory = create_catalog(1)
+        url = reverse(url_name, kwargs=kwargs) + query
+        small = self.count_queries(url)
+        create_catalog(25, category, subcategory)
+        large = self.count_queries(url)
+        self.assertEqual(small, large)
+
+    def test_product_list(self):
+        self.assertConstantQueries('api-product-list')
+
+    def test_featured_products(self):
+        self.assertConstantQueries('api-featured-products')
+
+    def test_product_search(self):
+        self.assertConstantQueries('api-product-search', query='?q=Produit')
+
+    def test_category_products(self):
+        self.assertConstantQueries('api-category-products', kwargs={'slug': 'hommes'})
+
+    def test_subcategory_products(self):
+        self.assertConstantQueries('api-subcategory-products', kwargs={'slug': 'chemises'})
+
+    def test_main_image_first(self):
+        create_catalog(1)
+        response = self.client.get(reverse('api-product-list'))
+        images = response.data['results'][0]['images']
+        self.assertTrue(images[0]['is_main'])
+
+
+class ExplainCatalogQueriesTests(TestCase):
+    """EXPLAIN de chaque requête publique du catalogue sur la base de test."""
+
+    def test_every_catalog_query_is_explained(self):
+        create_catalog(3)
+        output = io.StringIO()
+        call_command('explain_catalog_queries', verbose_plans=True, stdout=output)
+        for endpoint in (
+            'categories/', 'subcategories/', 'products/', 'products/?sort_by=price', 'products/featured/',
+            'products/search/?q=chemise', 'products/<slug>/', 'categories/<slug>/products/',
+            'subcategories/by_category/', 'subcategories/<slug>/products/',
+        ):
+            self.assertRegex(output.getvalue(), rf'/api/{re.escape(endpoint)} : (OK|parcours séquentiel)')
+
+    def test_analyze_requires_postgresql(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('EXPLAIN ANALYZE disponible')
+        with self.assertRaises(CommandError):
+            call_command('explain_catalog_queries', analyze=True, stdout=io.StringIO())
+
+
+class CatalogPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        create_catalog(5)
+
+    def test_page_number_pagination(self):
+        response = self.client.get(reverse('api-product-list'), {'page_size': 2})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_cursor_pagination_walks_whole_catalog(self):
+        url = reverse('api-product-list') + '?pagination=cursor&page_size=2'
+        slugs = []
+        while url:
+            response = self.client.get(url)
+            slugs += [product['slug'] for product in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(slugs), 5)
+        self.assertEqual(len(set(slugs)), 5)
+
+    def test_unpaginated_compatibility_flag(self):
+        response = self.client.get(reverse('api-category-products', kwargs={'slug': 'hommes'}), {'paginate': 'false'})
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+
+
+class CategoryCountTests(TestCase):
+    """Les compteurs de produits sont agrégés, pas calculés ligne par ligne."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_categories(self, start, size):
+        for i in range(start, start + size):
+            category = Category.objects.create(name=f'Catégorie {i}', slug=f'categorie-{i}', is_published=True)
+            for j in range(3):
+                subcategory = SubCategory.objects.create(
+                    category=category, name=f'Sous {j}', slug=f'sous-{i}-{j}', is_published=True
+                )
+                create_catalog(1, category, subcategory)
+
+    def test_category_list_query_count(self):
+        self.create_categories(0, 1)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('api-category-list'))
+        self.create_categories(1, 10)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('api-category-list'))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        category = response.data['results'][0]
+        self.assertEqual(category['products_count'], 3)
+        self.assertEqual([s['products_count'] for s in category['subcategories']], [1, 1, 1])
+
+    def test_denormalized_counts_follow_product_changes(self):
+        self.create_categories(0, 1)
+        with self.settings(CATALOG_DENORMALIZED_COUNTS=True):
+            refresh_product_counts()
+            category = Category.objects.get()
+            self.assertEqual(category.published_products_count, 3)
+            product = Product.objects.first()
+            product.is_published = False
+            product.save()
+            category.refresh_from_db()
+            self.assertEqual(category.published_products_count, 2)
+            product.subcategory.refresh_from_db()
+            self.assertEqual(product.subcategory.published_products_count, 0)
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Hommes', slug='hommes', is_published=True)
+        self.create_product('Chemise élégante', 'Coupe ajustée en lin')
+        self.create_product('Pantalon chino', 'Se porte avec une chemise blanche')
+
+    def create_product(self, name, description):
+        return Product.objects.create(
+            category=self.category, name=name, slug=name.lower().replace(' ', '-'),
+            description=description, price=Decimal('49.99'), is_published=True,
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse('api-product-search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [product['name'] for product in response.data['results']]
+
+    def test_prefix_and_accent_insensitive(self):
+        self.assertEqual(self.search('elegan'), ['Chemise élégante'])
+
+    def test_name_ranks_above_description(self):
+        self.assertEqual(self.search('chemise'), ['Chemise élégante', 'Pantalon chino'])
+
+    def test_category_name_is_searchable(self):
+        self.assertEqual(len(self.search('hommes')), 2)
+
+    def test_missing_query(self):
+        response = self.client.get(reverse('api-product-search'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_punctuation_only_query(self):
+        self.assertEqual(self.search('!!!'), [])
+        response = self.client.get(reverse('api-product-list'), {'search': '--'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+
+class ProductSuggestTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name='Chaussures', slug='chaussures', is_published=True)
+        for name in ('Salopette en jean', 'CELINE MARGARET LOAFER WITH TRIOMPHE CHAIN'):
+            Product.objects.create(
+                category=category, name=name, slug=name.lower().replace(' ', '-'),
+                description='', price=Decimal('10.00'), is_published=True,
+            )
+
+    def suggest(self, query):
+        response = self.client.get(reverse('api-product-suggest'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_typo_tolerant_product_names(self):
+        self.assertEqual(self.suggest('Salopeta')['products'][0]['name'], 'Salopette en jean')
+        self.assertEqual(
+            self.suggest('celine margret')['products'][0]['name'],
+            'CELINE MARGARET LOAFER WITH TRIOMPHE CHAIN'
+        )
+
+    def test_categories_are_suggested(self):
+        self.assertEqual(self.suggest('chausures')['categories'][0]['slug'], 'chaussures')
+
+    def test_short_query_returns_nothing(self):
+        self.assertEqual(self.suggest('s')['products'], [])
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        create_catalog(2)
+
+    def test_anonymous_responses_are_cached(self):
+        url = reverse('api-product-list')
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(first.data, second.data)
+
+    def test_query_params_are_part_of_the_key(self):
+        url = reverse('api-product-list')
+        self.client.get(url)
+        response = self.client.get(url, {'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_product_change_invalidates(self):
+        url = reverse('api-product-list')
+        self.client.get(url)
+        Product.objects.filter(slug='produit-0').first().delete()
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 1)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        create_catalog(2)
+
+    def test_etag_and_not_modified(self):
+        url = reverse('api-featured-products')
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        url = reverse('api-category-list')
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_image_change_changes_etag(self):
+        url = reverse('api-product-detail', kwargs={'slug': 'produit-0'})
+        etag = self.client.get(url)['ETag']
+        ProductImage.objects.filter(product__slug='produit-0').first().delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+    def test_category_rename_changes_product_list_etags(self):
+        urls = [reverse('api-product-list'), reverse('api-featured-products')]
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        category = Category.objects.get(slug='hommes')
+        category.name = 'Homme'
+        category.save()
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            products = response.data['results'] if 'results' in response.data else response.data
+            self.assertEqual(products[0]['category_name'], 'Homme')
+
+
+class CatalogSnapshotTests(TestCase):
+    def test_snapshot_follows_catalog_version(self):
+        from .snapshot import get_catalog_snapshot
+        create_catalog(2)
+        snapshot = get_catalog_snapshot()
+        self.assertEqual(len(snapshot['categories']), 1)
+        self.assertEqual(len(snapshot['featured_products']), 2)
+        Product.objects.first().delete()
+        self.assertEqual(len(get_catalog_snapshot()['featured_products']), 1)
+
+    @override_settings(CATALOG_SNAPSHOT_VERSION_TTL=0)
+    def test_snapshot_sees_changes_from_other_processes(self):
+        from django.utils import timezone
+        from .snapshot import get_catalog_snapshot
+        create_catalog(2)
+        get_catalog_snapshot()
+        # update() ne déclenche aucun signal : la version locale du catalogue ne change pas
+        Product.objects.filter(slug='produit-0').update(featured=False, updated_at=timezone.now())
+        self.assertEqual(len(get_catalog_snapshot()['featured_products']), 1)
+
+    def test_snapshot_version_is_cached_between_page_views(self):
+        from .snapshot import get_snapshot_version
+        create_catalog(1)
+        version = get_snapshot_version()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_snapshot_version(), version)
+        # Modification locale : nouvelle version du catalogue, recalcul immédiat
+        Product.objects.create(
+            category=Category.objects.get(), name='Nouveau', slug='nouveau', description='', price=Decimal('5.00'),
+        )
+        self.assertNotEqual(get_snapshot_version(), version)
+
+
+class UploadNewProductsTests(TestCase):
+    """Import parallèle : une seule requête pour les slugs existants, INSERT groupés, reprise."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Hommes', slug='hommes', is_published=True)
+        self.folder = tempfile.mkdtemp()
+        for name in ('chemise_bleue', 'costume_noir', 'cravate_rouge', 'jean_brut'):
+            with open(os.path.join(self.folder, f'{name}.jpg'), 'wb') as f:
+                f.write(name.encode())
+        self.manifest = os.path.join(self.folder, '.upload_manifest.json')
+
+    def run_import(self):
+        def upload(data, folder, public_id, resource_type):
+            return {'secure_url': f'https://res.cloudinary.com/demo/{folder}/{public_id}.jpg', 'public_id': public_id}
+
+        output = io.StringIO()
+        with mock.patch('cloudinary.uploader.upload', side_effect=upload) as uploaded:
+            call_command('upload_new_products', self.folder, category='Hommes', workers=4, batch_size=2, stdout=output)
+        return uploaded, output.getvalue()
+
+    def test_import_creates_products_in_batches(self):
+        Product.objects.create(
+            category=self.category, name='Jean Brut', slug='jean-brut', description='', price=Decimal('10.00'), stock=1
+        )
+        uploaded, output = self.run_import()
+        self.assertEqual(uploaded.call_count, 3)
+        self.assertEqual(Product.objects.count(), 4)
+        self.assertEqual(ProductImage.objects.filter(is_main=True, product__slug='costume-noir').count(), 1)
+        self.assertIn('images/s', output)
+
+    def test_interrupted_import_resumes_from_manifest(self):
+        with open(self.manifest, 'w') as f:
+            json.dump({'chemise_bleue.jpg': {'slug': 'chemise-bleue', 'url': 'https://example.com/chemise.jpg'}}, f)
+
+        uploaded, _ = self.run_import()
+        self.assertEqual(uploaded.call_count, 3)
+        self.assertEqual(Product.objects.get(slug='chemise-bleue').images.get().image, 'https://example.com/chemise.jpg')
+
+        uploaded, _ = self.run_import()
+        self.assertEqual(uploaded.call_count, 0)
+        self.assertEqual(Product.objects.count(), 4)
+
+    def test_progress_and_failures_are_reported(self):
+        progress = []
+
+        def upload(data, folder, public_id, resource_type):
+            if public_id == 'jean-brut':
+                raise ConnectionError('Cloudinary indisponible')
+            return {'secure_url': f'https://res.cloudinary.com/demo/{folder}/{public_id}.jpg', 'public_id': public_id}
+
+        with mock.patch('cloudinary.uploader.upload', side_effect=upload):
+            with self.assertRaisesMessage(CommandError, '1 images en échec') as raised:
+                call_command(
+                    'upload_new_products', self.folder, category='Hommes', workers=1,
+                    progress=lambda percent, message='': progress.append(percent), stdout=io.StringIO(),
+                )
+        self.assertIsInstance(raised.exception.__cause__, ConnectionError)
+        self.assertEqual(progress, [25, 50, 75])
+        self.assertEqual(Product.objects.count(), 3)
+
+    def test_duplicate_files_are_uploaded_once(self):
+        with open(os.path.join(self.folder, 'chemise_bleue_copie.jpg'), 'wb') as f:
+            f.write(b'chemise_bleue')
+        uploaded, output = self.run_import()
+        self.assertEqual(uploaded.call_count, 4)
+        self.assertEqual(
+            Product.objects.get(slug='chemise-bleue-copie').images.get().image,
+            Product.objects.get(slug='chemise-bleue').images.get().image,
+        )
+        self.assertIn('1 doublons réutilisés', output)
+
+
+class ImageRegistryTests(TestCase):
+    def setUp(self):
+        self.uploads = []
+
+        def upload(data, **options):
+            self.uploads.append(options['public_id'])
+            return {'secure_url': f"https://res.cloudinary.com/demo/{options['public_id']}.jpg", 'public_id': options['public_id']}
+
+        patcher = mock.patch('cloudinary.uploader.upload', side_effect=upload)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_bytes_are_uploaded_once(self):
+        first = upload_image(b'photo', public_id='a')
+        second = upload_image(b'photo', public_id='b')
+        self.assertEqual(first, second)
+        self.assertEqual(self.uploads, ['a'])
+        self.assertEqual(ImageAsset.objects.count(), 1)
+
+    def test_known_source_url_is_not_downloaded(self):
+        with mock.patch('requests.get') as get:
+            get.return_value.content = b'photo'
+            first = upload_image('https://images.unsplash.com/photo-1?w=500', public_id='a')
+            second = upload_image('https://images.unsplash.com/photo-1?w=500', public_id='b')
+        self.assertEqual(first, second)
+        self.assertEqual(get.call_count, 1)
+
+    def test_reencoded_image_is_uploaded_and_reported(self):
+        from PIL import Image
+
+        def encode(size, quality):
+            image = Image.linear_gradient('L').resize(size).convert('RGB')
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG', quality=quality)
+            return buffer.getvalue()
+
+        first = upload_image(encode((256, 256), 95), public_id='original')
+        with self.assertLogs('products.image_registry', 'WARNING') as logs:
+            second = upload_image(encode((128, 128), 60), public_id='miniature')
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.uploads, ['original', 'miniature'])
+        self.assertIn(first, logs.output[0])
+
+    def test_colour_variants_are_both_uploaded(self):
+        from PIL import Image, ImageDraw
+
+        def shirt(colour):
+            image = Image.new('RGB', (200, 240), 'white')
+            ImageDraw.Draw(image).polygon([(60, 20), (140, 20), (190, 80), (160, 100), (150, 230), (50, 230), (40, 100), (10, 80)], fill=colour)
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG')
+            return buffer.getvalue()
+
+        red = upload_image(shirt('#c0392b'), public_id='chemise-rouge')
+        with self.assertLogs('products.image_registry', 'WARNING'):
+            navy = upload_image(shirt('#1b2a49'), public_id='chemise-marine')
+        self.assertNotEqual(red, navy)
+        self.assertEqual(self.uploads, ['chemise-rouge', 'chemise-marine'])
+        self.assertEqual(ImageAsset.objects.count(), 2)
+
+
+class FakeCloudinaryAPI:
+    """Admin API et Search API Cloudinary locales : sous-dossiers et ressources paginées par `next_cursor`."""
+
+    def __init__(self, assets):
+        self.assets = assets
+        self.pages_served = 0
+
+    def subfolders(self, path):
+        names = {
+            resource['public_id'][len(path) + 1:].split('/')[0]
+            for resource in self.assets
+            if resource['public_id'].startswith(f'{path}/') and '/' in resource['public_id'][len(path) + 1:]
+        }
+        return {'folders': [{'name': name, 'path': f'{path}/{name}'} for name in sorted(names)]}
+
+    def resources(self, type, prefix, max_results, next_cursor=None):
+        matching = [resource for resource in self.assets if resource['public_id'].startswith(prefix)]
+        matching.sort(key=lambda resource: resource['created_at'], reverse=True)
+        return self.page(matching, max_results, next_cursor)
+
+    def search(self, expression, max_results, next_cursor=None):
+        folder, since = re.fullmatch(r'folder="(.+)" AND created_at>"(.+)"', expression).groups()
+        matching = [
+            resource for resource in self.assets
+            if resource['public_id'].rsplit('/', 1)[0] == folder
+            and parse_datetime(resource['created_at']) > parse_datetime(since)
+        ]
+        matching.sort(key=lambda resource: resource['created_at'])
+        return self.page(matching, max_results, next_cursor)
+
+    def page(self, matching, max_results, next_cursor):
+        offset = int(next_cursor or 0)
+        self.pages_served += 1
+        page = {'resources': matching[offset:offset + max_results], 'total_count': len(matching)}
+        if offset + max_results < len(matching):
+            page['next_cursor'] = str(offset + max_results)
+        return page
+
+
+def cloudinary_resource(name, minute, etag='v1'):
+    public_id = f'jaelleshop/products/hommes/{name}'
+    return {
+        'public_id': public_id,
+        'secure_url': f'https://res.cloudinary.com/demo/image/upload/{public_id}-{etag}.jpg',
+        'created_at': f'2025-01-01T{minute // 60:02d}:{minute % 60:02d}:00Z',
+        'etag': etag,
+        'version': 1,
+    }
+
+
+class CloudinarySyncTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Hommes', slug='hommes', is_published=True)
+        for i in range(5):
+            Product.objects.create(
+                category=category, name=f'Produit {i}', slug=f'produit-{i}', description='',
+                price=Decimal('10.00'), stock=1, is_published=True,
+            )
+        resources = [cloudinary_resource(f'photo-{i:03d}', i) for i in range(249)]
+        resources.append(cloudinary_resource('produit-3', 300))
+        self.api = FakeCloudinaryAPI(resources)
+
+    def test_all_pages_are_synced(self):
+        report, = sync_folders(api=self.api, page_size=100, fetch_metadata=False)
+        self.assertEqual((report.fetched, report.pages, report.created), (250, 3, 250))
+        self.assertEqual(CloudinaryResource.objects.count(), 250)
+        self.assertEqual(report.assigned, 5)
+        self.assertTrue(ProductImage.objects.get(product__slug='produit-3').image.endswith('produit-3-v1.jpg'))
+        self.assertEqual(ProductImage.objects.filter(is_main=True).count(), 5)
+
+    def test_second_run_only_reads_new_resources(self):
+        sync_folders(api=self.api, page_size=100, fetch_metadata=False)
+        self.api.assets.append(cloudinary_resource('photo-new', 400))
+        self.api.pages_served = 0
+
+        with CaptureQueriesContext(connection) as ctx:
+            report, = sync_folders(api=self.api, page_size=100, fetch_metadata=False)
+        self.assertEqual(self.api.pages_served, 1)
+        self.assertEqual((report.fetched, report.created, report.unchanged), (1, 1, 0))
+        self.assertEqual(ProductImage.objects.count(), 5)
+        self.assertLess(len(ctx.captured_queries), 20)
+
+    def test_changed_resource_updates_its_image(self):
+        sync_folders(api=self.api, page_size=100, fetch_metadata=False)
+        self.api.assets[-1] = cloudinary_resource('produit-3', 500, etag='v2')
+
+        report, = sync_folders(api=self.api, page_size=100, fetch_metadata=False)
+        self.assertEqual(report.changed, 1)
+        self.assertTrue(ProductImage.objects.get(product__slug='produit-3').image.endswith('produit-3-v2.jpg'))
+
+    def test_full_pass_marks_missing_resources_deleted(self):
+        sync_folders(api=self.api, page_size=100, fetch_metadata=False)
+        del self.api.assets[-1]  # produit-3
+
+        # Une passe incrémentale ne voit pas les suppressions
+        report, = sync_folders(api=self.api, page_size=100, fetch_metadata=False)
+        self.assertEqual(report.deleted, 0)
+        report, = sync_folders(api=self.api, full=True, page_size=100, fetch_metadata=False)
+        self.assertEqual(report.deleted, 1)
+        self.assertIsNotNone(CloudinaryResource.objects.get(public_id__endswith='/produit-3').deleted_at)
+        self.assertFalse(ProductImage.objects.filter(image__endswith='produit-3-v1.jpg').exists())
+        # Le produit redevenu sans image reçoit une ressource libre
+        self.assertEqual(report.assigned, 1)
+        self.assertTrue(ProductImage.objects.get(product__slug='produit-3').is_main)
+
+
+class ImageVariantTests(TestCase):
+    cloudinary = 'http://res.cloudinary.com/demo/image/upload/v1700/jaelleshop/products/hommes/chemise.jpg'
+
+    def test_cloudinary_variants_are_url_transformations(self):
+        card = image_variants(self.cloudinary)['card']
+        self.assertEqual(
+            card['url'],
+            'https://res.cloudinary.com/demo/image/upload/c_fill,g_auto,w_600,h_600,f_auto,q_auto/v1700/jaelleshop/products/hommes/chemise.jpg',
+        )
+        self.assertEqual((card['width'], card['height']), (600, 600))
+        self.assertIn('w_1200,h_1200', card['srcset'])
+        self.assertIn('f_avif', card['avif'])
+        self.assertIn('f_webp', card['webp'])
+
+    @override_settings(IMAGE_PROXY_ENABLED=False)
+    def test_unsplash_parameters_are_replaced(self):
+        thumbnail = image_variants('https://images.unsplash.com/photo-1?w=500&fit=crop&q=60&ixid=abc')['thumbnail']
+        self.assertEqual(thumbnail['url'], 'https://images.unsplash.com/photo-1?ixid=abc&w=150&h=150&fit=crop&auto=format&q=75')
+        self.assertTrue(thumbnail['webp'].endswith('&fm=webp'))
+
+    def test_unknown_hosts_are_left_untouched(self):
+        zoom = image_variants('https://example.com/photo.jpg')['zoom']
+        self.assertEqual((zoom['url'], zoom['srcset']), ('https://example.com/photo.jpg', ''))
+
+    def test_product_list_exposes_variants(self):
+        create_catalog(1)
+        response = APIClient().get(reverse('api-product-list'))
+        image = response.data['results'][0]['images'][0]
+        self.assertEqual(set(image['variants']), {'thumbnail', 'card', 'zoom'})
+        self.assertEqual(image['variants']['card']['width'], 600)
+
+
+def png_bytes(color, size=(40, 30)):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class ImageMetadataTests(TestCase):
+    def test_metadata_of_a_solid_image(self):
+        metadata = image_metadata(png_bytes((200, 30, 60)))
+        self.assertEqual((metadata['width'], metadata['height']), (40, 30))
+        self.assertEqual(metadata['dominant_color'], '#c81e3c')
+        # 4x3 composantes : 1 + 1 + 4 + 2 * 11 caractères
+        self.assertEqual(len(metadata['blurhash']), 28)
+
+    def test_image_saved_from_registry_copies_metadata(self):
+        create_catalog(1)
+        asset = ImageAsset.objects.create(
+            sha256='a' * 64, url='https://res.cloudinary.com/demo/image/upload/v1/a.jpg',
+            width=800, height=1000, bytes=12345, blurhash='LEHV6nWB2yk8pyo0adR*.7kCMdnj', dominant_color='#aabbcc',
+        )
+        image = ProductImage.objects.create(product=Product.objects.get(), image=asset.url)
+        self.assertEqual((image.width, image.height, image.dominant_color), (800, 1000, '#aabbcc'))
+
+    def test_backfill_command_fills_existing_images(self):
+        create_catalog(2)
+        client = APIClient()
+        etag = client.get(reverse('api-product-list'))['ETag']
+        with mock.patch('requests.get') as get:
+            get.return_value.content = png_bytes((10, 120, 240))
+            call_command('backfill_image_metadata', workers=4, batch_size=3, stdout=io.StringIO())
+        # Une requête HTTP par URL distincte, toutes les images renseignées
+        self.assertEqual(get.call_count, 4)
+        self.assertFalse(ProductImage.objects.filter(blurhash='').exists())
+
+        # Cache du catalogue invalidé et produits redatés : nouvelle réponse, nouvel ETag
+        response = client.get(reverse('api-product-list'))
+        self.assertNotEqual(response['ETag'], etag)
+        image = response.data['results'][0]['images'][0]
+        self.assertEqual((image['width'], image['height'], image['dominant_color']), (40, 30, '#0a78f0'))
+
+
+    def test_failed_images_are_not_downloaded_again(self):
+        create_catalog(1)
+        broken, unreadable = ProductImage.objects.order_by('id')
+
+        def get(url, timeout):
+            if url == broken.image:
+                raise ConnectionError('introuvable')
+            return mock.Mock(content=b'pas une image')
+
+        with mock.patch('requests.get', side_effect=get):
+            call_command('backfill_image_metadata', stdout=io.StringIO())
+        broken.refresh_from_db()
+        unreadable.refresh_from_db()
+        self.assertEqual((broken.bytes, unreadable.bytes, unreadable.blurhash), (0, 13, ''))
+
+        with mock.patch('requests.get') as again:
+            call_command('backfill_image_metadata', stdout=io.StringIO())
+        self.assertEqual(again.call_count, 0)
+
+    def test_unchanged_image_save_skips_registry_lookup(self):
+        create_catalog(1)
+        image = ProductImage.objects.order_by('id').first()
+        image.is_main = False
+        # UPDATE de l'image et date du produit (signal), sans lecture du registre
+        with self.assertNumQueries(2):
+            image.save()
+
+
+class ImageProxyTests(TestCase):
+    """Dérivés WebP des images externes : original téléchargé une fois, cache disque LRU."""
+    unsplash = 'https://images.unsplash.com/photo-1?w=500&fit=crop&q=60'
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        overrides = override_settings(IMAGE_PROXY_ENABLED=True, IMAGE_PROXY_ROOT=root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client = APIClient()
+
+    def get(self, url, original=None, **headers):
+        with mock.patch('requests.get') as get:
+            get.return_value.headers = {}
+            get.return_value.iter_content.return_value = [original or png_bytes((10, 120, 240), size=(400, 300))]
+            response = self.client.get(url, **headers)
+        return response, get.call_count
+
+    def test_external_variants_point_to_the_proxy(self):
+        card = image_variants(self.unsplash)['card']
+        self.assertTrue(card['url'].startswith('/api/images/') and card['url'].endswith('.webp'))
+        self.assertNotIn('webp', card)
+        self.assertEqual(len(card['srcset'].split(', ')), 2)
+
+    def test_derivative_is_generated_once_and_immutable(self):
+        from PIL import Image
+
+        response, downloads = self.get(image_variants(self.unsplash)['card']['url'])
+        self.assertEqual((response.status_code, downloads), (200, 1))
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(Image.open(io.BytesIO(b''.join(response.streaming_content))).size, (600, 600))
+
+        # Autre taille : l'original est déjà sur disque
+        response, downloads = self.get(image_variants(self.unsplash)['thumbnail']['url'])
+        self.assertEqual((response.status_code, downloads), (200, 0))
+
+        # Revalidation : le dérivé ne change jamais pour une même URL
+        card = image_variants(self.unsplash)['card']['url']
+        etag = self.get(card)[0]['ETag']
+        self.assertEqual(self.get(card, HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+
+    def test_oversized_original_is_not_decoded(self):
+        url = image_variants(self.unsplash)['card']['url']
+        with override_settings(IMAGE_PROXY_MAX_ORIGINAL_BYTES=1024):
+            response, downloads = self.get(url, original=b'x' * 2048)
+        self.assertEqual((response.status_code, response['Location']), (302, self.unsplash))
+        self.assertFalse(os.path.exists(image_proxy.cache_path('originals', image_proxy.digest(self.unsplash))))
+        self.assertEqual(image_proxy._locks, {})
+
+    def test_derivative_evicted_before_open_is_regenerated(self):
+        url = image_variants(self.unsplash)['card']['url']
+        real = image_proxy.derivative
+        calls = []
+
+        def evicted_once(*args):
+            path, key = real(*args)
+            if not calls:
+                os.remove(path)
+            calls.append(path)
+            return path, key
+
+        with mock.patch.object(image_proxy, 'derivative', side_effect=evicted_once):
+            response, downloads = self.get(url)
+        self.assertEqual((response.status_code, len(calls)), (200, 2))
+
+        # Toujours absent après régénération : redirection vers l'original plutôt qu'une 500
+        with mock.patch.object(image_proxy, 'derivative', return_value=('/nonexistent.webp', 'k')):
+            response, downloads = self.get(url)
+        self.assertEqual((response.status_code, response['Location']), (302, self.unsplash))
+
+    def test_forged_tokens_are_rejected(self):
+        url = image_variants(self.unsplash)['card']['url']
+        self.assertEqual(self.get(url.replace('.webp', 'x.webp'))[0].status_code, 404)
+        forged = image_proxy.signing.dumps(['https://example.com/a.jpg', 100, 100], salt=image_proxy.SIGNING_SALT)
+        self.assertEqual(self.get(f'/api/images/{forged}.webp')[0].status_code, 404)
+
+    def test_eviction_removes_least_recently_used_files(self):
+        paths = []
+        for i in range(3):
+            path = image_proxy.cache_path('derivatives', f'{i:02d}' * 32, '.webp')
+            image_proxy.write_atomic(path, b'x' * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+            paths.append(path)
+        image_proxy.touch(paths[0])  # servi récemment
+
+        self.assertEqual(image_proxy.evict(max_bytes=200), (1, 100))
+        self.assertEqual([os.path.exists(path) for path in paths], [True, False, True])
+
+
+class CatalogImportExportTests(TestCase):
+    """Export puis réimport du catalogue en flux, upsert par slug."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def export(self, name, *args):
+        path = os.path.join(self.folder, name)
+        call_command('catalog_export', path, *args, stdout=io.StringIO())
+        with open(path, encoding='utf-8') as f:
+            return path, f.read()
+
+    def import_file(self, path, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('catalog_import', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def write(self, name, rows):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(row) + '\n' for row in rows)
+        return path
+
+    def test_round_trip_restores_the_catalog(self):
+        create_catalog(3)
+        for name in ('catalog.jsonl', 'catalog.csv'):
+            with self.subTest(format=name):
+                path, exported = self.export(name)
+                Category.objects.all().delete()
+
+                output, _ = self.import_file(path, batch_size=2)
+                self.assertIn('lignes/s', output)
+                self.assertEqual(Product.objects.count(), 3)
+                self.assertEqual(self.export(name)[1], exported)
+                main = ProductImage.objects.get(product__slug='produit-0', is_main=True)
+                self.assertEqual(main.image, 'https://example.com/0-b.jpg')
+
+    def test_existing_rows_are_updated_by_slug(self):
+        create_catalog(1)
+        kept = ProductImage.objects.get(image='https://example.com/0-a.jpg')
+        path = self.write('update.jsonl', [{
+            'type': 'product', 'slug': 'produit-0', 'name': 'Renommé', 'description': 'D',
+            'category': 'hommes', 'subcategory': 'chemises', 'price': '25.00', 'is_published': True,
+            'images': ['https://example.com/0-a.jpg', 'https://example.com/new.jpg'],
+        }])
+        self.import_file(path)
+
+        product = Product.objects.get()
+        self.assertEqual((product.name, product.price), ('Renommé', Decimal('25.00')))
+        images = {image.image: image for image in product.images.all()}
+        self.assertEqual(set(images), {'https://example.com/0-a.jpg', 'https://example.com/new.jpg'})
+        # Image conservée (même ligne), devenue principale
+        self.assertEqual(images['https://example.com/0-a.jpg'].pk, kept.pk)
+        self.assertTrue(images['https://example.com/0-a.jpg'].is_main)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        path = self.write('errors.jsonl', [
+            {'type': 'category', 'slug': 'femmes', 'name': 'Femmes', 'is_published': True},
+            {'type': 'product', 'slug': 'robe', 'name': 'Robe', 'category': 'femmes', 'price': '40'},
+            {'type': 'product', 'slug': 'orphelin', 'name': 'Orphelin', 'category': 'inconnue', 'price': '10'},
+            {'type': 'product', 'slug': 'sans-prix', 'name': 'Sans prix', 'category': 'femmes'},
+        ])
+        output, errors = self.import_file(path)
+        self.assertEqual(list(Product.objects.values_list('slug', flat=True)), ['robe'])
+        self.assertIn('Ligne 3', errors)
+        self.assertIn('Ligne 4', errors)
+        self.assertIn('2 erreurs', output)
+
+    def test_export_endpoint_streams_the_published_catalog(self):
+        from django.contrib.auth import get_user_model
+
+        create_catalog(3)
+        Product.objects.filter(slug='produit-2').update(is_published=False)
+        client = APIClient()
+        url = reverse('api-catalog-export')
+        self.assertEqual(client.get(url).status_code, 401)
+
+        client.force_authenticate(get_user_model().objects.create_user(
+            email='partner@example.com', password='secret', first_name='P', last_name='Q',
+        ))
+        # Catégories, sous-catégories, produits, images : une requête chacun
+        with self.assertNumQueries(4):
+            response = client.get(url)
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual([row['type'] for row in rows], ['category', 'subcategory', 'product', 'product'])
+        self.assertEqual(rows[2]['images'], ['https://example.com/0-b.jpg', 'https://example.com/0-a.jpg'])
+
+
+class FastSerializerTests(TestCase):
+    """Le chemin rapide des listes produit le même JSON que ProductSerializer."""
+
+    def test_output_is_byte_identical(self):
+        from rest_framework.renderers import JSONRenderer
+
+        from .api.views import get_catalog_products
+        from .serializers import ProductSerializer
+
+        category, _ = create_catalog(3)
+        Product.objects.create(
+            category=category, name='Sans sous-catégorie', slug='sans-sous-categorie', description='D',
+            price=Decimal('5.5'), is_published=True,
+        )
+        ProductImage.objects.filter(image='https://example.com/0-a.jpg').update(
+            width=800, height=1000, bytes=1234, blurhash='LEHV6nWB2yk8pyo0adR*.7kCMdnj', dominant_color='#aabbcc',
+        )
+        queryset = get_catalog_products().order_by('-created_at', '-id')
+
+        expected = JSONRenderer().render(ProductSerializer(queryset, many=True).data)
+        with self.assertNumQueries(2):
+            fast = JSONRenderer().render(serialize_products(product_values(queryset)))
+        self.assertEqual(fast, expected)
+
+    def test_benchmark_command_checks_identity(self):
+        output = io.StringIO()
+        call_command('benchmark_catalog', products=20, repeat=1, stdout=output)
+        self.assertIn('JSON identique', output.getvalue())
+        self.assertFalse(Product.objects.exists())
+
+
+class FastJSONTests(TestCase):
+    """Rendu orjson identique au JSONRenderer de DRF, repli standard pour les cas non gérés."""
+
+    def test_renderer_output_matches_drf(self):
+        import uuid
+        from datetime import datetime, timezone as dt_timezone
+
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+
+        from jaelleshop.fast_json import FastJSONRenderer
+
+        data = {
+            'price': Decimal('19.99'),
+            'created_at': datetime(2024, 5, 1, 10, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'name': 'Chemise brodée \u2028 été',
+            'label': gettext_lazy('Produits'),
+            'counts': {1: 'un'},
+            'items': [{'a': None, 'b': True, 'c': 1.5}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+        # Entier hors 64 bits : repli sur le rendu standard
+        self.assertEqual(FastJSONRenderer().render({'huge': 2 ** 70}), b'{"huge":1180591620717411303424}')
+
+    def test_parser_reads_json_and_rejects_invalid_bodies(self):
+        from rest_framework.exceptions import ParseError
+
+        from jaelleshop.fast_json import FastJSONParser
+
+        self.assertEqual(FastJSONParser().parse(io.BytesIO('{"nom": "été"}'.encode())), {'nom': 'été'})
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"nom":'))
+
+
+class SparseFieldsetTests(TestCase):
+    """`?fields=` et `?expand=` réduisent la réponse et les requêtes SQL."""
+
+    def setUp(self):
+        create_catalog(2)
+        self.client = APIClient()
+
+    def test_product_list_returns_only_requested_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('api-product-list'), {'fields': 'slug,price,name,main_image'})
+        self.assertEqual(response.status_code, 200)
+        product = response.data['results'][0]
+        # Ordre canonique des champs, quel que soit l'ordre demandé
+        self.assertEqual(list(product), ['name', 'slug', 'price', 'main_image'])
+        self.assertEqual(product['main_image']['image'], 'https://example.com/1-b.jpg')
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('"description"', sql)
+
+    def test_without_images_no_image_query_is_made(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('api-product-list'), {'fields': 'id,name'})
+        self.assertFalse(any('products_productimage' in query['sql'] for query in queries.captured_queries))
+
+    def test_expand_nests_category_and_subcategory(self):
+        response = self.client.get(reverse('api-product-list'), {'fields': 'slug,category,subcategory', 'expand': 'category,subcategory'})
+        product = response.data['results'][0]
+        self.assertEqual(product['category'], {'id': Category.objects.get().pk, 'name': 'Hommes', 'slug': 'hommes'})
+        self.assertEqual(product['subcategory']['slug'], 'chemises')
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('api-product-list'), {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.data['error'])
+        self.assertEqual(self.client.get(reverse('api-featured-products'), {'expand': 'images'}).status_code, 400)
+
+    def test_category_and_detail_endpoints_accept_fields(self):
+        categories = self.client.get(reverse('api-category-list'), {'fields': 'name,slug'}).data['results']
+        self.assertEqual(categories, [{'name': 'Hommes', 'slug': 'hommes'}])
+
+        with CaptureQueriesContext(connection) as queries:
+            detail = self.client.get(reverse('api-product-detail', args=['produit-0']), {'fields': 'name,price'})
+        self.assertEqual(detail.data, {'name': 'Produit 0', 'price': '19.99'})
+        self.assertFalse(any('products_productimage' in query['sql'] for query in queries.captured_queries))
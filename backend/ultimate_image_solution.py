@@ -15,6 +15,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jaelleshop.settings')
 django.setup()
 
 from products.models import Product, Category, ProductImage
+from products.image_registry import find_by_source, upload_image
 
 # Configuration Cloudinary
 cloudinary.config(
@@ -466,18 +467,25 @@ def download_and_upload_image(image_url, cloudinary_path):
         if 'unsplash.com' in image_url:
             image_url += '?w=800&q=80&auto=format'
         
+        # Registre d'images : URL déjà traitée -> ni téléchargement ni upload
+        existing = find_by_source(image_url)
+        if existing is not None:
+            return existing.url
+        
         response = requests.get(image_url, timeout=15)
         response.raise_for_status()
         
-        result = cloudinary.uploader.upload(
+        # Upload vers Cloudinary, sauf si le contenu y est déjà
+        secure_url = upload_image(
             response.content,
+            source_url=image_url,
             public_id=cloudinary_path,
             overwrite=True,
             resource_type="image",
             format="jpg"
         )
         
-        return result['secure_url']
+        return secure_url
         
     except Exception as e:
         print(f"        ❌ Erreur: {str(e)}")
@@ -12,6 +12,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jaelleshop.settings')
 django.setup()
 
 from products.models import Category, Product, ProductImage
+from products.image_registry import find_by_source, upload_image
 
 # URLs d'images de qualité depuis Pexels et Pixabay (libres de droits)
 PRODUCT_IMAGES = {
@@ -64,6 +65,11 @@ def download_and_upload_image(image_url, category_name, product_name, product_id
     try:
         print(f"Téléchargement de l'image depuis: {image_url}")
         
+        # Registre d'images : URL déjà traitée -> ni téléchargement ni upload
+        existing = find_by_source(image_url)
+        if existing is not None:
+            return existing.url
+        
         # Télécharger l'image
         response = requests.get(image_url, stream=True, timeout=30)
         response.raise_for_status()
@@ -92,18 +98,18 @@ def download_and_upload_image(image_url, category_name, product_name, product_id
         public_id = f"evimeria_{category_name}_{product_id}"
         folder_path = f"evimeria/categories/{category_name}"
         
-        upload_result = cloudinary.uploader.upload(
+        secure_url = upload_image(
             img_byte_arr,
+            source_url=image_url,
             folder=folder_path,
             public_id=public_id,
-            resource_type="image",
             format="jpg",
             quality="auto:good",
             fetch_format="auto"
         )
         
-        print(f"✓ Image uploadée avec succès: {upload_result['secure_url']}")
-        return upload_result['secure_url']
+        print(f"✓ Image uploadée avec succès: {secure_url}")
+        return secure_url
         
     except Exception as e:
         print(f"✗ Erreur lors de l'upload de l'image: {str(e)}")
@@ -53,10 +53,29 @@ export interface Product {
   review_count: number;
 }
 
+export interface ImageVariant {
+  url: string;
+  width: number;
+  height: number | null;
+  srcset: string;
+  avif?: string;
+  webp?: string;
+}
+
 export interface ProductImage {
   id: number;
   image: string;
   thumbnail: string;
+  is_main?: boolean;
+  image_url?: string;
+  // Variantes redimensionnées par le CDN (vignette, carte, zoom)
+  variants?: Record<'thumbnail' | 'card' | 'zoom', ImageVariant>;
+  // Métadonnées calculées à l'import (placeholder avant chargement)
+  width?: number | null;
+  height?: number | null;
+  bytes?: number | null;
+  blurhash?: string;
+  dominant_color?: string;
 }
 
 export interface Category {
@@ -65,6 +84,7 @@ export interface Category {
   slug: string;
   description: string;
   image?: string;
+  image_variants?: Record<'thumbnail' | 'card' | 'banner', ImageVariant>;
   products_count?: number;
 }
 
@@ -101,6 +121,28 @@ export interface PaginatedResponse<T> {
   results: T[];
 }
 
+// ÉTAT INITIAL
+// Instantané du catalogue injecté par le serveur dans index.html (voir backend/jaelleshop/spa.py)
+interface InitialCatalogState {
+  version: string;
+  categories: Category[];
+  featured_products: Product[];
+}
+
+let initialCatalogState: InitialCatalogState | null | undefined;
+
+export const getInitialCatalogState = (): InitialCatalogState | null => {
+  if (initialCatalogState === undefined) {
+    const element = document.getElementById('initial-catalog-state');
+    try {
+      initialCatalogState = element?.textContent ? JSON.parse(element.textContent) : null;
+    } catch {
+      initialCatalogState = null;
+    }
+  }
+  return initialCatalogState ?? null;
+};
+
 // API UTILS
 const safeApiCall = async <T>(apiCall: Promise<{ data: PaginatedResponse<T> }>): Promise<PaginatedResponse<T>> => {
   try {
@@ -135,6 +177,11 @@ export const getProductBySlug = async (slug: string) => {
 };
 
 export const getFeaturedProducts = async (): Promise<PaginatedResponse<Product>> => {
+  const initialState = getInitialCatalogState();
+  if (initialState) {
+    // Même format que la réponse de /products/featured/ (liste)
+    return initialState.featured_products as unknown as PaginatedResponse<Product>;
+  }
   try {
     return await safeApiCall<Product>(api.get('/products/featured/'));
   } catch (error) {
@@ -144,6 +191,10 @@ export const getFeaturedProducts = async (): Promise<PaginatedResponse<Product>>
 };
 
 export const getCategories = async (): Promise<Category[]> => {
+  const initialState = getInitialCatalogState();
+  if (initialState) {
+    return initialState.categories;
+  }
   try {
     const response = await safeApiCall<Category>(api.get('/categories/'));
     return response.results;
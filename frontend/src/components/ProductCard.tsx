@@ -20,6 +20,10 @@ const ProductCard: React.FC<ProductCardProps> = ({
   // Utiliser le hook pour formater les prix selon la devise
   const formatPrice = useCurrencyFormatter(currencyCode);
   
+  // Image principale et sa variante "carte" (srcset et dimensions fournis par l'API)
+  const mainImage = product.images?.find(img => img.is_main) || product.images?.[0];
+  const card = mainImage?.variants?.card;
+
   // Calcul du rabais si applicable
   const discount = product.discount_percentage || 0;
   const priceValue = parseFloat(product.price);
@@ -108,12 +112,17 @@ const ProductCard: React.FC<ProductCardProps> = ({
             {product.images && product.images.length > 0 ? (
               <motion.div
                 className="w-full h-full bg-gray-50"
+                style={mainImage?.dominant_color ? { backgroundColor: mainImage.dominant_color } : undefined}
                 initial={{ opacity: 0 }}
                 animate={{ opacity: 1 }}
                 transition={{ duration: 0.5 }}
               >
                 <motion.img 
-                  src={product.images.find(img => img.is_main)?.image_url || product.images[0].image_url} 
+                  src={card?.url || mainImage?.image_url} 
+                  srcSet={card?.srcset || undefined}
+                  sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+                  width={card?.width}
+                  height={card?.height || undefined}
                   alt={product.name} 
                   className="w-full h-full object-cover object-center"
                   whileHover={{ scale: 1.08 }}